@@ -0,0 +1,461 @@
+import os
+import sys
+import copy
+import json
+import random
+import argparse
+import logging
+import resource
+import multiprocessing
+from time import perf_counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from torch import cuda
+
+from main import Processor
+from tasks import opensearch_insert
+
+
+# Words the synthetic abstracts are drawn from
+CONST_SYNTHETIC_VOCABULARY = (
+    "patients treatment clinical study cells protein expression gene mutation "
+    "tumor cancer therapy response analysis results significant increased reduced "
+    "levels disease risk cohort trial randomized placebo dose outcome mortality "
+    "infection virus bacterial resistance antibiotic immune inflammation receptor "
+    "signaling pathway kinase inhibitor mice model in vivo in vitro tissue blood "
+    "serum plasma biomarker diagnosis prognosis survival follow-up months years "
+    "association correlation regression sensitivity specificity imaging MRI "
+    "surgery postoperative complications chronic acute syndrome cardiovascular "
+    "diabetes obesity insulin glucose metabolism liver kidney brain neuronal"
+).split()
+
+CONST_BENCHMARK_PHASES = ["normalize", "chunk", "encode", "serialize", "write"]
+
+
+class _InMemoryIndices:
+    """
+    Minimal stand-in for the `indices` namespace of the OpenSearch client.
+    """
+
+    def __init__(self) -> None:
+        self.mappings: Dict[str, Dict[str, Any]] = {}
+
+    def exists(self, index: str) -> bool:
+        return index in self.mappings
+
+    def create(self, index: str, body: Dict[str, Any], **kwargs: Any) -> None:
+        self.mappings[index] = body
+
+    def get_mapping(self, index: str) -> Dict[str, Any]:
+        return {index: {"mappings": self.mappings[index].get("mappings", {})}}
+
+
+class InMemoryOpenSearch:
+    """
+    In-process stand-in for the OpenSearch client used by the benchmark.
+
+    Bulk requests are serialized to NDJSON, like the real client does before sending
+    them, and the documents are kept in memory. Time spent serializing and storing is
+    accumulated separately.
+    """
+
+    def __init__(self) -> None:
+        self.indices = _InMemoryIndices()
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.serialize_seconds: float = 0.0
+        self.write_seconds: float = 0.0
+        self.bytes_sent: int = 0
+
+    def reset(self) -> None:
+        self.documents = {}
+        self.serialize_seconds = 0.0
+        self.write_seconds = 0.0
+        self.bytes_sent = 0
+
+    def bulk(self, index: str, body: List[Dict[str, Any]]) -> Dict[str, Any]:
+        start = perf_counter()
+        payload = "\n".join(json.dumps(line) for line in body) + "\n"
+        self.serialize_seconds += perf_counter() - start
+        self.bytes_sent += len(payload)
+
+        start = perf_counter()
+        items = []
+        for action, source in zip(body[::2], body[1::2]):
+            op_type, meta = next(iter(action.items()))
+            target = self.documents.setdefault(meta.get("_index", index), {})
+            if op_type == "update":
+                target.setdefault(meta["_id"], {}).update(source["doc"])
+            else:
+                target[meta["_id"]] = source
+            items.append({op_type: {"_id": meta["_id"], "status": 201}})
+        self.write_seconds += perf_counter() - start
+
+        return {"errors": False, "items": items}
+
+    def close(self) -> None:
+        pass
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock time of wrapped methods per benchmark phase.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.seconds = {}
+
+    def wrap(self, obj: Any, method_name: str, phase: str) -> None:
+        """
+        Replaces a method of an object with a timed version of itself.
+
+        Args:
+            obj (Any): Object owning the method.
+            method_name (str): Name of the method to time.
+            phase (str): Phase the time is accumulated under.
+        """
+        method = getattr(obj, method_name)
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds[phase] = (
+                    self.seconds.get(phase, 0.0) + perf_counter() - start
+                )
+
+        setattr(obj, method_name, timed)
+
+
+def synthetic_corpus(n_documents: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generates source documents shaped like the hits of the PubMed source index.
+
+    Args:
+        n_documents (int): Number of documents to generate.
+        seed (int): Random seed, so every run sees the same corpus. Defaults to 42.
+
+    Returns:
+        List[Dict[str, Any]]: Documents with `_id` and `_source`.
+    """
+    rng = random.Random(seed)
+    first_day = date(2020, 1, 1)
+
+    def sentence() -> str:
+        words = rng.choices(CONST_SYNTHETIC_VOCABULARY, k=rng.randint(8, 30))
+        return " ".join(words).capitalize() + "."
+
+    documents = []
+    for i in range(n_documents):
+        # Abstract lengths between a short report and a long structured abstract
+        abstract = " ".join(sentence() for _ in range(rng.randint(3, 20)))
+        documents.append(
+            {
+                "_id": str(30000000 + i),
+                "_source": {
+                    "title": sentence(),
+                    "abstract": abstract,
+                    "articleDate": (
+                        first_day + timedelta(days=rng.randint(0, 1500))
+                    ).strftime("%Y-%m-%d"),
+                    "authors": [
+                        {
+                            "firstName": f"First{rng.randint(0, 999)}",
+                            "lastName": f"Last{rng.randint(0, 999)}",
+                            "affiliations": [
+                                {"institute": f"Institute {rng.randint(0, 99)}"}
+                            ],
+                        }
+                        for _ in range(rng.randint(1, 8))
+                    ],
+                    "keywords": [
+                        {"name": word}
+                        for word in rng.sample(CONST_SYNTHETIC_VOCABULARY, 4)
+                    ],
+                    "journalInformation": {
+                        "journalTitle": f"Journal {rng.randint(0, 49)}"
+                    },
+                    "meshTerms": [
+                        {"meshID": f"D{rng.randint(0, 999999):06d}", "name": word}
+                        for word in rng.sample(CONST_SYNTHETIC_VOCABULARY, 6)
+                    ],
+                    "chemicals": [
+                        {"name": word}
+                        for word in rng.sample(CONST_SYNTHETIC_VOCABULARY, 2)
+                    ],
+                },
+            }
+        )
+
+    return documents
+
+
+def peak_memory_mb() -> Dict[str, Optional[float]]:
+    """
+    Reads the peak memory of the process and, if available, of the GPU.
+
+    The resident set size is the peak over the lifetime of the process, so every
+    configuration is run in its own process (see `run_configuration`).
+
+    Returns:
+        Dict[str, Optional[float]]: Peak resident set size and peak CUDA allocation in MB.
+    """
+    return {
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "peak_cuda_mb": (
+            round(cuda.max_memory_allocated() / 1024**2, 1)
+            if cuda.is_available()
+            else None
+        ),
+    }
+
+
+def run_benchmark(
+    processor: Processor,
+    os_stand_in: InMemoryOpenSearch,
+    timer: PhaseTimer,
+    corpus: List[Dict[str, Any]],
+    batch_size: int,
+) -> Dict[str, Any]:
+    """
+    Runs chunking, encoding and indexing over a corpus in pages of `batch_size` documents.
+
+    Args:
+        processor (Processor): Processor with timed chunking and encoding methods.
+        os_stand_in (InMemoryOpenSearch): OpenSearch stand-in the processor writes to.
+        timer (PhaseTimer): Timer attached to the processor.
+        corpus (List[Dict[str, Any]]): Source documents.
+        batch_size (int): Number of documents per page.
+
+    Returns:
+        Dict[str, Any]: Phase timings, chunk throughput and peak memory of the run.
+    """
+    os_stand_in.reset()
+    timer.reset()
+    if cuda.is_available():
+        cuda.reset_peak_memory_stats()
+
+    processing_seconds = 0.0
+    insert_seconds = 0.0
+    n_chunks = 0
+
+    for start in range(0, len(corpus), batch_size):
+        # Documents are normalized in place, so every run gets fresh copies
+        page = copy.deepcopy(corpus[start : start + batch_size])
+
+        started = perf_counter()
+        vector_data, _ = processor.get_document_information(page)
+        processing_seconds += perf_counter() - started
+
+        started = perf_counter()
+        for target_index, chunks in processor.route_chunks(vector_data).items():
+            opensearch_insert(
+                os_stand_in,
+                target_index,
+                chunks,
+                vector_profile=processor.vector_profile,
+                metadata_index=processor.metadata_index,
+            )
+        insert_seconds += perf_counter() - started
+
+        n_chunks += len(vector_data)
+
+    chunk_seconds = timer.seconds.get("chunk", 0.0)
+    encode_seconds = timer.seconds.get("encode", 0.0)
+    phases = {
+        "normalize": processing_seconds - chunk_seconds - encode_seconds,
+        "chunk": chunk_seconds,
+        "encode": encode_seconds,
+        # Vector preparation, bulk action building and NDJSON encoding
+        "serialize": insert_seconds - os_stand_in.write_seconds,
+        "write": os_stand_in.write_seconds,
+    }
+    total_seconds = processing_seconds + insert_seconds
+
+    result = {
+        "strategy": processor.chunking_strategy,
+        "batch_size": batch_size,
+        "documents": len(corpus),
+        "chunks": n_chunks,
+        "seconds": round(total_seconds, 3),
+        "chunks_per_sec": round(n_chunks / total_seconds, 1) if total_seconds else None,
+        "bulk_mb": round(os_stand_in.bytes_sent / 1024**2, 2),
+    }
+    result.update({phase: round(phases[phase], 3) for phase in CONST_BENCHMARK_PHASES})
+    result.update(peak_memory_mb())
+    return result
+
+
+def build_processor(
+    os_stand_in: InMemoryOpenSearch,
+    timer: PhaseTimer,
+    chunking_strategy: str,
+    model_path: str,
+    encode_batch_size: int,
+) -> Processor:
+    """
+    Creates a Processor writing to the stand-in and attaches the phase timer to it.
+
+    Args:
+        os_stand_in (InMemoryOpenSearch): OpenSearch stand-in.
+        timer (PhaseTimer): Timer receiving chunking and encoding times.
+        chunking_strategy (str): "complete", "sentence" or "both".
+        model_path (str): Local path of the sentence-embedding model.
+        encode_batch_size (int): Number of token windows per forward pass.
+
+    Returns:
+        Processor: Processor ready for `run_benchmark`.
+    """
+    processor = Processor(
+        os_stand_in,
+        "benchmark_source",
+        (
+            {"complete": "benchmark_complete", "sentence": "benchmark_sentence"}
+            if chunking_strategy == "both"
+            else f"benchmark_{chunking_strategy}"
+        ),
+        chunking_strategy,
+        embed_model_id=model_path,
+    )
+    processor.chunker.batch_size = encode_batch_size
+
+    timer.wrap(processor.chunker, "split", "chunk")
+    timer.wrap(processor.chunker, "tokenize", "chunk")
+    timer.wrap(processor.chunker, "encode", "encode")
+    if "sentence" in processor.target_indices:
+        timer.wrap(processor.segmenter, "split", "chunk")
+
+    return processor
+
+
+def run_configuration(
+    model_path: str,
+    chunking_strategy: str,
+    batch_size: int,
+    n_documents: int,
+    encode_batch_size: int,
+) -> Dict[str, Any]:
+    """
+    Benchmarks one chunking strategy and page size in a fresh process.
+
+    Args:
+        model_path (str): Local path of the sentence-embedding model.
+        chunking_strategy (str): "complete", "sentence" or "both".
+        batch_size (int): Number of documents per page.
+        n_documents (int): Number of synthetic abstracts.
+        encode_batch_size (int): Number of token windows per forward pass.
+
+    Returns:
+        Dict[str, Any]: Result of `run_benchmark`, with the peak memory of this
+        configuration only.
+    """
+    # Keep the per-document logging of the processor out of the measurements
+    logging.basicConfig(level=logging.WARNING)
+
+    corpus = synthetic_corpus(n_documents)
+    os_stand_in = InMemoryOpenSearch()
+    timer = PhaseTimer()
+    processor = build_processor(
+        os_stand_in, timer, chunking_strategy, model_path, encode_batch_size
+    )
+
+    # Warm-up page so model loading and first-call overheads are not measured
+    run_benchmark(processor, os_stand_in, timer, corpus[:8], 8)
+
+    return run_benchmark(processor, os_stand_in, timer, corpus, batch_size)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure chunking, encoding and indexing throughput of the embedding stage."
+    )
+
+    parser.add_argument(
+        "-m",
+        "--model",
+        type=str,
+        required=True,
+        help="Local path of a small sentence-embedding model.",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--documents",
+        type=int,
+        default=500,
+        help="Number of synthetic abstracts.",
+    )
+
+    parser.add_argument(
+        "-c",
+        "--chunking",
+        type=str,
+        nargs="+",
+        choices=["complete", "sentence", "both"],
+        default=["complete", "sentence"],
+        help="Chunking strategies to benchmark.",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--batchsizes",
+        type=int,
+        nargs="+",
+        default=[100, 500],
+        help="Numbers of documents per page to benchmark.",
+    )
+
+    parser.add_argument(
+        "--encodebatch",
+        type=int,
+        default=32,
+        help="Number of token windows per forward pass.",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Write the results as JSON to this file.",
+    )
+
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.model):
+        print(f"Model path {args.model} does not exist.")
+        sys.exit(1)
+
+    results = []
+    # A fresh process per configuration, so peak memory is not carried over
+    context = multiprocessing.get_context("spawn")
+
+    for chunking_strategy in args.chunking:
+        for batch_size in args.batchsizes:
+            with context.Pool(processes=1) as pool:
+                result = pool.apply(
+                    run_configuration,
+                    (
+                        args.model,
+                        chunking_strategy,
+                        batch_size,
+                        args.documents,
+                        args.encodebatch,
+                    ),
+                )
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
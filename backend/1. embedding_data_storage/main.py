@@ -1,16 +1,14 @@
 import os
 import sys
-import spacy
 import argparse
 import logging
 from time import time
-from typing import Optional, List
+from typing import Callable, Dict, Optional, List, Tuple, Union
 from datetime import datetime, timedelta, date
 
 from tqdm import tqdm
 from torch import cuda
 from sentence_transformers import SentenceTransformer
-from langchain_text_splitters import SentenceTransformersTokenTextSplitter
 
 from tasks import *
 from utils import load_config_from_env
@@ -19,6 +17,8 @@ from utils import load_config_from_env
 # Constants
 CONST_EUTILS_DEFAULT_MINDATE = "1800-01-01"
 CONST_EUTILS_DEFAULT_MAXDATE = date.today().strftime("%Y-%m-%d")
+# Incremental runs flag source documents per chunking strategy, e.g. vectorisedFlag_complete
+CONST_VECTORISED_FLAG_FIELD = "vectorisedFlag"
 CONFIG = load_config_from_env()
 
 
@@ -31,9 +31,15 @@ class Processor:
         self,
         opensearch_connection,
         source_index: str,
-        target_index: str,
+        target_index: Union[str, Dict[str, str]],
         chunking_strategy: str,
         *args: str,
+        n_process: int = 1,
+        segmentation_batch_size: int = 64,
+        incremental: bool = False,
+        prefetch_pages: int = 2,
+        write_buffer: int = 2,
+        embed_model_id: Optional[str] = None,
     ):
         """
         Initializes the Processor with OpenSearch connections, indexes, and chunking settings.
@@ -41,30 +47,106 @@ class Processor:
         Args:
             os_conn: OpenSearch client instance.
             source_index (str): Name of the source OpenSearch index.
-            target_index (str): Name of the target OpenSearch index.
-            chunking_strategy (str): Chunking method: "complete" or "sentence".
+            target_index (Union[str, Dict[str, str]]): Name of the target OpenSearch index,
+                or for the "both" strategy a mapping of "complete" and "sentence" to
+                their target indices.
+            chunking_strategy (str): Chunking method: "complete", "sentence" or "both".
             *args (str): Optional date range (start_date, end_date).
+            n_process (int): Number of processes for sentence segmentation. Defaults to 1.
+            segmentation_batch_size (int): Batch size for sentence segmentation. Defaults to 64.
+            incremental (bool): Only process source documents not flagged as vectorised
+                for every chunking strategy of this processor, and flag them as "Y" per
+                strategy (`vectorisedFlag_<strategy>`) once they are indexed. Defaults to False.
+            prefetch_pages (int): Number of scroll pages read ahead of the encoder. Defaults to 2.
+            write_buffer (int): Number of encoded pages waiting for the bulk writer. Defaults to 2.
+            embed_model_id (Optional[str]): Name or local path of the embedding model.
+                Defaults to the `CLUSTER_CHAT_EMBEDDING_MODEL` setting.
         """
-        self.nlp = spacy.load("en_core_sci_sm")  # Load the SciSpacy model
         self.os_connection = opensearch_connection
         self.source_index = source_index
-        self.target_index = target_index
         self.chunking_strategy = chunking_strategy
+        self.incremental = incremental
+
+        # Target index of every chunking strategy run by this processor; "both" feeds
+        # one scan, one normalization and one encode stream into both indices
+        self.target_indices: Dict[str, str] = (
+            dict(target_index)
+            if self.chunking_strategy == "both"
+            else {self.chunking_strategy: target_index}
+        )
+
+        # One flag per strategy, so a run of one strategy does not hide documents
+        # from a later run of the other
+        self.flag_fields = [
+            f"{CONST_VECTORISED_FLAG_FIELD}_{strategy}"
+            for strategy in self.target_indices
+        ]
+        if self.incremental:
+            opensearch_map_flag_fields(
+                opensearch_connection, self.source_index, self.flag_fields
+            )
+
+        # Sentence segmentation is only needed for the sentence chunking strategy
+        if "sentence" in self.target_indices:
+            self.segmenter = SentenceSegmenter(
+                n_process=n_process, batch_size=segmentation_batch_size
+            )
+
+        # Chunk schema: "denormalized" copies the document metadata into every chunk,
+        # "parent" stores it once per document in the metadata index
+        self.metadata_index = (
+            CONFIG["CLUSTER_CHAT_OPENSEARCH_METADATA_INDEX"]
+            if CONFIG.get("CLUSTER_CHAT_CHUNK_SCHEMA") == "parent"
+            else None
+        )
+
+        # index creation with mapping for the configured vector storage profile
+        self.vector_profile = get_vector_profile()
+        target_index_mapping = opensearch_pubmedbert_mapping(
+            self.vector_profile, document_metadata=self.metadata_index is None
+        )
+        for target_index in self.target_indices.values():
+            opensearch_create(opensearch_connection, target_index, target_index_mapping)
+            check_vector_projection(
+                opensearch_connection, target_index, self.vector_profile
+            )
+
+        if self.metadata_index:
+            opensearch_create(
+                opensearch_connection,
+                self.metadata_index,
+                opensearch_document_metadata_mapping(),
+            )
+
+        # Pooled document vectors are built from the abstract windows only, so the
+        # document vector index does not depend on which strategy ran last
+        self.document_vector_index = (
+            CONFIG.get("CLUSTER_CHAT_OPENSEARCH_DOCUMENT_VECTOR_INDEX") or None
+            if "complete" in self.target_indices
+            else None
+        )
 
-        # index creation with mapping
-        target_index_mapping = opensearch_pubmedbert_mapping()
-        opensearch_create(opensearch_connection, target_index, target_index_mapping)
+        if self.document_vector_index:
+            opensearch_create(
+                opensearch_connection,
+                self.document_vector_index,
+                opensearch_document_vector_mapping(self.vector_profile),
+            )
+            check_vector_projection(
+                opensearch_connection, self.document_vector_index, self.vector_profile
+            )
 
         # Load embedding model
         self.device = f"cuda:{cuda.current_device()}" if cuda.is_available() else "cpu"
-        embed_model_id = CONFIG["CLUSTER_CHAT_EMBEDDING_MODEL"]
+        embed_model_id = embed_model_id or CONFIG["CLUSTER_CHAT_EMBEDDING_MODEL"]
 
         self.embed_model = SentenceTransformer(
             model_name_or_path=embed_model_id,
             trust_remote_code=True,
             device=self.device,
         )
-        self.splitter = SentenceTransformersTokenTextSplitter(model_name=embed_model_id)
+        # Token-window chunking reuses the tokenizer and weights of the loaded model
+        self.chunker = TokenWindowChunker(self.embed_model)
 
         # Date range configuration
         if args and len(args[0]) != 0:
@@ -79,10 +161,111 @@ class Processor:
 
         self.current_date = self.end_date
         self.scroll_size = 500
+        self.prefetch_pages = prefetch_pages
+        self.write_buffer = write_buffer
+        # Checked before every page; processing stops once it returns True
+        self.should_stop: Optional[Callable[[], bool]] = None
+
+    def process_date_range(
+        self,
+        start_date: str,
+        end_date: str,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Processes the documents of another date range with the loaded model.
 
-    def process_articles_in_batches(self) -> None:
+        Args:
+            start_date (str): Start date in YYYY-MM-DD format.
+            end_date (str): End date in YYYY-MM-DD format.
+            should_stop (Optional[Callable[[], bool]]): Checked before every page;
+                the range is abandoned once it returns True, e.g. when the lease on
+                a work-queue shard was lost. Defaults to None.
+
+        Returns:
+            bool: True if the whole range was read and written; False otherwise.
+        """
+        self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        self.end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        self.current_date = self.end_date
+        self.should_stop = should_stop
+        try:
+            return self.process_articles_in_batches()
+        finally:
+            self.should_stop = None
+
+    def process_articles_in_batches(self) -> bool:
         """
         Main loop to retrieve documents from OpenSearch, chunk, embed, and re-index them.
+
+        Returns:
+            bool: True if every page was read and written; False if a bulk write
+                failed or processing was stopped.
+
+        Notes:
+            - By default the date range is processed day by day, from the end date backwards.
+            - In incremental mode the whole date range is processed in one pass, restricted
+              to documents not flagged as vectorised for one of the chunking strategies.
+        """
+        if self.incremental:
+            total_docs, success = self.process_query(
+                self.start_date.strftime("%Y-%m-%d"),
+                self.end_date.strftime("%Y-%m-%d"),
+            )
+            logging.info(
+                f"Incremental processing completed for {total_docs} documents not vectorised yet"
+            )
+        else:
+            success = True
+            while self.current_date >= self.start_date:
+                if self._stopped():
+                    success = False
+                    break
+
+                minDate = self.current_date.strftime("%Y-%m-%d")
+                maxDate = self.current_date.strftime("%Y-%m-%d")
+
+                total_docs, day_success = self.process_query(minDate, maxDate)
+                success = success and day_success
+
+                self.current_date -= timedelta(days=1)
+                logging.info(
+                    f"Processing for {total_docs} completed for the date {minDate}"
+                )
+
+        if not success:
+            logging.error(
+                f"Processing of the date range {self.start_date} to {self.end_date} "
+                "was not completed, see the errors above"
+            )
+            return False
+
+        logging.info(
+            f"Processing for all documents in the date range of {self.start_date} to {self.end_date} completed"
+        )
+        return True
+
+    def process_query(self, minDate: str, maxDate: str) -> Tuple[int, bool]:
+        """
+        Scrolls through the source documents of a date range and chunks, embeds and
+        indexes them page by page.
+
+        Args:
+            minDate (str): Start of the date range in YYYY-MM-DD format.
+            maxDate (str): End of the date range in YYYY-MM-DD format.
+
+        Returns:
+            Tuple[int, bool]: Number of source documents matched by the query, and
+                whether all pages were read and written successfully.
+
+        Notes:
+            - The next pages are scrolled and the previous pages are written in
+              background threads, so encoding does not wait for the network.
+            - In incremental mode the source documents of a page that were chunked
+              and encoded completely, including those without chunks, are flagged as
+              vectorised only after all chunks of the page have been acknowledged by
+              OpenSearch, so failed documents and pages are picked up again by the
+              next run.
         """
         fields_to_include = [
             "title",
@@ -96,69 +279,73 @@ class Processor:
             "chemicals.name",
         ]
 
-        while self.current_date >= self.start_date:
-            minDate = date.strftime("%Y-%m-%d")
-            maxDate = self.current_date.strftime("%Y-%m-%d")
-            date = self.current_date - timedelta(days=0)
-
-            search_params = {
-                "sort": [{"articleDate": {"order": "desc"}}],
-                "query": {
+        filters = [{"range": {"articleDate": {"gte": minDate, "lte": maxDate}}}]
+        if self.incremental:
+            # Pending while any strategy of this run has not flagged the document
+            filters.append(
+                {
                     "bool": {
-                        "must": [
-                            {"range": {"articleDate": {"gte": minDate, "lte": maxDate}}}
-                        ],
-                        "must_not": [
-                            {
-                                "match_phrase": {
-                                    "abstract": "no abstract available on pubmed"
-                                }
-                            },
-                            {"match_phrase": {"abstract": "ABSTRACT TRUNCATED AT"}},
+                        "should": [
+                            {"bool": {"must_not": {"term": {flag_field: "Y"}}}}
+                            for flag_field in self.flag_fields
                         ],
+                        "minimum_should_match": 1,
                     }
-                },
-                "_source": fields_to_include,
-            }
-
-            # Execute the initial search request
-            response = self.os_connection.search(
-                index=self.source_index,
-                scroll="10m",
-                size=self.scroll_size,
-                body=search_params,
+                }
             )
 
-            # Get the scroll ID and hits from the initial search request
-            scroll_id = response["_scroll_id"]
-            hits = response["hits"]["hits"]
-            total_docs = response["hits"]["total"][
-                "value"
-            ]  # Get the total number of documents
+        search_params = {
+            "sort": [{"articleDate": {"order": "desc"}}],
+            "query": {
+                "bool": {
+                    "must": filters,
+                    "must_not": [
+                        {
+                            "match_phrase": {
+                                "abstract": "no abstract available on pubmed"
+                            }
+                        },
+                        {"match_phrase": {"abstract": "ABSTRACT TRUNCATED AT"}},
+                    ],
+                }
+            },
+            "_source": fields_to_include,
+        }
+
+        # Pages are read ahead of the encoder and written behind it by background threads
+        with ScrollPrefetcher(
+            self.os_connection,
+            self.source_index,
+            search_params,
+            scroll_size=self.scroll_size,
+            buffer_pages=self.prefetch_pages,
+        ) as pages, AsyncBulkWriter(
+            self.write_page, buffer_batches=self.write_buffer
+        ) as writer:
+            total_docs = pages.total_docs  # Get the total number of documents
+            stopped = False
 
             with tqdm(total=total_docs) as pbar:
-                while hits:
+                for hits in pages:
+                    if self._stopped():
+                        logging.warning(
+                            f"Stopped processing {minDate} to {maxDate} before all pages were read"
+                        )
+                        stopped = True
+                        break
+
                     try:
                         logging.info(f"Considered {len(hits)} documents for processing")
-                        document_vector_information = self.get_document_information(
-                            hits
+                        document_vector_information, completed_ids = (
+                            self.get_document_information(hits)
                         )
 
-                        if document_vector_information:
-                            loadSuccess = opensearch_insert(
-                                self.os_connection,
-                                self.target_index,
-                                document_vector_information,
-                            )
-
-                        if not loadSuccess:
-                            logging.error(
-                                f"\nOperation unsuccessful, see logs for more information."
-                            )
-                        else:
-                            logging.info(
-                                f"\nOperation successful for {len(hits)} documents."
-                            )
+                        # Pages without chunks are still submitted to flag them;
+                        # documents that failed are neither written nor flagged
+                        if document_vector_information or (
+                            self.incremental and completed_ids
+                        ):
+                            writer.submit((completed_ids, document_vector_information))
 
                     except Exception as e:
                         logging.error(
@@ -167,26 +354,123 @@ class Processor:
 
                     pbar.update(len(hits))
 
-                    # Paginate through the search results using the scroll parameter
-                    response = self.os_connection.scroll(
-                        scroll_id=scroll_id, scroll="10m"
-                    )
-                    hits = response["hits"]["hits"]
-                    scroll_id = response["_scroll_id"]
+        # The writer is closed on leaving the block, so every page has been written
+        if not writer.success:
+            logging.error(f"Bulk writes of {minDate} to {maxDate} failed")
+        return total_docs, writer.success and not stopped
 
-            # Clear the scroll
-            self.os_connection.clear_scroll(scroll_id=scroll_id)
-            pbar.close()
-            self.current_date -= timedelta(days=1)
-            logging.info(
-                f"Processing for {total_docs} completed for the date {minDate}"
+    def _stopped(self) -> bool:
+        return self.should_stop is not None and self.should_stop()
+
+    def write_page(self, page: Tuple[List[str], List[tuple]]) -> bool:
+        """
+        Indexes the chunks of one page, their pooled document vectors if a document
+        vector index is configured and, in incremental mode, flags the source
+        documents of the page as vectorised.
+
+        Args:
+            page (Tuple[List[str], List[tuple]]): IDs of the source documents of the
+                page that were chunked and encoded completely, and the (id, vector,
+                metadata) tuples returned by `get_document_information` for them.
+
+        Returns:
+            bool: True if all chunks were indexed and all documents flagged; False otherwise.
+        """
+        source_ids, document_vector_information = page
+
+        if not document_vector_information:
+            logging.info(f"No chunks in a page of {len(source_ids)} documents.")
+            return self.flag_vectorised(source_ids)
+
+        for target_index, chunks in self.route_chunks(
+            document_vector_information
+        ).items():
+            loadSuccess = opensearch_insert(
+                self.os_connection,
+                target_index,
+                chunks,
+                vector_profile=self.vector_profile,
+                metadata_index=self.metadata_index,
             )
 
+            if not loadSuccess:
+                logging.error(
+                    f"\nOperation unsuccessful for {target_index}, see logs for more information."
+                )
+                return False
+
         logging.info(
-            f"Processing for all documents in the date range of {self.start_date} to {self.end_date} completed"
+            f"\nOperation successful for {len(document_vector_information)} chunks."
         )
 
-    def get_document_information(self, documents: List[dict]) -> List[tuple]:
+        if self.document_vector_index:
+            # One length-weighted vector per document next to its chunk vectors
+            loadSuccess = opensearch_insert_document_vectors(
+                self.os_connection,
+                self.document_vector_index,
+                pool_document_vectors(
+                    [
+                        chunk
+                        for chunk in document_vector_information
+                        if chunk[2]["chunking_strategy"] == "complete"
+                    ]
+                ),
+                vector_profile=self.vector_profile,
+            )
+
+            if not loadSuccess:
+                logging.error(f"\nDocument vector indexing unsuccessful, see logs.")
+                return False
+
+        return self.flag_vectorised(source_ids)
+
+    def flag_vectorised(self, source_ids: List[str]) -> bool:
+        """
+        Flags source documents as vectorised for every chunking strategy of this
+        processor, in incremental mode.
+
+        Args:
+            source_ids (List[str]): IDs of the source documents.
+
+        Returns:
+            bool: True if all flags were set or the mode is not incremental; False otherwise.
+        """
+        if not self.incremental:
+            return True
+
+        success = True
+        for flag_field in self.flag_fields:
+            if not opensearch_update_flag(
+                self.os_connection,
+                self.source_index,
+                source_ids,
+                flag_field=flag_field,
+            ):
+                success = False
+        return success
+
+    def route_chunks(
+        self, document_vector_information: List[tuple]
+    ) -> Dict[str, List[tuple]]:
+        """
+        Groups encoded chunks by the target index of their chunking strategy.
+
+        Args:
+            document_vector_information (List[tuple]): (id, vector, metadata) tuples
+                returned by `get_document_information`.
+
+        Returns:
+            Dict[str, List[tuple]]: Chunks per target index.
+        """
+        routed: Dict[str, List[tuple]] = {}
+        for chunk in document_vector_information:
+            target_index = self.target_indices[chunk[2]["chunking_strategy"]]
+            routed.setdefault(target_index, []).append(chunk)
+        return routed
+
+    def get_document_information(
+        self, documents: List[dict]
+    ) -> Tuple[List[tuple], List[str]]:
         """
         Parses, chunks, and encodes documents into vectors.
 
@@ -194,11 +478,29 @@ class Processor:
             documents (List[dict]): List of documents returned by OpenSearch.
 
         Returns:
-            List[tuple]: List of (id, vector, metadata) tuples for re-indexing.
+            Tuple[List[tuple], List[str]]: A tuple containing:
+                - List of (id, vector, metadata) tuples for re-indexing. The
+                  metadata names the `chunking_strategy` the chunk belongs to.
+                - IDs of the documents whose chunks were all built and encoded,
+                  including documents without chunks.
+
+        Notes:
+            - The chunks of all strategies are tokenized once and encoded together
+              in length-sorted batches.
+            - A document that fails contributes no chunks at all, so it is not
+              indexed partially and not flagged as vectorised.
         """
         vector_data = []
+        pending_windows = []
+        completed_ids = []
 
-        for doc in tqdm(documents, desc="Chunking & encoding"):
+        if "sentence" in self.target_indices:
+            # Segment all abstracts of the batch in one streamed pass
+            sentence_chunks = self.segmenter.split(
+                [doc["_source"].get("abstract") or "" for doc in documents]
+            )
+
+        for i, doc in enumerate(tqdm(documents, desc="Chunking & encoding")):
             try:
                 doc_id = doc["_id"]
 
@@ -292,55 +594,69 @@ class Processor:
                     doc["_source"]["authorAffiliations"] = ["no affiliation"]
 
                 # Text Chunking
-                if self.chunking_strategy == "complete":
-                    # Chunks created based on the transformer
-                    chunks = self.splitter.split_text(text=doc["_source"]["abstract"])
-
-                elif self.chunking_strategy == "sentence":
-                    abstract_text = doc["_source"]["abstract"]
-                    doc_spacy = self.nlp(
-                        abstract_text
-                    )  # Process the text with SciSpacy
-                    chunks = [
-                        sent.text.strip() for sent in doc_spacy.sents
-                    ]  # Extract sentences
-
-                # Embedding
-                for j, chunk in enumerate(chunks):
-                    # Add metadata for article ID and chunk ID
-                    metadata = {
-                        "pubmed_id": doc_id,
-                        "articleDate": doc["_source"]["articleDate"],
-                        "title": (
-                            "no title"
-                            if doc["_source"]["title"] is None
-                            else doc["_source"]["title"]
-                        ),
-                        "journalTitle": doc["_source"]["journalInformation"][
-                            "journalTitle"
-                        ],
-                        "keywords": doc["_source"]["keywords"],
-                        "meshTerms": doc["_source"]["meshNames"],
-                        "meshIds": doc["_source"]["meshIds"],
-                        "chemicals": doc["_source"]["chemicals"],
-                        "authorNames": doc["_source"]["authorNames"],
-                        "authorAffiliations": doc["_source"]["authorAffiliations"],
-                        "text_chunk_id": j,
-                        "pubmed_text": chunk,
-                        "document_source": self.source_index,
-                    }
+                chunked = {}
+                if "complete" in self.target_indices:
+                    # Chunks created based on the transformer, tokenized only once
+                    chunked["complete"] = self.chunker.split(doc["_source"]["abstract"])
+
+                if "sentence" in self.target_indices:
+                    # Sentences extracted for the whole batch above
+                    chunked["sentence"] = (
+                        sentence_chunks[i],
+                        self.chunker.tokenize(sentence_chunks[i]),
+                    )
+
+                # Embedding; windows are queued only once the whole document is built
+                document_windows = []
+                for strategy, (chunks, windows) in chunked.items():
+                    for j, chunk in enumerate(chunks):
+                        # Add metadata for article ID and chunk ID
+                        metadata = {
+                            "pubmed_id": doc_id,
+                            "articleDate": doc["_source"]["articleDate"],
+                            "title": (
+                                "no title"
+                                if doc["_source"]["title"] is None
+                                else doc["_source"]["title"]
+                            ),
+                            "journalTitle": doc["_source"]["journalInformation"][
+                                "journalTitle"
+                            ],
+                            "keywords": doc["_source"]["keywords"],
+                            "meshTerms": doc["_source"]["meshNames"],
+                            "meshIds": doc["_source"]["meshIds"],
+                            "chemicals": doc["_source"]["chemicals"],
+                            "authorNames": doc["_source"]["authorNames"],
+                            "authorAffiliations": doc["_source"]["authorAffiliations"],
+                            "text_chunk_id": j,
+                            "pubmed_text": chunk,
+                            "document_source": self.source_index,
+                            "chunking_strategy": strategy,
+                            "token_count": len(windows[j]),
+                        }
+
+                        ids = f"{doc_id}_{j}"
 
-                    #  Embed the chunk using huggingface embedding method
-                    embedding = self.embed_model.encode(chunk).tolist()
-                    ids = f"{doc_id}_{j}"
-                    vector_data.append((ids, embedding, metadata))
+                        # Token ids of all strategies are encoded together once the
+                        # batch is chunked
+                        document_windows.append((ids, windows[j], metadata))
 
+                pending_windows.extend(document_windows)
+                completed_ids.append(doc_id)
                 logging.info(f"Completed data creation for pubmed id: {doc_id}")
 
             except Exception as e:
                 logging.exception(f"Error processing document ID {doc_id}: {str(e)}")
 
-        return vector_data
+        if pending_windows:
+            # Feed the token ids of all chunks straight to the model
+            embeddings = self.chunker.encode(
+                [window for _, window, _ in pending_windows]
+            )
+            for (ids, _, metadata), embedding in zip(pending_windows, embeddings):
+                vector_data.append((ids, embedding.tolist(), metadata))
+
+        return vector_data, completed_ids
 
 
 def seconds_to_text(secs: float) -> str:
@@ -409,17 +725,176 @@ def main(argv: Optional[List[str]] = None) -> None:
             "-c",
             "--chunking",
             type=str,
-            choices=["complete", "sentence"],
+            choices=["complete", "sentence", "both"],
             default="complete",
-            help="Chunking strategy for text processing.",
+            help="Chunking strategy for text processing. 'both' builds both target indices in one pass.",
+        )
+
+        parser.add_argument(
+            "-p",
+            "--nprocess",
+            type=int,
+            default=1,
+            help="Number of processes used for sentence segmentation.",
+        )
+
+        parser.add_argument(
+            "--segmentationbatch",
+            type=int,
+            default=64,
+            help="Number of abstracts per sentence segmentation batch.",
+        )
+
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only embed documents not yet vectorised for the chunking strategy and flag "
+                "them as vectorised. Each strategy has its own flag (vectorisedFlag_complete, "
+                "vectorisedFlag_sentence)."
+            ),
+        )
+
+        parser.add_argument(
+            "--prefetchpages",
+            type=int,
+            default=2,
+            help="Number of result pages read ahead of the embedding model.",
+        )
+
+        parser.add_argument(
+            "--writebuffer",
+            type=int,
+            default=2,
+            help="Number of embedded pages buffered for the asynchronous bulk writer.",
+        )
+
+        parser.add_argument(
+            "-q",
+            "--queue",
+            metavar="directory",
+            type=str,
+            help=(
+                "Shared work-queue directory for multi-node backfills. With a date range "
+                "the range is split into shards; with --worker shards are claimed and processed."
+            ),
+        )
+
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Claim and process shards from the work queue until all are done.",
+        )
+
+        parser.add_argument(
+            "--sharddays",
+            type=int,
+            default=7,
+            help="Number of days per work-queue shard.",
+        )
+
+        parser.add_argument(
+            "--leaseseconds",
+            type=int,
+            default=600,
+            help="Seconds after which the lease of an unresponsive worker expires.",
+        )
+
+        parser.add_argument(
+            "-r",
+            "--storagereport",
+            metavar="index",
+            type=str,
+            nargs="*",
+            help="Report store size and vector layout of the given indices (defaults to both target indices)",
         )
 
         args = parser.parse_args()
 
+        if args.storagereport is not None:
+            report_indices = args.storagereport or [
+                CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_COMPLETE"],
+                CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_SENTENCE"],
+            ]
+            for entry in opensearch_storage_report(os_connection, report_indices):
+                print(entry)
+            return
+
         if args.chunking == "complete":
             target_os_index = CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_COMPLETE"]
         elif args.chunking == "sentence":
             target_os_index = CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_SENTENCE"]
+        elif args.chunking == "both":
+            target_os_index = {
+                "complete": CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_COMPLETE"],
+                "sentence": CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_SENTENCE"],
+            }
+
+        if args.queue:
+            # Multi-node backfill: the coordinator adds shards, workers claim them
+            work_queue = ShardQueue(args.queue, lease_seconds=args.leaseseconds)
+
+            if len(args.vectorcreation) == 2:
+                work_queue.create_shards(
+                    args.vectorcreation[0], args.vectorcreation[1], args.sharddays
+                )
+
+            if args.worker:
+                document_processor = Processor(
+                    os_connection,
+                    source_os_index,
+                    target_os_index,
+                    args.chunking,
+                    n_process=args.nprocess,
+                    segmentation_batch_size=args.segmentationbatch,
+                    incremental=args.incremental,
+                    prefetch_pages=args.prefetchpages,
+                    write_buffer=args.writebuffer,
+                )
+
+                while True:
+                    lease = work_queue.wait_for_shard()
+                    if lease is None:
+                        break
+
+                    start_time = time()
+                    try:
+                        # Stop writing as soon as another worker may own the shard
+                        success = document_processor.process_date_range(
+                            lease.start_date,
+                            lease.end_date,
+                            should_stop=lambda: lease.lost,
+                        )
+                    except Exception:
+                        # Leave the shard to the next worker that claims it
+                        lease.release()
+                        raise
+
+                    if not success and not lease.lost:
+                        # Failed writes are retried by the next worker that claims it
+                        logging.error(
+                            f"Shard {lease.start_date} to {lease.end_date} was not written "
+                            "completely; releasing it"
+                        )
+                        lease.release()
+                        continue
+
+                    if lease.lost or not lease.done(
+                        {"seconds": round(time() - start_time, 1)}
+                    ):
+                        logging.warning(
+                            f"Lease on shard {lease.start_date} to {lease.end_date} was lost; "
+                            "leaving it to the worker that holds it now"
+                        )
+                        continue
+
+                    logging.info(
+                        f"Shard {lease.start_date} to {lease.end_date} completed in {seconds_to_text(time() - start_time)}"
+                    )
+
+            print(f"Work queue status: {work_queue.status()}")
+            return
 
         if len(args.vectorcreation) >= 0:
             if len(args.vectorcreation) == 1:
@@ -433,6 +908,11 @@ def main(argv: Optional[List[str]] = None) -> None:
                     args.chunking,
                     args.vectorcreation[0],
                     args.vectorcreation[1],
+                    n_process=args.nprocess,
+                    segmentation_batch_size=args.segmentationbatch,
+                    incremental=args.incremental,
+                    prefetch_pages=args.prefetchpages,
+                    write_buffer=args.writebuffer,
                 )
                 start_time = time()
                 logging.info(
@@ -445,8 +925,13 @@ def main(argv: Optional[List[str]] = None) -> None:
             elif len(args.vectorcreation) == 0:
                 res = ""
                 while res != "n":
-                    res = input(
-                        "Are you sure you want to insert all records starting from start date till date? This can take several days. (y/n): "
+                    # Incremental runs only touch new documents and are meant for cron
+                    res = (
+                        "y"
+                        if args.incremental
+                        else input(
+                            "Are you sure you want to insert all records starting from start date till date? This can take several days. (y/n): "
+                        )
                     )
                     if res == "y":
                         start_time = time()
@@ -456,6 +941,11 @@ def main(argv: Optional[List[str]] = None) -> None:
                             target_os_index,
                             args.chunking,
                             args.vectorcreation,
+                            n_process=args.nprocess,
+                            segmentation_batch_size=args.segmentationbatch,
+                            incremental=args.incremental,
+                            prefetch_pages=args.prefetchpages,
+                            write_buffer=args.writebuffer,
                         )
                         logging.info(
                             f"Vector storage for pubmed records started at {seconds_to_text(start_time)}"
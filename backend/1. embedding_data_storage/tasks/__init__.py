@@ -1,6 +1,32 @@
-from .database.database_insert import opensearch_insert as opensearch_insert
+from .database.database_insert import (
+    opensearch_insert as opensearch_insert,
+    opensearch_insert_document_vectors as opensearch_insert_document_vectors,
+)
+from .database.database_update import (
+    opensearch_update_flag as opensearch_update_flag,
+    opensearch_map_flag_fields as opensearch_map_flag_fields,
+)
 from .database.database_connection import opensearch_connection as opensearch_connection
 from .database.database_create import opensearch_create as opensearch_create
 from .database.database_mapping import (
     opensearch_pubmedbert_mapping as opensearch_pubmedbert_mapping,
+    opensearch_document_metadata_mapping as opensearch_document_metadata_mapping,
+    opensearch_document_vector_mapping as opensearch_document_vector_mapping,
+)
+from .database.database_vector_profile import (
+    get_vector_profile as get_vector_profile,
+    check_vector_projection as check_vector_projection,
+)
+from .database.database_report import (
+    opensearch_storage_report as opensearch_storage_report,
+)
+from .chunking import (
+    SentenceSegmenter as SentenceSegmenter,
+    TokenWindowChunker as TokenWindowChunker,
+)
+from .pooling import pool_document_vectors as pool_document_vectors
+from .prefetch import (
+    ScrollPrefetcher as ScrollPrefetcher,
+    AsyncBulkWriter as AsyncBulkWriter,
 )
+from .work_queue import ShardQueue as ShardQueue
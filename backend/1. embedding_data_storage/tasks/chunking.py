@@ -0,0 +1,213 @@
+import logging
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import spacy
+import torch
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Components of the SciSpacy pipeline that do not contribute to sentence boundaries.
+# Sentence boundaries are set by the dependency parser, which only listens to tok2vec.
+CONST_SENTENCE_EXCLUDED_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+
+class SentenceSegmenter:
+    """
+    Splits abstracts into sentences with a reduced SciSpacy pipeline.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "en_core_sci_sm",
+        n_process: int = 1,
+        batch_size: int = 64,
+    ) -> None:
+        """
+        Loads the SciSpacy model with only the components needed for sentence boundaries.
+
+        Args:
+            model_name (str): Name of the SciSpacy model. Defaults to "en_core_sci_sm".
+            n_process (int): Number of processes used by `nlp.pipe`. Defaults to 1.
+            batch_size (int): Number of texts buffered per `nlp.pipe` batch. Defaults to 64.
+
+        Notes:
+            - Excluding the tagger, lemmatizer and NER does not change the sentence
+              boundaries produced by the full pipeline.
+            - Worker processes are started per `split` call, so `n_process > 1`
+              pays off for large pages of abstracts.
+        """
+        self.nlp = spacy.load(model_name, exclude=CONST_SENTENCE_EXCLUDED_COMPONENTS)
+        self.n_process = n_process
+        self.batch_size = batch_size
+
+        logger.info(
+            f"Sentence segmenter loaded with pipeline {self.nlp.pipe_names} "
+            f"({self.n_process} process(es), batch size {self.batch_size})"
+        )
+
+    def split(self, texts: List[str]) -> List[List[str]]:
+        """
+        Splits a list of texts into sentences.
+
+        Args:
+            texts (List[str]): Texts to segment.
+
+        Returns:
+            List[List[str]]: Stripped sentences for each input text, in input order.
+        """
+        return [
+            [sent.text.strip() for sent in doc_spacy.sents]
+            for doc_spacy in self.nlp.pipe(
+                texts, batch_size=self.batch_size, n_process=self.n_process
+            )
+        ]
+
+
+class TokenWindowChunker:
+    """
+    Splits abstracts into overlapping token windows and encodes the windows
+    directly from their token ids.
+
+    Produces the same chunks as `SentenceTransformersTokenTextSplitter`, but each
+    abstract is tokenized once and the ids are fed straight to the model instead
+    of being decoded and re-tokenized by `SentenceTransformer.encode`.
+    """
+
+    def __init__(
+        self,
+        embed_model: Any,
+        chunk_overlap: int = 50,
+        tokens_per_chunk: Optional[int] = None,
+        batch_size: int = 32,
+    ) -> None:
+        """
+        Initializes the chunker from a loaded SentenceTransformer model.
+
+        Args:
+            embed_model (Any): Loaded SentenceTransformer model.
+            chunk_overlap (int): Number of tokens shared by consecutive windows. Defaults to 50.
+            tokens_per_chunk (Optional[int]): Window size in tokens. Defaults to the
+                model's maximum sequence length.
+            batch_size (int): Number of windows per forward pass. Defaults to 32.
+
+        Raises:
+            ValueError: If the window size exceeds the model's maximum sequence length
+                or is not larger than the overlap.
+        """
+        self.embed_model = embed_model
+        # Windows are encoded with `forward`; disable dropout as `encode` does
+        self.embed_model.eval()
+        self.tokenizer = embed_model.tokenizer
+        self.max_seq_length = embed_model.max_seq_length
+        self.tokens_per_chunk = tokens_per_chunk or self.max_seq_length
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+
+        if self.tokens_per_chunk > self.max_seq_length:
+            raise ValueError(
+                f"Window size {self.tokens_per_chunk} exceeds the maximum sequence "
+                f"length {self.max_seq_length} of the embedding model."
+            )
+        if self.tokens_per_chunk <= self.chunk_overlap:
+            raise ValueError("Window size must be larger than the chunk overlap.")
+
+        # Room left for the model's special tokens ([CLS], [SEP]) in every window
+        self.max_window_ids = (
+            self.max_seq_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+        )
+
+    def split(self, text: str) -> Tuple[List[str], List[List[int]]]:
+        """
+        Tokenizes a text once and cuts it into overlapping token windows.
+
+        Args:
+            text (str): Text to split.
+
+        Returns:
+            Tuple[List[str], List[List[int]]]: Decoded window texts (for storage) and
+            the token ids of each window (for encoding).
+        """
+        input_ids = self.tokenizer(
+            text, add_special_tokens=False, truncation=False, verbose=False
+        )["input_ids"]
+
+        windows: List[List[int]] = []
+        start_idx = 0
+        while start_idx < len(input_ids):
+            cur_idx = min(start_idx + self.tokens_per_chunk, len(input_ids))
+            windows.append(input_ids[start_idx:cur_idx])
+            if cur_idx == len(input_ids):
+                break
+            start_idx += self.tokens_per_chunk - self.chunk_overlap
+
+        chunks = [self.tokenizer.decode(window) for window in windows]
+        return chunks, windows
+
+    def tokenize(self, texts: List[str]) -> List[List[int]]:
+        """
+        Tokenizes texts that are used as chunks as a whole, e.g. sentences.
+
+        Args:
+            texts (List[str]): Texts to tokenize.
+
+        Returns:
+            List[List[int]]: Token ids of each text, without special tokens. Texts
+            longer than the model's maximum sequence length are truncated by `encode`.
+        """
+        if not texts:
+            return []
+
+        return self.tokenizer(
+            texts, add_special_tokens=False, truncation=False, verbose=False
+        )["input_ids"]
+
+    def encode(self, windows: List[List[int]]) -> np.ndarray:
+        """
+        Encodes token windows with the embedding model without re-tokenizing.
+
+        Args:
+            windows (List[List[int]]): Token ids of each window, without special tokens.
+
+        Returns:
+            np.ndarray: Embeddings of shape (len(windows), dimension), in input order.
+
+        Notes:
+            - Windows are truncated to fit the special tokens, matching the truncation
+              `SentenceTransformer.encode` applies to the decoded text.
+            - Windows are sorted by length before batching to minimise padding.
+        """
+        if not windows:
+            return np.empty(
+                (0, self.embed_model.get_sentence_embedding_dimension()),
+                dtype=np.float32,
+            )
+
+        order = np.argsort([-len(window) for window in windows], kind="stable")
+        embeddings: List[np.ndarray] = []
+
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = [
+                self.tokenizer.build_inputs_with_special_tokens(
+                    windows[idx][: self.max_window_ids]
+                )
+                for idx in order[start : start + self.batch_size]
+            ]
+            features = self.tokenizer.pad(
+                {"input_ids": batch_ids}, padding=True, return_tensors="pt"
+            )
+            features = {
+                key: value.to(self.embed_model.device)
+                for key, value in features.items()
+            }
+
+            with torch.inference_mode():
+                output = self.embed_model.forward(features)
+
+            embeddings.append(output["sentence_embedding"].float().cpu().numpy())
+
+        sorted_embeddings = np.vstack(embeddings)
+        result = np.empty_like(sorted_embeddings)
+        result[order] = sorted_embeddings
+        return result
@@ -1,8 +1,10 @@
 import logging
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, Set
 from tqdm import tqdm
 from opensearchpy import OpenSearch
 
+from .database_vector_profile import prepare_vectors
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ def opensearch_insert(
     index_name: str,
     document_details: List[Tuple[str, List[float], Dict[str, Any]]],
     batch_size: int = 1000,
+    vector_profile: Optional[Dict[str, Any]] = None,
+    metadata_index: Optional[str] = None,
 ) -> bool:
     """
     Inserts documents into an OpenSearch index in batches.
@@ -25,12 +29,19 @@ def opensearch_insert(
             - embedding vector (List[float])
             - metadata dictionary (Dict[str, Any])
         batch_size (int, optional): Number of documents to index per batch. Defaults to 1000.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile used to
+            normalize or quantize the embeddings. Defaults to the configured profile.
+        metadata_index (Optional[str]): Index holding one metadata record per document
+            ("parent" chunk schema). If given, chunks only carry the document ID, date,
+            chunk ID, text and vector. Defaults to None (metadata copied into every chunk).
 
     Returns:
-        bool: True if all batches are successfully indexed; False otherwise.
+        bool: True if all batches are successfully indexed and acknowledged without
+        item errors; False otherwise.
     """
     success: bool = True
     total_docs: int = len(document_details)
+    written_parents: Set[str] = set()
 
     # Split the document details into batches of size `batch_size`
     for start in tqdm(
@@ -38,13 +49,17 @@ def opensearch_insert(
     ):
         actions: List[Dict[str, Any]] = []
         batch = document_details[start : start + batch_size]
+        stored_vectors = prepare_vectors(
+            [embedding for _, embedding, _ in batch], vector_profile
+        )
 
-        for doc_id, embedding, metadata in tqdm(
-            batch, leave=False, desc="Preparing batch"
+        for (doc_id, _, metadata), stored_vector in tqdm(
+            zip(batch, stored_vectors),
+            total=len(batch),
+            leave=False,
+            desc="Preparing batch",
         ):
-            # Define the indexing action
-            action = {"index": {"_index": index_name, "_id": doc_id}}
-            doc = {
+            document_metadata = {
                 "documentSource": metadata.get("document_source"),
                 "documentID": metadata.get("pubmed_id"),
                 "articleDate": metadata.get("articleDate"),
@@ -56,17 +71,55 @@ def opensearch_insert(
                 "chemicals": metadata.get("chemicals"),
                 "authors:name": metadata.get("authorNames"),
                 "authors:affiliation": metadata.get("authorAffiliations"),
+            }
+            chunk = {
                 "abstract_chunk_id": metadata.get("text_chunk_id"),
                 "abstract_chunk": metadata.get("pubmed_text"),
-                "pubmed_bert_vector": embedding,
+                "pubmed_bert_vector": stored_vector,
             }
+
+            if metadata_index:
+                # Metadata is stored once per document, chunks keep the join key and date
+                parent_id = document_metadata["documentID"]
+                if parent_id not in written_parents:
+                    actions.append(
+                        {"index": {"_index": metadata_index, "_id": parent_id}}
+                    )
+                    actions.append(document_metadata)
+                    written_parents.add(parent_id)
+
+                doc = {
+                    "documentID": parent_id,
+                    "articleDate": document_metadata["articleDate"],
+                    **chunk,
+                }
+            else:
+                doc = {**document_metadata, **chunk}
+
+            # Define the indexing action
+            action = {"index": {"_index": index_name, "_id": doc_id}}
             actions.append(action)
             actions.append(doc)
         try:
-            os_connection.bulk(index=index_name, body=actions)
-            logger.info(
-                f"Successfully indexed batch {start // batch_size + 1} ({len(batch)} documents)."
-            )
+            response = os_connection.bulk(index=index_name, body=actions)
+
+            # A bulk request succeeds as a whole even if single items are rejected
+            if response.get("errors"):
+                errors = [
+                    details["error"]
+                    for item in response["items"]
+                    for details in item.values()
+                    if "error" in details
+                ]
+                logger.error(
+                    f"Bulk Indexing rejected {len(errors)} items of batch "
+                    f"{start // batch_size + 1}, first error: {errors[0] if errors else 'unknown'}"
+                )
+                success = False
+            else:
+                logger.info(
+                    f"Successfully indexed batch {start // batch_size + 1} ({len(batch)} documents)."
+                )
         except Exception as e:
             logging.error(
                 f"Bulk Indexing failed for batch {start//batch_size+1} due to error: {str(e)}"
@@ -74,3 +127,73 @@ def opensearch_insert(
             success = False
 
     return success
+
+
+def opensearch_insert_document_vectors(
+    os_connection: OpenSearch,
+    index_name: str,
+    document_vectors: List[Tuple[str, Any, Dict[str, Any]]],
+    batch_size: int = 1000,
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Inserts pooled document vectors into an OpenSearch index in batches.
+
+    Args:
+        os_connection (OpenSearch): OpenSearch client connection.
+        index_name (str): The target document vector index.
+        document_vectors (List[Tuple[str, Any, Dict[str, Any]]]): (document ID, vector,
+            metadata) tuples as returned by `pool_document_vectors`.
+        batch_size (int, optional): Number of documents to index per batch. Defaults to 1000.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile used to
+            normalize or quantize the vectors. Defaults to the configured profile.
+
+    Returns:
+        bool: True if all batches are successfully indexed and acknowledged without
+        item errors; False otherwise.
+    """
+    success: bool = True
+
+    for start in range(0, len(document_vectors), batch_size):
+        actions: List[Dict[str, Any]] = []
+        batch = document_vectors[start : start + batch_size]
+        stored_vectors = prepare_vectors(
+            [vector for _, vector, _ in batch], vector_profile
+        )
+
+        for (doc_id, _, metadata), stored_vector in zip(batch, stored_vectors):
+            actions.append({"index": {"_index": index_name, "_id": doc_id}})
+            actions.append(
+                {
+                    "documentID": doc_id,
+                    "articleDate": metadata.get("articleDate"),
+                    "chunkCount": metadata.get("chunk_count"),
+                    "tokenCount": metadata.get("token_count"),
+                    "pubmed_bert_vector": stored_vector,
+                }
+            )
+
+        try:
+            response = os_connection.bulk(index=index_name, body=actions)
+
+            if response.get("errors"):
+                errors = [
+                    details["error"]
+                    for item in response["items"]
+                    for details in item.values()
+                    if "error" in details
+                ]
+                logger.error(
+                    f"Document vector indexing rejected {len(errors)} items, "
+                    f"first error: {errors[0] if errors else 'unknown'}"
+                )
+                success = False
+            else:
+                logger.info(f"Indexed {len(batch)} document vectors in {index_name}.")
+        except Exception as e:
+            logger.error(
+                f"Document vector indexing failed for {index_name} due to error: {str(e)}"
+            )
+            success = False
+
+    return success
@@ -1,45 +1,125 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .database_vector_profile import knn_vector_field, vector_index_meta
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Document-level fields that the "parent" chunk schema stores once per document
+# in the metadata index instead of copying them into every chunk.
+CONST_DOCUMENT_METADATA_FIELDS = [
+    "documentSource",
+    "title",
+    "journal:title",
+    "keywords:name",
+    "meshTerms",
+    "meshIds",
+    "chemicals",
+    "authors:name",
+    "authors:affiliation",
+]
+
+CONST_INDEX_SETTINGS: Dict[str, Any] = {
+    "number_of_shards": 3,
+    "number_of_replicas": 1,
+    "analysis": {
+        "analyzer": {
+            "modified_analyzer": {
+                "type": "custom",
+                "tokenizer": "standard",
+                "filter": ["lowercase", "preserve_original"],
+            }
+        },
+        "filter": {
+            "preserve_original": {
+                "type": "word_delimiter",
+                "preserve_original": True,
+            }
+        },
+    },
+}
+
 
-def opensearch_pubmedbert_mapping() -> Dict[str, Any]:
+def opensearch_pubmedbert_mapping(
+    vector_profile: Optional[Dict[str, Any]] = None,
+    document_metadata: bool = True,
+) -> Dict[str, Any]:
     """
     Constructs the OpenSearch index mapping for PubMedBERT document vectors.
 
+    Args:
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile from
+            `get_vector_profile`. Defaults to the configured profile.
+        document_metadata (bool): Whether chunks carry a copy of the document
+            metadata. Set to False for the "parent" chunk schema. Defaults to True.
+
     Returns:
         Dict[str, Any]: A dictionary containing settings and mappings for the OpenSearch index.
 
     Notes:
-        - This configuration enables KNN vector search using `lucene` HNSW engine.
+        - This configuration enables KNN vector search using an HNSW graph whose
+          engine and quantization are set by the vector storage profile.
         - The analyzer used is a custom analyzer with lowercase and preserve_original filters.
         - This mapping is suitable for semantic indexing of biomedical text embeddings.
     """
     logger.info("Generating OpenSearch mapping for PubMedBERT vector index.")
 
     os_mapping: Dict[str, Any] = {
-        "settings": {
-            "number_of_shards": 3,
-            "number_of_replicas": 1,
-            "analysis": {
-                "analyzer": {
-                    "modified_analyzer": {
-                        "type": "custom",
-                        "tokenizer": "standard",
-                        "filter": ["lowercase", "preserve_original"],
-                    }
+        "settings": {**CONST_INDEX_SETTINGS, "knn": True},
+        "mappings": {
+            # Records the projection of the stored vectors for readers of the index
+            "_meta": vector_index_meta(vector_profile),
+            "properties": {
+                "documentSource": {"type": "keyword"},
+                "documentID": {"type": "keyword"},
+                "articleDate": {
+                    "type": "date",
+                    "format": "yyyy-MM-dd",
                 },
-                "filter": {
-                    "preserve_original": {
-                        "type": "word_delimiter",
-                        "preserve_original": True,
-                    }
+                "title": {"type": "text", "analyzer": "modified_analyzer"},
+                "journal:title": {"type": "text", "analyzer": "modified_analyzer"},
+                "keywords:name": {"type": "text", "analyzer": "modified_analyzer"},
+                "meshTerms": {"type": "text", "analyzer": "modified_analyzer"},
+                "meshIds": {"type": "text", "analyzer": "modified_analyzer"},
+                "chemicals": {"type": "text", "analyzer": "modified_analyzer"},
+                "authors:name": {"type": "text", "analyzer": "modified_analyzer"},
+                "authors:affiliation": {
+                    "type": "text",
+                    "analyzer": "modified_analyzer",
                 },
+                "abstract_chunk_id": {"type": "integer"},
+                "abstract_chunk": {"type": "text", "analyzer": "modified_analyzer"},
+                "pubmed_bert_vector": knn_vector_field(vector_profile, dimension=768),
             },
-            "knn": True,
         },
+    }
+
+    if not document_metadata:
+        for field in CONST_DOCUMENT_METADATA_FIELDS:
+            os_mapping["mappings"]["properties"].pop(field)
+
+    logger.info(
+        "OpenSearch mapping for PubMedBERT vector index generated successfully."
+    )
+    return os_mapping
+
+
+def opensearch_document_metadata_mapping() -> Dict[str, Any]:
+    """
+    Constructs the OpenSearch index mapping for per-document metadata records.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing settings and mappings for the OpenSearch index.
+
+    Notes:
+        - Used by the "parent" chunk schema: one record per document, keyed by
+          `documentID`, holds the metadata that chunks no longer copy.
+    """
+    logger.info("Generating OpenSearch mapping for document metadata index.")
+
+    os_mapping: Dict[str, Any] = {
+        "settings": CONST_INDEX_SETTINGS,
         "mappings": {
             "properties": {
                 "documentSource": {"type": "keyword"},
@@ -59,23 +139,56 @@ def opensearch_pubmedbert_mapping() -> Dict[str, Any]:
                     "type": "text",
                     "analyzer": "modified_analyzer",
                 },
-                "abstract_chunk_id": {"type": "integer"},
-                "abstract_chunk": {"type": "text", "analyzer": "modified_analyzer"},
-                "pubmed_bert_vector": {
-                    "type": "knn_vector",
-                    "dimension": 768,
-                    "method": {
-                        "engine": "lucene",
-                        "name": "hnsw",
-                        "space_type": "cosinesimil",
-                        "parameters": {"ef_construction": 40, "m": 8},
-                    },
-                },
             }
         },
     }
 
     logger.info(
-        "OpenSearch mapping for PubMedBERT vector index generated successfully."
+        "OpenSearch mapping for document metadata index generated successfully."
     )
     return os_mapping
+
+
+def opensearch_document_vector_mapping(
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Constructs the OpenSearch index mapping for pooled document vectors.
+
+    Args:
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile from
+            `get_vector_profile`. Defaults to the configured profile.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing settings and mappings for the OpenSearch index.
+
+    Notes:
+        - One record per document, keyed by `documentID`, with the length-weighted
+          mean of its chunk vectors. Document metadata stays in the chunk or
+          metadata index.
+    """
+    logger.info("Generating OpenSearch mapping for document vector index.")
+
+    os_mapping: Dict[str, Any] = {
+        "settings": {
+            "number_of_shards": CONST_INDEX_SETTINGS["number_of_shards"],
+            "number_of_replicas": CONST_INDEX_SETTINGS["number_of_replicas"],
+            "knn": True,
+        },
+        "mappings": {
+            "_meta": vector_index_meta(vector_profile),
+            "properties": {
+                "documentID": {"type": "keyword"},
+                "articleDate": {
+                    "type": "date",
+                    "format": "yyyy-MM-dd",
+                },
+                "chunkCount": {"type": "integer"},
+                "tokenCount": {"type": "integer"},
+                "pubmed_bert_vector": knn_vector_field(vector_profile, dimension=768),
+            },
+        },
+    }
+
+    logger.info("OpenSearch mapping for document vector index generated successfully.")
+    return os_mapping
@@ -0,0 +1,102 @@
+import logging
+from typing import Any, Dict, List
+
+from opensearchpy import OpenSearch
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def _vector_field_profile(mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts the storage layout of the first `knn_vector` field of an index mapping.
+
+    Args:
+        mapping (Dict[str, Any]): Mapping returned by `indices.get_mapping` for one index.
+
+    Returns:
+        Dict[str, Any]: Field name, engine, space type, data type, encoder and HNSW parameters.
+    """
+    properties = mapping.get("mappings", {}).get("properties", {})
+
+    for field_name, field in properties.items():
+        if field.get("type") != "knn_vector":
+            continue
+
+        method = field.get("method", {})
+        parameters = method.get("parameters", {})
+        encoder = parameters.get("encoder", {})
+        return {
+            "field": field_name,
+            "dimension": field.get("dimension"),
+            "engine": method.get("engine"),
+            "space_type": method.get("space_type"),
+            "data_type": field.get("data_type", "float"),
+            "encoder": encoder.get("parameters", {}).get("type", encoder.get("name")),
+            "m": parameters.get("m"),
+            "ef_construction": parameters.get("ef_construction"),
+        }
+
+    return {}
+
+
+def opensearch_storage_report(
+    os_connection: OpenSearch, index_names: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Reports the on-disk size and vector storage layout of OpenSearch indices.
+
+    Args:
+        os_connection (OpenSearch): OpenSearch client connection.
+        index_names (List[str]): Indices to report on.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per index with document count, primary and
+        total store size, bytes per document and the vector field layout.
+
+    Notes:
+        - The cluster-wide native memory used by k-NN graphs is logged once, as the
+          k-NN stats API does not break it down per index.
+    """
+    report: List[Dict[str, Any]] = []
+
+    for index_name in index_names:
+        try:
+            stats = os_connection.indices.stats(index=index_name, metric="docs,store")
+            mapping = os_connection.indices.get_mapping(index=index_name)
+
+            primaries = stats["indices"][index_name]["primaries"]
+            total = stats["indices"][index_name]["total"]
+            doc_count = primaries["docs"]["count"]
+            primary_bytes = primaries["store"]["size_in_bytes"]
+
+            entry = {
+                "index": index_name,
+                "documents": doc_count,
+                "primary_store_bytes": primary_bytes,
+                "total_store_bytes": total["store"]["size_in_bytes"],
+                "bytes_per_document": (
+                    round(primary_bytes / doc_count, 1) if doc_count else None
+                ),
+            }
+            entry.update(_vector_field_profile(mapping[index_name]))
+            report.append(entry)
+
+            logger.info(f"Storage report for index {index_name}: {entry}")
+
+        except Exception as e:
+            logger.error(f"Storage report failed for index {index_name}: {str(e)}")
+
+    try:
+        knn_stats = os_connection.transport.perform_request(
+            "GET", "/_plugins/_knn/stats"
+        )
+        graph_memory_kb = sum(
+            node.get("graph_memory_usage", 0)
+            for node in knn_stats.get("nodes", {}).values()
+        )
+        logger.info(f"k-NN graph memory across the cluster: {graph_memory_kb} KB")
+    except Exception as e:
+        logger.warning(f"Failed to read k-NN graph statistics: {str(e)}")
+
+    return report
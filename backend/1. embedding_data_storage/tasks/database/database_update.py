@@ -0,0 +1,89 @@
+import logging
+from typing import Any, Dict, List
+
+from tqdm import tqdm
+from opensearchpy import OpenSearch
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def opensearch_update_flag(
+    os_connection: OpenSearch,
+    index_name: str,
+    document_ids: List[str],
+    flag_field: str = "vectorisedFlag",
+    flag_value: str = "Y",
+    batch_size: int = 1000,
+) -> bool:
+    """
+    Sets a flag field on documents of an OpenSearch index with bulk partial updates.
+
+    Args:
+        os_connection (OpenSearch): OpenSearch client connection.
+        index_name (str): Index holding the documents to update.
+        document_ids (List[str]): IDs of the documents to update.
+        flag_field (str): Name of the flag field. Defaults to "vectorisedFlag".
+        flag_value (str): Value written to the flag field. Defaults to "Y".
+        batch_size (int): Number of documents updated per bulk request. Defaults to 1000.
+
+    Returns:
+        bool: True if every document was updated; False otherwise.
+    """
+    success: bool = True
+
+    for start in tqdm(
+        range(0, len(document_ids), batch_size), desc="Updating document flags"
+    ):
+        actions: List[Dict[str, Any]] = []
+        batch = document_ids[start : start + batch_size]
+
+        for doc_id in batch:
+            actions.append({"update": {"_index": index_name, "_id": doc_id}})
+            actions.append({"doc": {flag_field: flag_value}})
+
+        try:
+            response = os_connection.bulk(index=index_name, body=actions)
+
+            if response.get("errors"):
+                errors = [
+                    item["update"]["error"]
+                    for item in response["items"]
+                    if "error" in item.get("update", {})
+                ]
+                logger.error(
+                    f"Flag update failed for {len(errors)} of {len(batch)} documents "
+                    f"in {index_name}, first error: {errors[0] if errors else 'unknown'}"
+                )
+                success = False
+            else:
+                logger.info(
+                    f"Set {flag_field}={flag_value} for {len(batch)} documents in {index_name}."
+                )
+        except Exception as e:
+            logger.error(f"Flag update failed for {index_name} due to error: {str(e)}")
+            success = False
+
+    return success
+
+
+def opensearch_map_flag_fields(
+    os_connection: OpenSearch, index_name: str, flag_fields: List[str]
+) -> None:
+    """
+    Adds keyword mappings for flag fields, so they are not mapped as text on first use.
+
+    Args:
+        os_connection (OpenSearch): OpenSearch client connection.
+        index_name (str): Index holding the documents to flag.
+        flag_fields (List[str]): Names of the flag fields.
+
+    Notes:
+        - Documents that were never flagged have no value; they are selected with
+          a `must_not` on the flagged value rather than a term on "N".
+    """
+    os_connection.indices.put_mapping(
+        index=index_name,
+        body={"properties": {field: {"type": "keyword"} for field in flag_fields}},
+    )
+    logger.info(f"Mapped flag fields {flag_fields} in {index_name}.")
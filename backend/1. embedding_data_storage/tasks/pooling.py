@@ -0,0 +1,61 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def pool_document_vectors(
+    document_details: List[Tuple[str, List[float], Dict[str, Any]]],
+) -> List[Tuple[str, np.ndarray, Dict[str, Any]]]:
+    """
+    Pools the chunk vectors of each document into one length-weighted document vector.
+
+    Args:
+        document_details (List[Tuple[str, List[float], Dict[str, Any]]]):
+            (chunk id, vector, metadata) tuples as returned by
+            `Processor.get_document_information`. The metadata must carry
+            `pubmed_id` and may carry the `token_count` of the chunk.
+
+    Returns:
+        List[Tuple[str, np.ndarray, Dict[str, Any]]]: One (document id, pooled vector,
+        metadata) tuple per document, in order of first appearance. The metadata holds
+        the document ID, article date, number of chunks and number of tokens.
+
+    Notes:
+        - Chunk vectors are L2-normalized before pooling, so every chunk contributes
+          its direction weighted by its token count, not by its vector norm.
+        - Chunks without a `token_count` get a weight of 1.
+    """
+    grouped: Dict[str, List[Tuple[List[float], Dict[str, Any]]]] = {}
+    for _, embedding, metadata in document_details:
+        grouped.setdefault(metadata["pubmed_id"], []).append((embedding, metadata))
+
+    document_vectors = []
+    for doc_id, chunks in grouped.items():
+        vectors = np.asarray([embedding for embedding, _ in chunks], dtype=np.float32)
+        weights = np.asarray(
+            [max(metadata.get("token_count", 1), 1) for _, metadata in chunks],
+            dtype=np.float32,
+        )
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        pooled = (weights[:, None] * vectors).sum(axis=0) / weights.sum()
+
+        document_vectors.append(
+            (
+                doc_id,
+                pooled,
+                {
+                    "pubmed_id": doc_id,
+                    "articleDate": chunks[0][1].get("articleDate"),
+                    "chunk_count": len(chunks),
+                    "token_count": int(weights.sum()),
+                },
+            )
+        )
+
+    return document_vectors
@@ -0,0 +1,200 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from opensearchpy import OpenSearch
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream in the page and write buffers
+_END_OF_STREAM = object()
+
+
+class ScrollPrefetcher:
+    """
+    Reads the pages of an OpenSearch scroll query in a background thread.
+
+    Up to `buffer_pages` pages are fetched ahead of the consumer, so the next page is
+    read from the network while the current one is being chunked and encoded.
+    """
+
+    def __init__(
+        self,
+        os_connection: OpenSearch,
+        index_name: str,
+        body: Dict[str, Any],
+        scroll_size: int = 500,
+        scroll: str = "10m",
+        buffer_pages: int = 2,
+    ) -> None:
+        """
+        Initializes the prefetcher for a search query.
+
+        Args:
+            os_connection (OpenSearch): OpenSearch client connection.
+            index_name (str): Index to search.
+            body (Dict[str, Any]): Search request body.
+            scroll_size (int): Number of hits per page. Defaults to 500.
+            scroll (str): Lifetime of the scroll context. Defaults to "10m".
+            buffer_pages (int): Maximum number of pages fetched ahead. Defaults to 2.
+        """
+        self.os_connection = os_connection
+        self.index_name = index_name
+        self.body = body
+        self.scroll_size = scroll_size
+        self.scroll = scroll
+
+        self.total_docs: int = 0
+        self._scroll_id: Optional[str] = None
+        self._pages: queue.Queue = queue.Queue(maxsize=max(1, buffer_pages))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ScrollPrefetcher":
+        # The first page is read synchronously to know the total number of hits
+        response = self.os_connection.search(
+            index=self.index_name,
+            scroll=self.scroll,
+            size=self.scroll_size,
+            body=self.body,
+        )
+        self._scroll_id = response["_scroll_id"]
+        self.total_docs = response["hits"]["total"]["value"]
+        hits = response["hits"]["hits"]
+
+        self._pages.put(hits if hits else _END_OF_STREAM)
+        if hits:
+            self._thread = threading.Thread(
+                target=self._read_pages, name="scroll-prefetch", daemon=True
+            )
+            self._thread.start()
+
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+
+        # Unblock the reader if it waits for room in the buffer
+        while self._thread is not None and self._thread.is_alive():
+            try:
+                self._pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        try:
+            self.os_connection.clear_scroll(scroll_id=self._scroll_id)
+        except Exception as e:
+            logger.warning(f"Failed to clear scroll context: {str(e)}")
+
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        while True:
+            page = self._pages.get()
+            if page is _END_OF_STREAM:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+    def _put(self, item: Any) -> bool:
+        """
+        Puts an item into the page buffer unless the consumer has stopped.
+
+        Returns:
+            bool: True if the item was buffered; False if the prefetcher was stopped.
+        """
+        while not self._stop.is_set():
+            try:
+                self._pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_pages(self) -> None:
+        try:
+            while not self._stop.is_set():
+                response = self.os_connection.scroll(
+                    scroll_id=self._scroll_id, scroll=self.scroll
+                )
+                self._scroll_id = response["_scroll_id"]
+                hits = response["hits"]["hits"]
+
+                if not hits:
+                    self._put(_END_OF_STREAM)
+                    return
+                if not self._put(hits):
+                    return
+
+        except Exception as e:
+            logger.error(f"Scroll prefetch failed due to error: {str(e)}")
+            self._put(e)
+
+
+class AsyncBulkWriter:
+    """
+    Writes batches to OpenSearch in a background thread.
+
+    Up to `buffer_batches` batches wait for the writer, after which `submit` blocks,
+    so encoding never runs more than that far ahead of indexing.
+    """
+
+    def __init__(
+        self, write_fn: Callable[[Any], bool], buffer_batches: int = 2
+    ) -> None:
+        """
+        Initializes the writer.
+
+        Args:
+            write_fn (Callable[[Any], bool]): Writes one batch and returns its success.
+            buffer_batches (int): Maximum number of batches waiting to be written.
+                Defaults to 2.
+        """
+        self.write_fn = write_fn
+        self.success: bool = True
+        self._batches: queue.Queue = queue.Queue(maxsize=max(1, buffer_batches))
+        self._thread = threading.Thread(
+            target=self._write_batches, name="bulk-writer", daemon=True
+        )
+
+    def __enter__(self) -> "AsyncBulkWriter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def submit(self, batch: Any) -> None:
+        """
+        Queues a batch for writing, blocking while the buffer is full.
+
+        Args:
+            batch (Any): Batch passed to `write_fn`.
+        """
+        self._batches.put(batch)
+
+    def close(self) -> bool:
+        """
+        Waits until all queued batches are written.
+
+        Returns:
+            bool: True if every batch was written successfully; False otherwise.
+        """
+        if self._thread.is_alive():
+            self._batches.put(_END_OF_STREAM)
+            self._thread.join()
+        return self.success
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = self._batches.get()
+            if batch is _END_OF_STREAM:
+                return
+
+            try:
+                if not self.write_fn(batch):
+                    self.success = False
+            except Exception as e:
+                logger.error(f"Asynchronous bulk write failed due to error: {str(e)}")
+                self.success = False
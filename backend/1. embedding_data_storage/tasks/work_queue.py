@@ -0,0 +1,396 @@
+import os
+import json
+import uuid
+import socket
+import logging
+import threading
+from time import time, sleep
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+class ShardLease:
+    """
+    A claimed date shard whose lease is renewed in a background thread until it is
+    released or marked done.
+    """
+
+    def __init__(self, queue: "ShardQueue", shard: Dict[str, str], token: str) -> None:
+        """
+        Initializes the lease and starts renewing it.
+
+        Args:
+            queue (ShardQueue): Queue the shard was claimed from.
+            shard (Dict[str, str]): Shard with `name`, `start_date` and `end_date`.
+            token (str): Token written into the lease file by this claim.
+        """
+        self.queue = queue
+        self.shard = shard
+        self.token = token
+        self.lost = False
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._renew, name=f"lease-{shard['name']}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def start_date(self) -> str:
+        return self.shard["start_date"]
+
+    @property
+    def end_date(self) -> str:
+        return self.shard["end_date"]
+
+    def _renew(self) -> None:
+        # Renew well before expiry so a slow shared filesystem does not cost the lease
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            if not self.queue._renew_lease(self.shard["name"], self.token):
+                self.lost = True
+                logger.warning(
+                    f"Lease on shard {self.shard['name']} was lost; another worker may process it again."
+                )
+                return
+
+    def done(self, summary: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Marks the shard as done and releases the lease, if the lease is still held.
+
+        Args:
+            summary (Optional[Dict[str, Any]]): Details stored with the done record.
+
+        Returns:
+            bool: True if the shard was marked done; False if the lease was lost,
+            in which case the worker that holds it now completes the shard.
+        """
+        self._stop.set()
+        self._thread.join()
+        if self.lost or not self.queue._complete_lease(
+            self.shard["name"], self.token, summary or {}
+        ):
+            self.lost = True
+            logger.warning(
+                f"Lease on shard {self.shard['name']} was lost; not marking it done."
+            )
+            return False
+        return True
+
+    def release(self) -> None:
+        """
+        Releases the lease without marking the shard done, so it can be claimed again.
+        """
+        self._stop.set()
+        self._thread.join()
+        self.queue._release_lease(self.shard["name"], self.token)
+
+
+class ShardQueue:
+    """
+    Work queue of date shards shared by several hosts through a common directory.
+
+    Layout of the queue directory:
+        - `shards/<name>.json`: one record per date shard, written by the coordinator.
+        - `leases/<name>.lease`: the current claim on a shard, with owner and expiry.
+        - `done/<name>.json`: completion record of a shard.
+
+    Notes:
+        - Leases are created with `O_CREAT | O_EXCL`, so exactly one worker wins a
+          shard even when several try at once. This holds on local filesystems and
+          on NFSv3 or later.
+        - Renewing, releasing, completing and reclaiming a lease happen under a
+          short-lived `leases/<name>.lock`, also created with `O_EXCL`. A lease is
+          only rewritten or removed after its token was checked under that lock,
+          so a late renewal never overwrites the lease of a new holder.
+        - Workers renew their leases while processing. A lease that has not been
+          renewed within `lease_seconds` is reclaimed by the next worker.
+        - Re-processing a shard after a lost lease is harmless, as chunks are indexed
+          under deterministic IDs.
+    """
+
+    def __init__(
+        self,
+        queue_dir: str,
+        lease_seconds: int = 600,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the queue in a shared directory.
+
+        Args:
+            queue_dir (str): Directory shared by all hosts.
+            lease_seconds (int): Time after which an unrenewed lease expires. Defaults to 600.
+            worker_id (Optional[str]): Name of this worker. Defaults to host name and process ID.
+        """
+        self.queue_dir = queue_dir
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+        self.shard_dir = os.path.join(queue_dir, "shards")
+        self.lease_dir = os.path.join(queue_dir, "leases")
+        self.done_dir = os.path.join(queue_dir, "done")
+        for directory in [self.shard_dir, self.lease_dir, self.done_dir]:
+            os.makedirs(directory, exist_ok=True)
+
+    def _lease_path(self, name: str) -> str:
+        return os.path.join(self.lease_dir, f"{name}.lease")
+
+    def _done_path(self, name: str) -> str:
+        return os.path.join(self.done_dir, f"{name}.json")
+
+    @contextmanager
+    def _locked(self, name: str, timeout: float = 60.0) -> Iterator[None]:
+        """
+        Holds the lock file of a shard's lease while changing the lease.
+
+        Args:
+            name (str): Shard name.
+            timeout (float): Age in seconds after which a lock left behind by a
+                crashed worker is broken. Defaults to 60.
+        """
+        lock_path = os.path.join(self.lease_dir, f"{name}.lock")
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time() - os.path.getmtime(lock_path) > timeout:
+                        os.remove(lock_path)
+                        logger.warning(f"Broke stale lock {lock_path}")
+                        continue
+                except FileNotFoundError:
+                    continue
+                sleep(0.05)
+
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    @staticmethod
+    def _write_json(path: str, content: Dict[str, Any]) -> None:
+        # Written to a temporary file first, so readers never see a partial record
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(content, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def create_shards(
+        self, start_date: str, end_date: str, shard_days: int = 7
+    ) -> List[Dict[str, str]]:
+        """
+        Splits a date range into shards and adds the missing ones to the queue.
+
+        Args:
+            start_date (str): First day of the range in YYYY-MM-DD format.
+            end_date (str): Last day of the range in YYYY-MM-DD format.
+            shard_days (int): Number of days per shard. Defaults to 7.
+
+        Returns:
+            List[Dict[str, str]]: All shards of the range, newest first.
+
+        Notes:
+            - Existing shards are left untouched, so the coordinator can be re-run
+              with the same or an extended range.
+        """
+        first_day = datetime.strptime(start_date, "%Y-%m-%d")
+        shard_end = datetime.strptime(end_date, "%Y-%m-%d")
+        shards = []
+
+        while shard_end >= first_day:
+            shard_start = max(shard_end - timedelta(days=shard_days - 1), first_day)
+            shard = {
+                "name": f"{shard_start:%Y%m%d}_{shard_end:%Y%m%d}",
+                "start_date": shard_start.strftime("%Y-%m-%d"),
+                "end_date": shard_end.strftime("%Y-%m-%d"),
+            }
+            shards.append(shard)
+
+            path = os.path.join(self.shard_dir, f"{shard['name']}.json")
+            if not os.path.exists(path):
+                self._write_json(path, shard)
+
+            shard_end = shard_start - timedelta(days=1)
+
+        logger.info(
+            f"Work queue {self.queue_dir} holds {len(shards)} shards for {start_date} to {end_date}"
+        )
+        return shards
+
+    def shards(self) -> List[Dict[str, str]]:
+        """
+        Lists the shards of the queue, newest first.
+
+        Returns:
+            List[Dict[str, str]]: Shard records.
+        """
+        records = [
+            self._read_json(os.path.join(self.shard_dir, file_name))
+            for file_name in os.listdir(self.shard_dir)
+            if file_name.endswith(".json")
+        ]
+        return sorted(
+            [record for record in records if record],
+            key=lambda record: record["end_date"],
+            reverse=True,
+        )
+
+    def status(self) -> Dict[str, int]:
+        """
+        Counts the shards that are pending, leased and done.
+
+        Returns:
+            Dict[str, int]: Number of shards per state.
+        """
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        for shard in self.shards():
+            if os.path.exists(self._done_path(shard["name"])):
+                counts["done"] += 1
+            elif self._active_lease(shard["name"]) is not None:
+                counts["leased"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+
+    def _active_lease(self, name: str) -> Optional[Dict[str, Any]]:
+        lease = self._read_json(self._lease_path(name))
+        if lease is not None and lease["expires_at"] > time():
+            return lease
+        return None
+
+    def _try_create_lease(self, name: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(self._lease_path(name), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {
+                    "worker": self.worker_id,
+                    "token": token,
+                    "expires_at": time() + self.lease_seconds,
+                },
+                f,
+            )
+        return token
+
+    def _reclaim_expired_lease(self, name: str) -> bool:
+        """
+        Removes an expired lease so it can be claimed again.
+
+        Returns:
+            bool: True if the expired lease was removed by this worker.
+        """
+        lease_path = self._lease_path(name)
+        with self._locked(name):
+            lease = self._read_json(lease_path)
+            if lease is None or lease["expires_at"] > time():
+                return False
+            os.remove(lease_path)
+
+        logger.info(
+            f"Reclaimed expired lease of worker {lease['worker']} on shard {name}"
+        )
+        return True
+
+    def claim(self) -> Optional[ShardLease]:
+        """
+        Claims the newest shard that is neither done nor leased.
+
+        Returns:
+            Optional[ShardLease]: The claimed shard, or None if no shard is available.
+        """
+        for shard in self.shards():
+            name = shard["name"]
+            if os.path.exists(self._done_path(name)):
+                continue
+
+            token = self._try_create_lease(name)
+            if token is None and self._reclaim_expired_lease(name):
+                token = self._try_create_lease(name)
+
+            if token is not None:
+                logger.info(f"Worker {self.worker_id} claimed shard {name}")
+                return ShardLease(self, shard, token)
+
+        return None
+
+    def _renew_lease(self, name: str, token: str) -> bool:
+        lease_path = self._lease_path(name)
+        with self._locked(name):
+            lease = self._read_json(lease_path)
+            if lease is None or lease["token"] != token:
+                return False
+
+            lease["expires_at"] = time() + self.lease_seconds
+            self._write_json(lease_path, lease)
+        return True
+
+    def _release_lease(self, name: str, token: str) -> None:
+        with self._locked(name):
+            lease = self._read_json(self._lease_path(name))
+            if lease is not None and lease["token"] == token:
+                os.remove(self._lease_path(name))
+
+    def _complete_lease(self, name: str, token: str, summary: Dict[str, Any]) -> bool:
+        """
+        Marks a shard done and removes its lease, if `token` still holds the lease.
+
+        Returns:
+            bool: True if the shard was marked done.
+        """
+        with self._locked(name):
+            lease = self._read_json(self._lease_path(name))
+            if lease is None or lease["token"] != token:
+                return False
+
+            self._mark_done(name, summary)
+            os.remove(self._lease_path(name))
+        return True
+
+    def _mark_done(self, name: str, summary: Dict[str, Any]) -> None:
+        self._write_json(
+            self._done_path(name),
+            {"worker": self.worker_id, "completed_at": time(), **summary},
+        )
+        logger.info(f"Worker {self.worker_id} completed shard {name}")
+
+    def wait_for_shard(self, poll_seconds: int = 30) -> Optional[ShardLease]:
+        """
+        Claims the next shard, waiting while the remaining shards are leased by others.
+
+        Args:
+            poll_seconds (int): Pause between claim attempts. Defaults to 30.
+
+        Returns:
+            Optional[ShardLease]: The claimed shard, or None once every shard is done.
+        """
+        while True:
+            lease = self.claim()
+            if lease is not None:
+                return lease
+
+            status = self.status()
+            if status["pending"] == 0 and status["leased"] == 0:
+                return None
+
+            logger.info(
+                f"No shard available ({status}), retrying in {poll_seconds} seconds"
+            )
+            sleep(poll_seconds)
@@ -1,20 +1,42 @@
 import os
+import json
 import argparse
+import itertools
 import logging
 from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 from tqdm import tqdm
 
 from tasks.database.database_connection import opensearch_connection
-from tasks.database.database_read import DataFetcher
+from tasks.database.database_read import CONST_LAKE_FIELD_NAMES, DataFetcher
+from tasks.embedding_lake import EmbeddingLake
+from tasks.model_catalog import CONST_CATALOG_FILE, ModelCatalog
 from tasks.topic_modelling import TopicModeller
+from tasks.online_topic_modelling import OnlineTopicModeller
+from tasks.sweep import ClusteringSweep
+from tasks.window_scheduler import WindowScheduler
 from utils import load_config_from_env
 
 # Load configuration
 CONFIG = load_config_from_env()
 
 
+def parse_nr_topics(value: str) -> Union[str, int, None]:
+    """
+    Parses a `nr_topics` value of BERTopic given on the command line.
+
+    Args:
+        value (str): 'auto', 'none' or a number of topics.
+
+    Returns:
+        Union[str, int, None]: 'auto', None or the number of topics.
+    """
+    if value.lower() == "none":
+        return None
+    return int(value) if value.isdigit() else value
+
+
 def generate_date_ranges(
     start_date: datetime, end_date: datetime, delta_days: int = 15
 ) -> List[Tuple[str, str]]:
@@ -42,6 +64,69 @@ def generate_date_ranges(
     return date_ranges
 
 
+def generate_adaptive_date_ranges(
+    start_date: datetime,
+    end_date: datetime,
+    daily_counts: Dict[str, int],
+    target_documents: int = 100_000,
+    min_days: int = 1,
+    max_days: int = 365,
+) -> List[Tuple[str, str]]:
+    """
+    Generate (start_date, end_date) windows holding about `target_documents` each.
+
+    Args:
+        start_date (datetime): The beginning of the date range.
+        end_date (datetime): The end of the date range.
+        daily_counts (Dict[str, int]): Number of documents per 'YYYY-MM-DD' day.
+        target_documents (int): Documents at which a window is closed. Defaults to 100,000.
+        min_days (int): Minimum length of a window in days. Defaults to 1.
+        max_days (int): Maximum length of a window in days. Defaults to 365.
+
+    Returns:
+        List[Tuple[str, str]]: List of (start_date, end_date) in 'YYYY-MM-DD' format.
+
+    Notes:
+        - Days are never split, so a window of `min_days` may exceed the target.
+        - A last window below half the target is merged into the previous one
+          if the merged window stays within `max_days`.
+    """
+    windows: List[Tuple[datetime, datetime, int]] = []
+    window_start, window_documents = start_date, 0
+    current = start_date
+
+    while current <= end_date:
+        window_documents += daily_counts.get(current.strftime("%Y-%m-%d"), 0)
+        window_days = (current - window_start).days + 1
+
+        if (
+            window_documents >= target_documents and window_days >= min_days
+        ) or window_days >= max_days:
+            windows.append((window_start, current, window_documents))
+            window_start, window_documents = current + timedelta(days=1), 0
+
+        current += timedelta(days=1)
+
+    if window_start <= end_date:
+        if (
+            windows
+            and window_documents < target_documents / 2
+            and (end_date - windows[-1][0]).days + 1 <= max_days
+        ):
+            previous_start, _, previous_documents = windows.pop()
+            windows.append(
+                (previous_start, end_date, previous_documents + window_documents)
+            )
+        else:
+            windows.append((window_start, end_date, window_documents))
+
+    return [
+        (window_start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d"))
+        for window_start, window_end, window_documents in windows
+        if window_documents > 0
+    ]
+
+
 def main(argv: Optional[List[str]] = None) -> None:
     """
     Entry point for the BERTopic clustering pipeline.
@@ -65,6 +150,16 @@ def main(argv: Optional[List[str]] = None) -> None:
         os_connection = opensearch_connection()
         os_index = CONFIG["CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_COMPLETE"]
 
+        # "parent" chunk schema keeps document metadata in a separate index
+        metadata_index = (
+            CONFIG["CLUSTER_CHAT_OPENSEARCH_METADATA_INDEX"]
+            if CONFIG.get("CLUSTER_CHAT_CHUNK_SCHEMA") == "parent"
+            else None
+        )
+
+        # Local export of chunk vectors and metadata, see tasks/embedding_lake.py
+        lake_dir = CONFIG.get("CLUSTER_CHAT_EMBEDDING_LAKE_PATH")
+
         # Path to save trained BERTopic models
         intermediate_path = CONFIG["MODEL_PATH"]
         os.makedirs(intermediate_path, exist_ok=True)
@@ -84,7 +179,227 @@ def main(argv: Optional[List[str]] = None) -> None:
             ),
         )
 
-        args = parser.parse_args()
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of date windows trained at once in separate processes. "
+                "Defaults to 1, i.e. windows are trained one after another."
+            ),
+        )
+
+        parser.add_argument(
+            "--memorybudget",
+            type=float,
+            default=None,
+            help=(
+                "RAM in GB shared by the windows trained at once. "
+                "Defaults to 80%% of the available memory."
+            ),
+        )
+
+        parser.add_argument(
+            "--embeddingdim",
+            type=int,
+            default=768,
+            help="Embedding dimension used to estimate the memory of a window.",
+        )
+
+        parser.add_argument(
+            "-u",
+            "--sharedreducer",
+            type=str,
+            default=None,
+            help=(
+                "Path of a pre-fitted 50-component UMAP model, e.g. "
+                "umap_50_components.joblib. Windows are reduced with it instead "
+                "of fitting UMAP per window."
+            ),
+        )
+
+        parser.add_argument(
+            "-o",
+            "--online",
+            action="store_true",
+            help=(
+                "Train one BERTopic model incrementally over the whole date range "
+                "instead of one model per window."
+            ),
+        )
+
+        parser.add_argument(
+            "--clusters",
+            type=int,
+            default=500,
+            help="Number of topics of the online model.",
+        )
+
+        parser.add_argument(
+            "--checkpointbatches",
+            type=int,
+            default=20,
+            help="Online training steps between checkpoints.",
+        )
+
+        parser.add_argument(
+            "-a",
+            "--adaptive",
+            action="store_true",
+            help=(
+                "Cut windows to a target number of documents from a per-day "
+                "histogram instead of fixed 15-day windows."
+            ),
+        )
+
+        parser.add_argument(
+            "--targetdocuments",
+            type=int,
+            default=100_000,
+            help="Number of documents per adaptive window.",
+        )
+
+        parser.add_argument(
+            "--minwindowdays",
+            type=int,
+            default=1,
+            help="Minimum length of an adaptive window in days.",
+        )
+
+        parser.add_argument(
+            "--maxwindowdays",
+            type=int,
+            default=365,
+            help="Maximum length of an adaptive window in days.",
+        )
+
+        parser.add_argument(
+            "-e",
+            "--exportlake",
+            metavar=("START_DATE", "END_DATE"),
+            type=str,
+            nargs=2,
+            help=(
+                "Export chunk vectors and metadata of the date range in 15-day "
+                "shards into the embedding lake."
+            ),
+        )
+
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help=(
+                "With --exportlake, only export shards that are missing or were "
+                "not complete at their last export."
+            ),
+        )
+
+        parser.add_argument(
+            "-l",
+            "--lake",
+            action="store_true",
+            help="Read embeddings from the embedding lake instead of OpenSearch.",
+        )
+
+        parser.add_argument(
+            "--dedup",
+            metavar="SIMILARITY",
+            type=float,
+            default=None,
+            help=(
+                "Train on one representative of chunks whose embeddings have at "
+                "least this cosine similarity, e.g. 0.98; duplicates are assigned "
+                "the topic of their representative."
+            ),
+        )
+
+        parser.add_argument(
+            "--retrain",
+            action="store_true",
+            help="Train windows again even if they are recorded in the model catalog.",
+        )
+
+        parser.add_argument(
+            "-s",
+            "--sweep",
+            action="store_true",
+            help=(
+                "With -c, cluster START_DATE to END_DATE as one window with every "
+                "combination of --minclustersizes and --nrtopics instead of training."
+            ),
+        )
+
+        parser.add_argument(
+            "--minclustersizes",
+            type=int,
+            nargs="+",
+            default=[15],
+            help="HDBSCAN min_cluster_size values of the sweep. Defaults to 15.",
+        )
+
+        parser.add_argument(
+            "--nrtopics",
+            type=str,
+            nargs="+",
+            default=["auto"],
+            help=(
+                "nr_topics values of the sweep: 'auto', 'none' or a number of "
+                "topics. Defaults to auto."
+            ),
+        )
+
+        parser.add_argument(
+            "--catalog",
+            metavar="DATE",
+            type=str,
+            nargs="*",
+            default=None,
+            help=(
+                "Print a summary of the model catalog, optionally limited to "
+                "START_DATE END_DATE, with the date ranges no model covers."
+            ),
+        )
+
+        args = parser.parse_args(argv)
+
+        if args.catalog is not None:
+            if len(args.catalog) not in (0, 2):
+                parser.error("--catalog takes no dates or START_DATE END_DATE.")
+            catalog = ModelCatalog(os.path.join(intermediate_path, CONST_CATALOG_FILE))
+            print(json.dumps(catalog.summary(*args.catalog), indent=2))
+
+        if (args.exportlake or args.lake) and not lake_dir:
+            parser.error("CLUSTER_CHAT_EMBEDDING_LAKE_PATH is not configured.")
+
+        if args.exportlake:
+            export_start, export_end = args.exportlake
+            lake = EmbeddingLake(lake_dir)
+            data_fetcher = DataFetcher(
+                opensearch_connection=os_connection,
+                index_name=os_index,
+                metadata_index=metadata_index,
+            )
+            to_lake_fields = {
+                value: key for key, value in CONST_LAKE_FIELD_NAMES.items()
+            }
+
+            for date_range in tqdm(
+                generate_date_ranges(
+                    datetime.strptime(export_start, "%Y-%m-%d"),
+                    datetime.strptime(export_end, "%Y-%m-%d"),
+                    delta_days=15,
+                ),
+                desc="Exporting into the embedding lake",
+            ):
+                lake.export_window(
+                    date_range,
+                    data_fetcher,
+                    field_names=to_lake_fields,
+                    append=args.append,
+                )
+
+            logging.info(f"Embedding lake at {lake_dir} is up to date.")
 
         if args.clusterchatbackend:
             start_date, end_date = args.clusterchatbackend
@@ -97,20 +412,89 @@ def main(argv: Optional[List[str]] = None) -> None:
                 raise ve
 
             # Initialize components
-            data_fetcher = DataFetcher(
-                opensearch_connection=os_connection, index_name=os_index
+            data_fetcher = (
+                EmbeddingLake(lake_dir, field_names=CONST_LAKE_FIELD_NAMES)
+                if args.lake
+                else DataFetcher(
+                    opensearch_connection=os_connection,
+                    index_name=os_index,
+                    metadata_index=metadata_index,
+                )
             )
-            topic_modelling = TopicModeller(model_path=intermediate_path)
+            memmap_threshold = CONFIG.get("CLUSTER_CHAT_TOPIC_MEMMAP_THRESHOLD_GB")
+            topic_modelling = TopicModeller(
+                model_path=intermediate_path,
+                memmap_threshold_gb=(
+                    float(memmap_threshold) if memmap_threshold else None
+                ),
+                shared_reducer_path=args.sharedreducer,
+                knn_cache_dir=CONFIG.get("CLUSTER_CHAT_KNN_CACHE_PATH") or None,
+                dedup_threshold=args.dedup,
+                resume=not args.retrain,
+            )
+
+            if args.sweep:
+                sweep = ClusteringSweep(
+                    topic_modeller=topic_modelling,
+                    n_workers=args.workers,
+                    log_file=CONFIG["CLUSTER_CHAT_LOG_EXE_PATH"],
+                )
+                configurations = [
+                    {"min_cluster_size": min_cluster_size, "nr_topics": nr_topics}
+                    for min_cluster_size, nr_topics in itertools.product(
+                        args.minclustersizes,
+                        [parse_nr_topics(value) for value in args.nrtopics],
+                    )
+                ]
+                sweep.run((start_date, end_date), data_fetcher, configurations)
+                return
 
             # Create date batches and process each batch
-            date_batches = generate_date_ranges(min_date, max_date, delta_days=15)
+            if args.adaptive:
+                date_batches = generate_adaptive_date_ranges(
+                    min_date,
+                    max_date,
+                    data_fetcher.count_embeddings_per_day(start_date, end_date),
+                    target_documents=args.targetdocuments,
+                    min_days=args.minwindowdays,
+                    max_days=args.maxwindowdays,
+                )
+            else:
+                date_batches = generate_date_ranges(min_date, max_date, delta_days=15)
             logging.info(f"Generated {len(date_batches)} date batches for processing.")
 
-            for date_range in tqdm(date_batches, desc="Training models by date range"):
-                logging.info(f"Training BERTopic model for range: {date_range}")
-                topic_modelling.train_bertopic_model(
-                    date_range=date_range, data_fetcher=data_fetcher
+            if args.online:
+                online_modelling = OnlineTopicModeller(
+                    model_path=intermediate_path,
+                    n_clusters=args.clusters,
+                    checkpoint_batches=args.checkpointbatches,
+                    resume=not args.retrain,
+                )
+                online_modelling.train_online_bertopic_model(
+                    date_ranges=date_batches, data_fetcher=data_fetcher
+                )
+            elif args.workers > 1:
+                scheduler = WindowScheduler(
+                    data_fetcher=data_fetcher,
+                    topic_modeller=topic_modelling,
+                    index_name=os_index,
+                    metadata_index=metadata_index,
+                    n_workers=args.workers,
+                    memory_budget_gb=args.memorybudget,
+                    dimension=args.embeddingdim,
+                    log_file=CONFIG["CLUSTER_CHAT_LOG_EXE_PATH"],
+                    lake_dir=lake_dir if args.lake else None,
                 )
+                model_paths = scheduler.run(date_batches)
+                logging.info(f"Trained {len(model_paths)} models in parallel.")
+            else:
+                for date_range in tqdm(
+                    date_batches, desc="Training models by date range"
+                ):
+                    logging.info(f"Training BERTopic model for range: {date_range}")
+                    topic_modelling.train_bertopic_model(
+                        date_range=date_range, data_fetcher=data_fetcher
+                    )
 
             logging.info("Clustering pipeline execution completed.")
 
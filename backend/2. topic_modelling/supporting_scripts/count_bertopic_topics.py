@@ -1,7 +1,15 @@
 import os
+import sys
 import pickle
+import sqlite3
+from datetime import date, timedelta
 from bertopic import BERTopic
 import gc
+import numpy as np
+
+STAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(STAGE_DIR)
+from utils import load_config_from_env
 
 
 def list_bertopic_models(model_dir, prefix="bertopic_model_", suffix=".pkl"):
@@ -22,9 +30,16 @@ def count_topics_in_models(model_dir):
         print(
             f"\n[{idx}/{len(model_paths)}] Processing: {os.path.basename(model_path)}"
         )
+        model = None
         try:
-            model = BERTopic.load(model_path)
-            topics = model.get_topics()
+            # Topic artifact written next to the model, see tasks/topic_artifact.py
+            artifact_path = os.path.splitext(model_path)[0] + ".topics.npz"
+            if os.path.exists(artifact_path):
+                with np.load(artifact_path) as artifact:
+                    topics = artifact["topic_ids"].tolist()
+            else:
+                model = BERTopic.load(model_path)
+                topics = model.get_topics()
             num_topics = len(
                 [tid for tid in topics if tid != -1]
             )  # Exclude outlier topic -1
@@ -40,6 +55,44 @@ def count_topics_in_models(model_dir):
     print(f"\n✅ Total number of topics across all models: {total_topics}")
 
 
+def count_topics_in_catalog(catalog_path):
+    """
+    Reports topic counts and date coverage from the model catalog written by
+    stage 2 (see tasks/model_catalog.py), without loading any model.
+    """
+    with sqlite3.connect(catalog_path) as connection:
+        windows = connection.execute(
+            "SELECT start_date, end_date, documents, training_documents, topics "
+            "FROM windows ORDER BY start_date"
+        ).fetchall()
+    print(f"Found {len(windows)} catalogued window(s).")
+
+    previous_end = None
+    for start_date, end_date, documents, training_documents, topics in windows:
+        if previous_end is not None and date.fromisoformat(
+            start_date
+        ) > date.fromisoformat(previous_end) + timedelta(days=1):
+            print(f"  (no model between {previous_end} and {start_date})")
+        print(
+            f"{start_date} to {end_date}: {topics} topics, {documents} documents "
+            f"({training_documents} trained on)"
+        )
+        previous_end = max(previous_end or end_date, end_date)
+
+    total_topics = sum(window[4] for window in windows)
+    total_documents = sum(window[2] for window in windows)
+    print(
+        f"\n✅ Total number of topics across all models: {total_topics} "
+        f"over {total_documents} documents"
+    )
+
+
 if __name__ == "__main__":
-    model_directory = "../../intermediate_results"  # <- Update this path
-    count_topics_in_models(model_directory)
+    # Same directory stage 2 saves its models to; relative paths are resolved
+    # from the stage directory, where main.py is run
+    model_directory = os.path.join(STAGE_DIR, load_config_from_env()["MODEL_PATH"])
+    catalog_path = os.path.join(model_directory, "model_catalog.sqlite")
+    if os.path.exists(catalog_path):
+        count_topics_in_catalog(catalog_path)
+    else:
+        count_topics_in_models(model_directory)
@@ -1,3 +1,12 @@
 from .database.database_connection import opensearch_connection as opensearch_connection
 from .database.database_read import DataFetcher as DataFetcher
 from .topic_modelling import TopicModeller as TopicModeller
+from .window_scheduler import WindowScheduler as WindowScheduler
+from .reduction import PrecomputedReduction as PrecomputedReduction
+from .reduction import ReductionCache as ReductionCache
+from .online_topic_modelling import OnlineTopicModeller as OnlineTopicModeller
+from .doc_info import read_doc_info as read_doc_info
+from .doc_info import read_doc_embeddings as read_doc_embeddings
+from .embedding_lake import EmbeddingLake as EmbeddingLake
+from .model_catalog import ModelCatalog as ModelCatalog
+from .sweep import ClusteringSweep as ClusteringSweep
@@ -3,7 +3,8 @@ Module for fetching embeddings from OpenSearch.
 """
 
 import logging
-from typing import Generator, List, Tuple, Dict, Any
+from collections import OrderedDict
+from typing import Generator, List, Tuple, Dict, Any, Optional
 from datetime import date
 import numpy as np
 from tqdm import tqdm
@@ -12,6 +13,22 @@ from tqdm import tqdm
 CONST_EUTILS_DEFAULT_MINDATE = "1800-01-01"
 CONST_EUTILS_DEFAULT_MAXDATE = date.today().strftime("%Y-%m-%d")
 
+# Chunk fields kept by the "parent" chunk schema; everything else is joined from
+# the per-document metadata index
+CONST_CHUNK_FIELDS = [
+    "documentID",
+    "articleDate",
+    "abstract_chunk",
+    "pubmed_bert_vector",
+]
+
+# Metadata keys of the yielded records that differ from the chunk index fields,
+# as stored in the embedding lake
+CONST_LAKE_FIELD_NAMES = {
+    "authors:name": "authors.name",
+    "authors:affiliation": "authors.affiliation",
+}
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
@@ -21,16 +38,173 @@ class DataFetcher:
     Class to fetch document embeddings and metadata from OpenSearch in batches.
     """
 
-    def __init__(self, opensearch_connection: Any, index_name: str) -> None:
+    def __init__(
+        self,
+        opensearch_connection: Any,
+        index_name: str,
+        metadata_index: Optional[str] = None,
+        metadata_cache_size: int = 100_000,
+    ) -> None:
         """
         Initialize the DataFetcher with an OpenSearch connection and index name.
 
         Args:
             opensearch_connection (Any): OpenSearch client instance.
             index_name (str): Name of the OpenSearch index to query.
+            metadata_index (Optional[str]): Per-document metadata index of the "parent"
+                chunk schema. If given, metadata is joined into each chunk from this
+                index instead of being read from the chunks. Defaults to None.
+            metadata_cache_size (int): Number of metadata records kept in memory
+                between batches. Defaults to 100,000.
         """
         self.client = opensearch_connection
         self.os_index_name = index_name
+        self.metadata_index = metadata_index
+        self.metadata_cache_size = metadata_cache_size
+        self._metadata_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _attach_document_metadata(
+        self, hits: List[Dict[str, Any]], fields: List[str]
+    ) -> None:
+        """
+        Joins per-document metadata into the `_source` of each chunk hit, in place.
+
+        Records missing from the cache are fetched with a single `mget` per batch.
+
+        Args:
+            hits (List[Dict[str, Any]]): Chunk hits returned by OpenSearch.
+            fields (List[str]): Metadata fields to fetch from the metadata index.
+        """
+        document_ids = {hit["_source"].get("documentID") for hit in hits}
+        missing_ids = [
+            doc_id
+            for doc_id in document_ids
+            if doc_id is not None and doc_id not in self._metadata_cache
+        ]
+
+        if missing_ids:
+            response = self.client.mget(
+                index=self.metadata_index,
+                body={"ids": missing_ids},
+                _source_includes=fields,
+            )
+            for record in response["docs"]:
+                # Misses are not cached, so the chunk is reported below
+                if record.get("found"):
+                    self._metadata_cache[record["_id"]] = record.get("_source", {})
+
+        for hit in hits:
+            doc_id = hit["_source"].get("documentID")
+            metadata = self._metadata_cache.get(doc_id)
+            if metadata is None:
+                logger.warning(f"No metadata record found for document {doc_id}")
+                continue
+            self._metadata_cache.move_to_end(doc_id)
+            hit["_source"] = {**metadata, **hit["_source"]}
+
+        # Evict the least recently used records
+        while len(self._metadata_cache) > self.metadata_cache_size:
+            self._metadata_cache.popitem(last=False)
+
+    @staticmethod
+    def _date_range_query(start_date: str, end_date: str) -> Dict[str, Any]:
+        return {
+            "bool": {
+                "must": [
+                    {
+                        "range": {
+                            "articleDate": {
+                                "gte": start_date,
+                                "lte": end_date,
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+
+    def count_embeddings(self, start_date: str, end_date: str) -> int:
+        """
+        Counts the chunks of a date range, so callers can allocate storage up front.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+
+        Returns:
+            int: Number of chunks in the range, or 0 if the count query failed.
+
+        Notes:
+            - Chunks without a vector are included, so the count is an upper bound
+              of the embeddings yielded by `fetch_embeddings`.
+        """
+        try:
+            response = self.client.count(
+                index=self.os_index_name,
+                body={"query": self._date_range_query(start_date, end_date)},
+            )
+        except Exception as e:
+            logger.error(f"OpenSearch count query failed: {str(e)}")
+            return 0
+
+        return int(response["count"])
+
+    def count_embeddings_per_day(
+        self, start_date: str, end_date: str, page_size: int = 10_000
+    ) -> Dict[str, int]:
+        """
+        Counts the chunks of every day of a date range with a `date_histogram`.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+            page_size (int): Buckets per request. Defaults to 10,000.
+
+        Returns:
+            Dict[str, int]: Date in 'YYYY-MM-DD' format to number of chunks; days
+                without chunks are left out.
+
+        Notes:
+            - The histogram is paged through a composite aggregation, so ranges
+              spanning more days than `search.max_buckets` are supported.
+        """
+        counts: Dict[str, int] = {}
+        composite: Dict[str, Any] = {
+            "size": page_size,
+            "sources": [
+                {
+                    "day": {
+                        "date_histogram": {
+                            "field": "articleDate",
+                            "calendar_interval": "day",
+                            "format": "yyyy-MM-dd",
+                        }
+                    }
+                }
+            ],
+        }
+
+        while True:
+            response = self.client.search(
+                index=self.os_index_name,
+                body={
+                    "size": 0,
+                    "query": self._date_range_query(start_date, end_date),
+                    "aggs": {"per_day": {"composite": composite}},
+                },
+            )
+            aggregation = response["aggregations"]["per_day"]
+            for bucket in aggregation["buckets"]:
+                counts[bucket["key"]["day"]] = bucket["doc_count"]
+
+            if "after_key" not in aggregation or not aggregation["buckets"]:
+                break
+            composite["after"] = aggregation["after_key"]
+
+        logger.info(
+            f"{sum(counts.values())} chunks on {len(counts)} days between {start_date} and {end_date}"
+        )
+        return counts
 
     def fetch_embeddings(
         self, start_date: str, end_date: str
@@ -62,22 +236,16 @@ class DataFetcher:
         ]
 
         search_params = {
-            "sort": [{"articleDate": {"order": "desc"}}],
-            "query": {
-                "bool": {
-                    "must": [
-                        {
-                            "range": {
-                                "articleDate": {
-                                    "gte": start_date,
-                                    "lte": end_date,
-                                }
-                            }
-                        }
-                    ]
-                }
-            },
-            "_source": fields_to_include,
+            # Ties on the date are broken, so a window is always yielded in the same order
+            "sort": [
+                {"articleDate": {"order": "desc"}},
+                {"documentID": {"order": "asc"}},
+                {"abstract_chunk_id": {"order": "asc"}},
+            ],
+            "query": self._date_range_query(start_date, end_date),
+            "_source": (
+                CONST_CHUNK_FIELDS if self.metadata_index else fields_to_include
+            ),
         }
 
         try:
@@ -104,6 +272,16 @@ class DataFetcher:
                 try:
                     logger.info(f"Considered {len(hits)} documents for processing")
 
+                    if self.metadata_index:
+                        self._attach_document_metadata(
+                            hits,
+                            [
+                                f
+                                for f in fields_to_include
+                                if f not in CONST_CHUNK_FIELDS
+                            ],
+                        )
+
                     for doc in tqdm(hits, leave=False, desc="Processing batch"):
                         embedding = doc["_source"].get("pubmed_bert_vector")
 
@@ -112,11 +290,15 @@ class DataFetcher:
                             ids_batch.append(
                                 {
                                     "documentID": doc["_source"].get("documentID"),
+                                    "chunkID": doc["_id"],
                                     "articleDate": doc["_source"].get("articleDate"),
                                     "title": doc["_source"].get("title"),
                                     "journal:title": doc["_source"].get(
                                         "journal:title"
                                     ),
+                                    "keywords:name": doc["_source"].get(
+                                        "keywords:name"
+                                    ),
                                     "meshTerms": doc["_source"].get("meshTerms"),
                                     "chemicals": doc["_source"].get("chemicals"),
                                     "authors.name": doc["_source"].get("authors:name"),
@@ -0,0 +1,126 @@
+import logging
+from typing import Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def _simhash_keys(
+    embeddings: np.ndarray,
+    n_bits: int,
+    n_tables: int,
+    seed: int,
+    rows_per_chunk: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the row norms and the random-hyperplane hash of every row per table.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Norms of shape (rows,) and bucket keys of
+            shape (n_tables, rows).
+    """
+    n_rows, dimension = embeddings.shape
+    planes = (
+        np.random.default_rng(seed)
+        .standard_normal((dimension, n_tables * n_bits))
+        .astype(np.float32)
+    )
+    bit_values = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+
+    norms = np.empty(n_rows, dtype=np.float32)
+    keys = np.empty((n_tables, n_rows), dtype=np.int64)
+    for start in range(0, n_rows, rows_per_chunk):
+        chunk = np.asarray(embeddings[start : start + rows_per_chunk], np.float32)
+        end = start + len(chunk)
+        norms[start:end] = np.linalg.norm(chunk, axis=1)
+        bits = (chunk @ planes > 0).reshape(len(chunk), n_tables, n_bits)
+        keys[:, start:end] = (bits.astype(np.int64) @ bit_values).T
+
+    norms[norms == 0] = 1.0
+    return norms, keys
+
+
+def find_near_duplicates(
+    embeddings: np.ndarray,
+    threshold: float = 0.98,
+    n_bits: int = 16,
+    n_tables: int = 4,
+    seed: int = 42,
+    rows_per_chunk: int = 65_536,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Groups rows whose embeddings are near-duplicates by cosine similarity.
+
+    Rows are bucketed by SimHash (signs of random projections) in `n_tables`
+    independent tables; only pairs sharing a bucket are compared exactly, and
+    pairs at or above `threshold` are joined into one group.
+
+    Args:
+        embeddings (np.ndarray): Embedding matrix, may be memory-mapped.
+        threshold (float): Minimum cosine similarity of near-duplicates. Defaults to 0.98.
+        n_bits (int): Hyperplanes per table. More bits give smaller buckets.
+            Defaults to 16.
+        n_tables (int): Hash tables. More tables find more pairs. Defaults to 4.
+        seed (int): Seed of the hyperplanes. Defaults to 42.
+        rows_per_chunk (int): Rows hashed at a time. Defaults to 65,536.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: A tuple containing:
+            - Ascending row index of the representative of every group, the first
+              row of the group.
+            - For every row, the position of its representative in the first array.
+
+    Notes:
+        - Groups are connected components of the near-duplicate pairs, so rows
+          of a chain of near-duplicates share a group even if its ends are further
+          apart than `threshold`.
+        - Pairs that never share a bucket are missed; with the defaults this is
+          rare for similarities above 0.99.
+    """
+    n_rows = len(embeddings)
+    norms, keys = _simhash_keys(embeddings, n_bits, n_tables, seed, rows_per_chunk)
+
+    sources, targets = [], []
+    for table_keys in keys:
+        order = np.argsort(table_keys, kind="stable")
+        starts = np.flatnonzero(np.diff(table_keys[order])) + 1
+        starts = np.concatenate([[0], starts, [n_rows]])
+
+        for begin, end in zip(starts[:-1], starts[1:]):
+            if end - begin < 2:
+                continue
+            rows = np.sort(order[begin:end])
+            vectors = np.asarray(embeddings[rows], np.float32) / norms[rows, None]
+
+            for block in range(0, len(rows), 1024):
+                similarities = vectors[block : block + 1024] @ vectors.T
+                left, right = np.nonzero(similarities >= threshold)
+                left += block
+                upper = right > left
+                sources.append(rows[left[upper]])
+                targets.append(rows[right[upper]])
+
+    pairs_source = np.concatenate(sources) if sources else np.empty(0, np.int64)
+    pairs_target = np.concatenate(targets) if targets else np.empty(0, np.int64)
+    graph = coo_matrix(
+        (np.ones(len(pairs_source), np.int8), (pairs_source, pairs_target)),
+        shape=(n_rows, n_rows),
+    )
+    n_groups, labels = connected_components(graph, directed=False)
+
+    # The representative of a group is its first row
+    representatives = np.full(n_groups, n_rows, dtype=np.int64)
+    np.minimum.at(representatives, labels, np.arange(n_rows))
+    order = np.argsort(representatives)
+    position = np.empty(n_groups, dtype=np.int64)
+    position[order] = np.arange(n_groups)
+
+    logger.info(
+        f"Near-duplicates at similarity {threshold}: {n_rows} rows collapsed "
+        f"into {n_groups} representatives"
+    )
+    return representatives[order], position[labels]
@@ -0,0 +1,118 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_DOC_INFO_SUFFIX = ".doc_info.parquet"
+CONST_EMBEDDING_COLUMN = "Embedding"
+
+
+def doc_info_path(model_path: str) -> str:
+    """
+    Returns the path of the document info sidecar of a saved BERTopic model.
+
+    Args:
+        model_path (str): Path of the model, e.g. `bertopic_model_<start>_<end>.pkl`.
+
+    Returns:
+        str: Path of the Parquet file next to the model.
+    """
+    return f"{os.path.splitext(model_path)[0]}{CONST_DOC_INFO_SUFFIX}"
+
+
+def _to_arrow(values: Union[List[Any], pa.Array]) -> pa.Array:
+    """
+    Converts a column to Arrow, falling back to JSON strings for mixed types.
+
+    Metadata fields such as `meshTerms` come back from OpenSearch as a single
+    value for some documents and as a list for others.
+    """
+    if isinstance(values, pa.Array):
+        return values
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(
+            [None if value is None else json.dumps(value) for value in values],
+            type=pa.string(),
+        )
+
+
+def write_doc_info(
+    path: str,
+    columns: Dict[str, Union[List[Any], pa.Array]],
+    embeddings: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Writes the per-chunk document info of a window as a zstd-compressed Parquet file.
+
+    Args:
+        path (str): Destination path, see `doc_info_path`.
+        columns (Dict[str, List[Any]]): Column name to values, one value per chunk.
+            Arrow arrays are written as they are.
+        embeddings (Optional[np.ndarray]): Embeddings of the chunks, stored as a
+            float32 fixed-size-list column. Defaults to None.
+    """
+    arrays = {name: _to_arrow(values) for name, values in columns.items()}
+
+    if embeddings is not None:
+        flat = pa.array(
+            np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1),
+            type=pa.float32(),
+        )
+        arrays[CONST_EMBEDDING_COLUMN] = pa.FixedSizeListArray.from_arrays(
+            flat, embeddings.shape[1]
+        )
+
+    tmp_path = f"{path}.tmp"
+    pq.write_table(
+        pa.table(arrays), tmp_path, compression="zstd", row_group_size=50_000
+    )
+    os.replace(tmp_path, path)
+    logger.info(
+        f"Document info of {len(next(iter(arrays.values())))} chunks saved to {path}"
+    )
+
+
+def read_doc_info(
+    path: str, columns: Optional[List[str]] = None, memory_map: bool = True
+) -> pd.DataFrame:
+    """
+    Reads selected columns of a document info sidecar.
+
+    Args:
+        path (str): Path of the Parquet file.
+        columns (Optional[List[str]]): Columns to read. Defaults to all columns.
+        memory_map (bool): Whether to memory-map the file. Defaults to True.
+
+    Returns:
+        pd.DataFrame: Document info; use `read_doc_embeddings` for the embeddings
+            as a matrix.
+    """
+    return pq.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+
+def read_doc_embeddings(path: str, memory_map: bool = True) -> np.ndarray:
+    """
+    Reads the embedding column of a document info sidecar as a float32 matrix.
+
+    Args:
+        path (str): Path of the Parquet file.
+        memory_map (bool): Whether to memory-map the file. Defaults to True.
+
+    Returns:
+        np.ndarray: Embeddings of shape (chunks, dimension).
+    """
+    column = pq.read_table(
+        path, columns=[CONST_EMBEDDING_COLUMN], memory_map=memory_map
+    )[CONST_EMBEDDING_COLUMN].combine_chunks()
+    dimension = column.type.list_size
+    return column.flatten().to_numpy().reshape(-1, dimension)
@@ -0,0 +1,200 @@
+import os
+import re
+import logging
+from array import array
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pyarrow as pa
+from scipy.sparse import csr_matrix
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def _preprocess(document: str) -> str:
+    """
+    Cleans a chunk as BERTopic does for English before vectorizing, so the counts
+    match the ones BERTopic computes from the raw text.
+    """
+    document = document.replace("\n", " ").replace("\t", " ")
+    document = re.sub(r"[^A-Za-z0-9 ]+", "", document)
+    # BERTopic counts chunks that are empty after cleaning as this placeholder
+    return document if document != "" else "emptydoc"
+
+
+class StreamingDocumentTerms:
+    """
+    Builds the bag-of-words matrix of a window batch by batch.
+
+    Each batch of chunk texts is counted with the analyzer of a CountVectorizer
+    and appended to a sparse matrix, while the raw text is written to a file and
+    not kept in memory. The vocabulary grows as new terms arrive, so the matrix
+    equals what the CountVectorizer would produce on all chunks at once.
+
+    Notes:
+        - Only the analyzer of the vectorizer is used; vocabulary pruning such as
+          `min_df` or `max_features` is not applied.
+        - The text file is removed by `release`.
+    """
+
+    def __init__(self, vectorizer: CountVectorizer, text_path: str) -> None:
+        """
+        Initializes an empty matrix.
+
+        Args:
+            vectorizer (CountVectorizer): Vectorizer whose analyzer splits chunks into terms.
+            text_path (str): File the raw chunk texts are written to.
+        """
+        self.vectorizer = vectorizer
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary: Dict[str, int] = {}
+        self.text_path = text_path
+
+        self._indices = array("i")
+        self._counts = array("i")
+        self._indptr = array("q", [0])
+        self._text_offsets = array("q", [0])
+        self._text_file = open(text_path, "wb")
+
+    def __len__(self) -> int:
+        return len(self._indptr) - 1
+
+    def add(self, documents: Sequence[str]) -> None:
+        """
+        Counts the terms of a batch of chunks and writes their text to disk.
+
+        Args:
+            documents (Sequence[str]): Raw chunk texts, in row order.
+        """
+        for document in documents:
+            document = document or ""
+            counts: Dict[int, int] = {}
+            for term in self.analyzer(_preprocess(document)):
+                column = self.vocabulary.setdefault(term, len(self.vocabulary))
+                counts[column] = counts.get(column, 0) + 1
+
+            self._indices.extend(counts.keys())
+            self._counts.extend(counts.values())
+            self._indptr.append(len(self._indices))
+
+            encoded = document.encode("utf-8")
+            self._text_file.write(encoded)
+            self._text_offsets.append(self._text_offsets[-1] + len(encoded))
+
+    def matrix(self) -> csr_matrix:
+        """
+        Returns the document-term matrix with columns in alphabetical term order,
+        as CountVectorizer orders them.
+
+        Returns:
+            csr_matrix: Matrix of shape (chunks, terms).
+        """
+        terms = self.feature_names()
+        column_of = np.empty(len(terms), dtype=np.int32)
+        column_of[[self.vocabulary[term] for term in terms]] = np.arange(len(terms))
+
+        matrix = csr_matrix(
+            (
+                np.frombuffer(self._counts, dtype=np.int32),
+                column_of[np.frombuffer(self._indices, dtype=np.int32)],
+                np.frombuffer(self._indptr, dtype=np.int64),
+            ),
+            shape=(len(self), len(terms)),
+        )
+        matrix.sort_indices()
+        return matrix
+
+    def feature_names(self) -> np.ndarray:
+        """Returns the terms of the vocabulary in alphabetical order."""
+        return np.asarray(sorted(self.vocabulary), dtype=object)
+
+    def fitted_vectorizer(self) -> CountVectorizer:
+        """
+        Returns a copy of the vectorizer fixed to the vocabulary of the matrix,
+        which transforms raw text into the same columns.
+        """
+        return clone(self.vectorizer).set_params(vocabulary=list(self.feature_names()))
+
+    def texts(self) -> pa.LargeStringArray:
+        """
+        Returns the chunk texts as an Arrow array backed by the memory-mapped text file.
+        """
+        self._text_file.flush()
+        if not self._text_offsets[-1]:
+            return pa.array([""] * len(self), type=pa.large_string())
+        return pa.LargeStringArray.from_buffers(
+            len(self),
+            pa.py_buffer(np.frombuffer(self._text_offsets, dtype=np.int64)),
+            pa.py_buffer(np.memmap(self.text_path, dtype=np.uint8, mode="r")),
+        )
+
+    def text(self, rows: Sequence[int]) -> List[str]:
+        """
+        Reads the texts of the given rows from disk.
+
+        Args:
+            rows (Sequence[int]): Row numbers.
+
+        Returns:
+            List[str]: The chunk texts.
+        """
+        self._text_file.flush()
+        texts = []
+        with open(self.text_path, "rb") as f:
+            for row in rows:
+                f.seek(self._text_offsets[row])
+                length = self._text_offsets[row + 1] - self._text_offsets[row]
+                texts.append(f.read(length).decode("utf-8"))
+        return texts
+
+    def release(self) -> None:
+        """Closes and removes the text file."""
+        self._text_file.close()
+        if os.path.exists(self.text_path):
+            os.remove(self.text_path)
+
+
+class PrecomputedCountVectorizer:
+    """
+    Vectorizer for BERTopic that reads counts from a precomputed matrix.
+
+    BERTopic is given the row number of each chunk as its document. Topics join
+    their documents with spaces, so a topic document is a list of row numbers,
+    and its counts are the sum of those rows of the matrix.
+    """
+
+    def __init__(self, document_terms: csr_matrix, feature_names: np.ndarray):
+        """
+        Initializes the vectorizer.
+
+        Args:
+            document_terms (csr_matrix): Document-term matrix of the training chunks.
+            feature_names (np.ndarray): Term of every column.
+        """
+        self.document_terms = document_terms
+        self.feature_names = feature_names
+
+    def fit(self, documents: Sequence[str], y=None) -> "PrecomputedCountVectorizer":
+        return self
+
+    def transform(self, documents: Sequence[str]) -> csr_matrix:
+        rows = [np.asarray(document.split(), dtype=np.int64) for document in documents]
+        indptr = np.concatenate([[0], np.cumsum([len(row) for row in rows])])
+        selection = csr_matrix(
+            (
+                np.ones(indptr[-1], dtype=np.int32),
+                np.concatenate(rows) if rows else np.empty(0, np.int64),
+                indptr,
+            ),
+            shape=(len(documents), self.document_terms.shape[0]),
+        )
+        return (selection @ self.document_terms).tocsr()
+
+    def fit_transform(self, documents: Sequence[str], y=None) -> csr_matrix:
+        return self.transform(documents)
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return self.feature_names
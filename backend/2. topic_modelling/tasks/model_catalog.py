@@ -0,0 +1,221 @@
+import os
+import json
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_CATALOG_FILE = "model_catalog.sqlite"
+
+CONST_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS windows (
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    model_path TEXT NOT NULL,
+    doc_info_path TEXT,
+    topic_artifact_path TEXT,
+    documents INTEGER NOT NULL,
+    training_documents INTEGER NOT NULL,
+    topics INTEGER NOT NULL,
+    outliers INTEGER NOT NULL,
+    topic_sizes TEXT NOT NULL,
+    training_seconds REAL,
+    peak_rss_gb REAL,
+    trained_at TEXT NOT NULL,
+    PRIMARY KEY (start_date, end_date)
+)
+"""
+
+
+class ModelCatalog:
+    """
+    SQLite catalog of the trained BERTopic models, one row per date window.
+
+    Each row records the date range, the number of documents, topic statistics,
+    training time, the peak memory added by training and the paths of the model and its artifacts. A
+    row is written in a single transaction once its model is saved, so the
+    catalog only lists complete windows, also with several training processes.
+    """
+
+    def __init__(self, catalog_path: str) -> None:
+        """
+        Opens or creates the catalog.
+
+        Args:
+            catalog_path (str): Path of the SQLite file, e.g. `MODEL_PATH/model_catalog.sqlite`.
+        """
+        self.catalog_path = catalog_path
+        with closing(self._connect()) as connection, connection:
+            connection.execute(CONST_CATALOG_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Parallel windows may write at the same time; wait for the lock
+        connection = sqlite3.connect(self.catalog_path, timeout=60)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def record(
+        self,
+        date_range: Tuple[str, str],
+        model_path: str,
+        documents: int,
+        training_documents: int,
+        topic_sizes: Dict[int, int],
+        training_seconds: Optional[float] = None,
+        peak_rss_gb: Optional[float] = None,
+        doc_info_path: Optional[str] = None,
+        topic_artifact_path: Optional[str] = None,
+    ) -> None:
+        """
+        Records a trained window, replacing an earlier record of the same window.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+            model_path (str): Path of the saved model.
+            documents (int): Chunks of the window.
+            training_documents (int): Chunks the model was trained on, e.g. after
+                removing near-duplicates.
+            topic_sizes (Dict[int, int]): Number of chunks per topic ID, including -1.
+            training_seconds (Optional[float]): Wall time of fetching and training.
+            peak_rss_gb (Optional[float]): Peak increase of the resident memory of
+                the training process while training the window.
+            doc_info_path (Optional[str]): Path of the document info sidecar.
+            topic_artifact_path (Optional[str]): Path of the topic artifact.
+        """
+        start_date, end_date = date_range
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO windows VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    start_date,
+                    end_date,
+                    model_path,
+                    doc_info_path,
+                    topic_artifact_path,
+                    int(documents),
+                    int(training_documents),
+                    len([topic for topic in topic_sizes if topic != -1]),
+                    int(topic_sizes.get(-1, 0)),
+                    json.dumps({str(k): int(v) for k, v in topic_sizes.items()}),
+                    training_seconds,
+                    peak_rss_gb,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+        logger.info(f"Recorded window {start_date} to {end_date} in the model catalog")
+
+    def get(self, date_range: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the record of a window, or None if it is not in the catalog.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT * FROM windows WHERE start_date = ? AND end_date = ?",
+                tuple(date_range),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_trained(self, date_range: Tuple[str, str]) -> bool:
+        """
+        Checks whether a window is in the catalog and its model still exists.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+        """
+        entry = self.get(date_range)
+        return bool(entry) and os.path.exists(entry["model_path"])
+
+    def entries(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the records of all windows overlapping a date range, by start date.
+
+        Args:
+            start_date (Optional[str]): Start date in 'YYYY-MM-DD' format. Defaults to None.
+            end_date (Optional[str]): End date in 'YYYY-MM-DD' format. Defaults to None.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT * FROM windows WHERE end_date >= ? AND start_date <= ? "
+                "ORDER BY start_date",
+                (start_date or "0000-00-00", end_date or "9999-99-99"),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def coverage_gaps(self, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """
+        Returns the days of a date range that no trained window covers.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+
+        Returns:
+            List[Tuple[str, str]]: Uncovered ranges as (start_date, end_date).
+        """
+        gaps = []
+        next_day = date.fromisoformat(start_date)
+        last_day = date.fromisoformat(end_date)
+
+        for entry in self.entries(start_date, end_date):
+            window_start = date.fromisoformat(entry["start_date"])
+            if window_start > next_day:
+                gaps.append(
+                    (
+                        next_day.isoformat(),
+                        min(window_start - timedelta(days=1), last_day).isoformat(),
+                    )
+                )
+            next_day = max(
+                next_day, date.fromisoformat(entry["end_date"]) + timedelta(days=1)
+            )
+
+        if next_day <= last_day:
+            gaps.append((next_day.isoformat(), last_day.isoformat()))
+        return gaps
+
+    def summary(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarises the windows overlapping a date range.
+
+        Args:
+            start_date (Optional[str]): Start date in 'YYYY-MM-DD' format. Defaults
+                to the first window.
+            end_date (Optional[str]): End date in 'YYYY-MM-DD' format. Defaults to
+                the last window.
+
+        Returns:
+            Dict[str, Any]: Number of windows, documents, training documents and
+                topics (without outliers), total training hours, the largest peak
+                memory and the uncovered date ranges.
+        """
+        entries = self.entries(start_date, end_date)
+        summary = {
+            "windows": len(entries),
+            "documents": sum(entry["documents"] for entry in entries),
+            "training_documents": sum(entry["training_documents"] for entry in entries),
+            "topics": sum(entry["topics"] for entry in entries),
+            "training_hours": sum(entry["training_seconds"] or 0 for entry in entries)
+            / 3600,
+            "max_peak_rss_gb": max(
+                (entry["peak_rss_gb"] or 0 for entry in entries), default=0
+            ),
+            "gaps": [],
+        }
+        if entries:
+            summary["gaps"] = self.coverage_gaps(
+                start_date or entries[0]["start_date"],
+                end_date or max(entry["end_date"] for entry in entries),
+            )
+        return summary
@@ -0,0 +1,288 @@
+import os
+import pickle
+import logging
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bertopic import BERTopic
+from bertopic.vectorizers import ClassTfidfTransformer, OnlineCountVectorizer
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+from tqdm import tqdm
+
+from .topic_artifact import write_topic_artifact
+from .topic_modelling import TopicModeller, _PeakMemory
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+class OnlineTopicModeller(TopicModeller):
+    """
+    Trains a single BERTopic model incrementally over the whole corpus.
+
+    Embedding batches of all date windows are streamed through BERTopic's
+    `partial_fit` with IncrementalPCA for reduction, MiniBatchKMeans for
+    clustering and an OnlineCountVectorizer for the topic representations, so
+    memory stays bounded regardless of the corpus size.
+
+    Notes:
+        - `partial_fit` only keeps c-TF-IDF topic embeddings, while stage 3 merges
+          topics by their full-dimension embeddings. The mean embedding of each
+          topic is therefore accumulated alongside and set on the saved model.
+        - MiniBatchKMeans assigns every document to a topic, so the model has no
+          outlier topic.
+        - A checkpoint is written every `checkpoint_batches` training steps, and
+          a rerun over the same date ranges resumes from it after an interruption.
+        - Resuming skips the batches of the current window that were already
+          trained, so it relies on `fetch_embeddings` yielding a window in the same
+          order every time. The OpenSearch fetcher sorts by date, document and
+          chunk and the lake reads its files in order, which holds as long as the
+          window is not re-indexed in between.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_clusters: int = 500,
+        n_components: int = 50,
+        checkpoint_batches: int = 20,
+        decay: float = 0.01,
+        resume: bool = True,
+    ) -> None:
+        """
+        Initialize the OnlineTopicModeller.
+
+        Args:
+            model_path (str): Directory path where models and checkpoints will be saved.
+            n_clusters (int): Number of topics. Defaults to 500.
+            n_components (int): Dimensions kept by IncrementalPCA. Defaults to 50.
+            checkpoint_batches (int): Training steps between checkpoints. Defaults to 20.
+            decay (float): Decay of the word counts of earlier batches per step,
+                which also bounds the vocabulary. Defaults to 0.01.
+            resume (bool): Whether to return the catalogued model if the date
+                range was already trained, and to continue from a checkpoint of
+                the same date ranges. Defaults to True.
+        """
+        super().__init__(model_path, resume=resume)
+        self.n_clusters = n_clusters
+        self.n_components = n_components
+        self.checkpoint_batches = checkpoint_batches
+        self.decay = decay
+        self.checkpoint_path = os.path.join(
+            self.model_location, "online_topic_checkpoint.pkl"
+        )
+
+        # Each step must hold enough documents to initialise both models
+        self.min_batch_size = max(n_clusters, n_components)
+
+    def _new_state(self, date_ranges: List[Tuple[str, str]]) -> Dict[str, Any]:
+        topic_model = BERTopic(
+            embedding_model=None,
+            umap_model=IncrementalPCA(n_components=self.n_components),
+            hdbscan_model=MiniBatchKMeans(
+                n_clusters=self.n_clusters, random_state=42, n_init=3
+            ),
+            vectorizer_model=OnlineCountVectorizer(
+                stop_words="english", decay=self.decay
+            ),
+            ctfidf_model=ClassTfidfTransformer(
+                bm25_weighting=True, reduce_frequent_words=True
+            ),
+            top_n_words=10,
+            language="english",
+            verbose=False,
+            calculate_probabilities=False,
+        )
+        return {
+            # Windows the checkpoint belongs to; other runs must not continue it
+            "date_ranges": [list(date_range) for date_range in date_ranges],
+            "topic_model": topic_model,
+            "topic_sums": None,
+            "topic_counts": None,
+            # Position in the stream: completed windows and batches of the current one
+            "windows_done": [],
+            "batches_done": 0,
+            "steps": 0,
+            "documents": 0,
+            "buffer": ([], []),
+        }
+
+    def _save_checkpoint(self, state: Dict[str, Any]) -> None:
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        logger.info(
+            f"Online checkpoint saved after {state['steps']} steps and {state['documents']} documents"
+        )
+
+    def _load_checkpoint(
+        self, date_ranges: List[Tuple[str, str]]
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the checkpoint of the date ranges if resuming, and discards any other."""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+
+        if self.resume:
+            with open(self.checkpoint_path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("date_ranges") == [
+                list(date_range) for date_range in date_ranges
+            ]:
+                logger.info(
+                    f"Resuming online training after {len(state['windows_done'])} "
+                    f"windows and {state['steps']} steps"
+                )
+                return state
+            logger.warning(
+                "Discarding the online checkpoint, which was made for other date ranges"
+            )
+        else:
+            logger.info("Discarding the online checkpoint, since resuming is disabled")
+
+        os.remove(self.checkpoint_path)
+        return None
+
+    def _train_step(self, state: Dict[str, Any]) -> None:
+        """Runs `partial_fit` on the buffered documents and updates the topic embeddings."""
+        embeddings_parts, documents = state["buffer"]
+        # IncrementalPCA and MiniBatchKMeans keep the dtype of their first step,
+        # so every step is passed in the same precision
+        embeddings = np.vstack(embeddings_parts).astype(np.float64)
+        topic_model = state["topic_model"]
+
+        topic_model.partial_fit(documents, embeddings)
+        topics = np.asarray(topic_model.topics_)
+
+        # Running sums of the full-dimension embeddings per topic ID
+        n_topics = int(topics.max()) + 1
+        if state["topic_sums"] is None:
+            state["topic_sums"] = np.zeros((n_topics, embeddings.shape[1]), np.float64)
+            state["topic_counts"] = np.zeros(n_topics, np.int64)
+        elif n_topics > len(state["topic_counts"]):
+            extra = n_topics - len(state["topic_counts"])
+            state["topic_sums"] = np.vstack(
+                [state["topic_sums"], np.zeros((extra, embeddings.shape[1]))]
+            )
+            state["topic_counts"] = np.concatenate(
+                [state["topic_counts"], np.zeros(extra, np.int64)]
+            )
+        np.add.at(state["topic_sums"], topics, embeddings)
+        np.add.at(state["topic_counts"], topics, 1)
+
+        state["steps"] += 1
+        state["documents"] += len(documents)
+        state["buffer"] = ([], [])
+
+    def _finalize(self, topic_model: BERTopic, state: Dict[str, Any]) -> None:
+        """Sets the mean full-dimension embedding of every topic on the model."""
+        topic_ids = sorted(topic_model.get_topics().keys())
+        counts = np.maximum(state["topic_counts"][topic_ids], 1)
+        topic_model.topic_embeddings_ = (
+            state["topic_sums"][topic_ids] / counts[:, None]
+        ).astype(np.float32)
+
+    def train_online_bertopic_model(
+        self, date_ranges: List[Tuple[str, str]], data_fetcher: Any
+    ) -> Optional[str]:
+        """
+        Trains one BERTopic model over all date windows, one batch at a time.
+
+        Args:
+            date_ranges (List[Tuple[str, str]]): Windows streamed in order.
+            data_fetcher (Any): Instance of a DataFetcher class that yields (embeddings, metadata).
+
+        Returns:
+            Optional[str]: File path of the saved BERTopic model, or None if no
+                documents were found.
+        """
+        full_range = (date_ranges[0][0], date_ranges[-1][1])
+        if self.resume and self.catalog.is_trained(full_range):
+            logger.info(f"Online model of {full_range} is already in the catalog")
+            return self.catalog.get(full_range)["model_path"]
+
+        started = perf_counter()
+        peak_memory = _PeakMemory()
+        state = self._load_checkpoint(date_ranges) or self._new_state(date_ranges)
+
+        for date_range in tqdm(date_ranges, desc="Online training by date range"):
+            if list(date_range) in [list(done) for done in state["windows_done"]]:
+                continue
+
+            start_date, end_date = date_range
+            logger.info(f"Streaming {start_date} to {end_date} into the online model")
+
+            for batch_number, (embeddings_batch, ids_batch) in enumerate(
+                data_fetcher.fetch_embeddings(start_date, end_date)
+            ):
+                # Batches consumed before the checkpoint of an interrupted run
+                if batch_number < state["batches_done"]:
+                    continue
+
+                state["buffer"][0].append(embeddings_batch)
+                state["buffer"][1].extend([doc["abstract_chunk"] for doc in ids_batch])
+                state["batches_done"] = batch_number + 1
+
+                if len(state["buffer"][1]) < self.min_batch_size:
+                    continue
+
+                self._train_step(state)
+                if state["steps"] % self.checkpoint_batches == 0:
+                    self._save_checkpoint(state)
+                    self._log_memory_usage()
+
+            state["windows_done"].append(date_range)
+            state["batches_done"] = 0
+
+        # The first step initialises both models; later steps only need PCA's rows
+        buffered = len(state["buffer"][1])
+        needed = self.n_components if state["steps"] > 0 else self.min_batch_size
+        if buffered >= needed:
+            self._train_step(state)
+        elif buffered and state["steps"] > 0:
+            logger.warning(
+                f"Skipping the last {buffered} documents, "
+                f"fewer than a training step needs"
+            )
+
+        if state["steps"] == 0:
+            peak_memory.stop()
+            if buffered:
+                logger.warning(
+                    f"Only {buffered} documents in {full_range[0]} to {full_range[1]}; "
+                    f"online training needs at least {self.min_batch_size} for "
+                    f"{self.n_clusters} clusters and {self.n_components} components"
+                )
+            else:
+                logger.warning("No embeddings found for online training")
+            return None
+
+        topic_model = state["topic_model"]
+        self._finalize(topic_model, state)
+
+        model_name = f"bertopic_model_{full_range[0]}_{full_range[1]}.pkl"
+        exact_model_path = os.path.join(self.model_location, model_name)
+        topic_model.save(exact_model_path)
+        artifact_path = write_topic_artifact(exact_model_path, topic_model)
+        # Training time covers this run only if it resumed from a checkpoint
+        self.catalog.record(
+            full_range,
+            model_path=exact_model_path,
+            documents=state["documents"],
+            training_documents=state["documents"],
+            topic_sizes=dict(topic_model.topic_sizes_),
+            training_seconds=perf_counter() - started,
+            peak_rss_gb=peak_memory.stop(),
+            topic_artifact_path=artifact_path,
+        )
+        self._write_model_path(exact_model_path)
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        logger.info(
+            f"Online model with {len(topic_model.get_topics())} topics over "
+            f"{state['documents']} documents saved to {exact_model_path}"
+        )
+        return exact_model_path
@@ -0,0 +1,253 @@
+import os
+import fcntl
+import sqlite3
+import logging
+from contextlib import closing
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_REDUCTION_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reductions (
+    chunk_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matrix (
+    columns INTEGER NOT NULL
+);
+"""
+
+
+@lru_cache(maxsize=2)
+def load_shared_reducer(reducer_path: str) -> Any:
+    """
+    Loads a pre-fitted corpus-wide reducer, such as `umap_50_components.joblib`.
+
+    Args:
+        reducer_path (str): Path of the joblib file.
+
+    Returns:
+        Any: Fitted reducer with a `transform` method.
+    """
+    logger.info(f"Loading shared reducer from {reducer_path}")
+    return joblib.load(reducer_path)
+
+
+def check_reducer_input(reducer: Any, embeddings: np.ndarray) -> None:
+    """
+    Checks that embeddings have the dimension the shared reducer was fitted on.
+
+    Args:
+        reducer (Any): Fitted reducer, e.g. a UMAP model.
+        embeddings (np.ndarray): Embeddings to transform.
+
+    Raises:
+        ValueError: If the dimensions differ, e.g. because the chunk index stores
+            vectors projected with `CLUSTER_CHAT_VECTOR_PROJECTION`.
+    """
+    expected = getattr(reducer, "n_features_in_", None)
+    if expected is None and getattr(reducer, "_raw_data", None) is not None:
+        expected = reducer._raw_data.shape[1]
+
+    if expected is not None and embeddings.shape[1] != expected:
+        raise ValueError(
+            f"The shared reducer expects {expected}-dimensional embeddings, but the "
+            f"chunk index stores {embeddings.shape[1]}-dimensional ones. If the index "
+            "stores projected vectors, refit the reducer on them with "
+            "supporting_scripts/main_dimensionality_reduction_model.py."
+        )
+
+
+class ReductionCache:
+    """
+    Disk cache of reduced embeddings keyed by chunk ID, shared by all windows.
+
+    Layout of the cache directory:
+        - `<reducer version>/reduced.f32`: append-only float32 matrix of the
+          reductions, read as `np.memmap`.
+        - `<reducer version>/index.sqlite`: row of every cached chunk ID in
+          that matrix, and its number of columns.
+
+    Notes:
+        - The reducer version is derived from the size and modification time of
+          the reducer file, so refitting the reducer starts a new cache.
+        - Only chunks missing from the cache are transformed, whichever window
+          they were first reduced in, and their rows are appended.
+        - Appends hold a lock on the matrix file, so windows trained in parallel
+          processes can share the cache. A chunk reduced by two processes at once
+          keeps the first row recorded.
+    """
+
+    def __init__(self, cache_dir: str, reducer_path: str) -> None:
+        """
+        Initializes the cache for one reducer.
+
+        Args:
+            cache_dir (str): Directory holding the cached reductions.
+            reducer_path (str): Path of the shared reducer.
+        """
+        self.reducer_path = reducer_path
+        stat = os.stat(reducer_path)
+        self.reducer_version = (
+            f"{os.path.splitext(os.path.basename(reducer_path))[0]}"
+            f"-{stat.st_size}-{int(stat.st_mtime)}"
+        )
+        self.cache_dir = os.path.join(cache_dir, self.reducer_version)
+        self.matrix_path = os.path.join(self.cache_dir, "reduced.f32")
+        self.index_path = os.path.join(self.cache_dir, "index.sqlite")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with closing(self._connect()) as connection:
+            connection.executescript(CONST_REDUCTION_INDEX_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Parallel windows may write at the same time; wait for the lock
+        return sqlite3.connect(self.index_path, timeout=60)
+
+    def _lookup(self, ids: List[str]) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Returns the cached row of every chunk ID, -1 if uncached, and the number
+        of columns of the matrix, None while it is empty.
+        """
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TEMP TABLE request (position INTEGER PRIMARY KEY, chunk_id TEXT)"
+            )
+            connection.executemany(
+                "INSERT INTO request VALUES (?, ?)", enumerate(map(str, ids))
+            )
+            found = connection.execute(
+                "SELECT request.position, reductions.row FROM request "
+                "JOIN reductions USING (chunk_id)"
+            ).fetchall()
+            columns = connection.execute("SELECT columns FROM matrix").fetchone()
+
+        if found:
+            positions, cached_rows = np.asarray(found, dtype=np.int64).T
+            rows[positions] = cached_rows
+        return rows, columns[0] if columns else None
+
+    def _append(self, ids: List[str], reduced: np.ndarray) -> None:
+        """Appends reductions to the matrix and records their rows."""
+        row_bytes = reduced.shape[1] * np.dtype(np.float32).itemsize
+        with open(self.matrix_path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Rows are only recorded once written, so a crash in between
+                # leaves unused rows and no wrong ones
+                first_row = f.seek(0, os.SEEK_END) // row_bytes
+                f.write(np.ascontiguousarray(reduced, dtype=np.float32).tobytes())
+                f.flush()
+                with closing(self._connect()) as connection, connection:
+                    if connection.execute("SELECT 1 FROM matrix").fetchone() is None:
+                        connection.execute(
+                            "INSERT INTO matrix VALUES (?)", (reduced.shape[1],)
+                        )
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO reductions VALUES (?, ?)",
+                        zip(map(str, ids), range(first_row, first_row + len(ids))),
+                    )
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reduce(self, ids: List[str], embeddings: np.ndarray) -> np.ndarray:
+        """
+        Returns the reduced embeddings of chunks, transforming only uncached ones.
+
+        Args:
+            ids (List[str]): Chunk ID of every embedding row.
+            embeddings (np.ndarray): Full-dimension embeddings.
+
+        Returns:
+            np.ndarray: float32 reduced embeddings in the order of `ids`.
+        """
+        rows, columns = self._lookup(ids)
+        missing = np.flatnonzero(rows < 0)
+        logger.info(
+            f"Reductions: {len(ids) - len(missing)} cached, {len(missing)} to transform"
+        )
+
+        new_reduced = None
+        if len(missing):
+            reducer = load_shared_reducer(self.reducer_path)
+            check_reducer_input(reducer, embeddings)
+            new_reduced = np.asarray(
+                reducer.transform(embeddings[missing]), dtype=np.float32
+            )
+            self._append([ids[row] for row in missing], new_reduced)
+            columns = new_reduced.shape[1]
+
+        reduced = np.empty((len(ids), columns), dtype=np.float32)
+        hits = np.flatnonzero(rows >= 0)
+        if len(hits):
+            # Mapped up to the last row needed, as other processes may be appending
+            matrix = np.memmap(
+                self.matrix_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(int(rows.max()) + 1, columns),
+            )
+            reduced[hits] = matrix[rows[hits]]
+            del matrix
+        if new_reduced is not None:
+            reduced[missing] = new_reduced
+        return reduced
+
+
+class PrecomputedReduction:
+    """
+    Dimensionality reduction step for BERTopic that returns precomputed reductions.
+
+    BERTopic fits and applies its `umap_model` to the training embeddings. This
+    step skips the fit and returns the reductions computed beforehand with the
+    shared reducer, so the full-dimension embeddings are still used for the
+    topic embeddings. Other inputs are reduced with the shared reducer.
+
+    The step is only used for training; models are saved with the shared reducer
+    itself, so loading them does not need this module and `transform` reduces new
+    documents the same way.
+    """
+
+    def __init__(self, reduced: np.ndarray, embeddings: np.ndarray, reducer_path: str):
+        """
+        Initializes the step.
+
+        Args:
+            reduced (np.ndarray): Reductions of the training embeddings.
+            embeddings (np.ndarray): Training embeddings the reductions belong to.
+            reducer_path (str): Path of the shared reducer.
+        """
+        self.reduced = reduced
+        self.reducer_path = reducer_path
+        self._fingerprint = self._fingerprint_of(embeddings)
+
+    @staticmethod
+    def _fingerprint_of(embeddings: np.ndarray) -> Optional[Tuple[Any, ...]]:
+        if len(embeddings) == 0:
+            return None
+        return (
+            embeddings.shape,
+            np.asarray(embeddings[0]).tobytes(),
+            np.asarray(embeddings[-1]).tobytes(),
+        )
+
+    def fit(self, X: np.ndarray, y: Any = None) -> "PrecomputedReduction":
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        if self.reduced is not None and self._fingerprint == self._fingerprint_of(X):
+            return self.reduced
+        return load_shared_reducer(self.reducer_path).transform(X)
+
+    def __getstate__(self) -> dict:
+        # The reductions are only needed during training
+        state = self.__dict__.copy()
+        state["reduced"] = None
+        state["_fingerprint"] = None
+        return state
@@ -0,0 +1,339 @@
+import os
+import json
+import logging
+import multiprocessing
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bertopic import BERTopic
+from scipy.sparse import csc_matrix, load_npz, save_npz
+from sklearn.base import clone
+from umap import UMAP
+
+from .document_terms import PrecomputedCountVectorizer, StreamingDocumentTerms
+from .reduction import PrecomputedReduction
+from .window_scheduler import _init_worker
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_SWEEP_MANIFEST = "sweep.json"
+
+
+def _umass_coherence(
+    presence: csc_matrix, feature_index: Dict[str, int], topic_words: List[List[str]]
+) -> float:
+    """
+    Mean UMass coherence of the topics over the chunks of the window.
+
+    Args:
+        presence (csc_matrix): Binary document-term matrix.
+        feature_index (Dict[str, int]): Column of every term.
+        topic_words (List[List[str]]): Top words of every topic, by rank.
+
+    Returns:
+        float: Mean coherence; closer to 0 is more coherent. NaN without topics.
+    """
+    scores = []
+    for words in topic_words:
+        columns = [feature_index[word] for word in words if word in feature_index]
+        if len(columns) < 2:
+            continue
+        selected = presence[:, columns]
+        counts = np.asarray(selected.sum(axis=0)).ravel()
+        co_counts = (selected.T @ selected).toarray()
+        scores.append(
+            np.mean(
+                [
+                    np.log((co_counts[i, j] + 1) / counts[j])
+                    for i in range(1, len(columns))
+                    for j in range(i)
+                    if counts[j]
+                ]
+            )
+        )
+    return float(np.mean(scores)) if scores else float("nan")
+
+
+def _run_configuration(
+    sweep_dir: str,
+    configuration: Dict[str, Any],
+    hdbscan_model: Any,
+    ctfidf_model: Any,
+    representation_model: Any,
+) -> Dict[str, Any]:
+    """
+    Clusters the cached reduction of a window with one configuration.
+
+    Args:
+        sweep_dir (str): Directory prepared by `ClusteringSweep.prepare`.
+        configuration (Dict[str, Any]): `nr_topics` and HDBSCAN parameters.
+        hdbscan_model (Any): HDBSCAN model the parameters are applied to.
+        ctfidf_model (Any): c-TF-IDF model of the trainer.
+        representation_model (Any): Representation model of the trainer.
+
+    Returns:
+        Dict[str, Any]: The configuration with its topic count, outlier rate,
+            UMass coherence, topic diversity and runtime in seconds.
+    """
+    started = perf_counter()
+    with open(os.path.join(sweep_dir, CONST_SWEEP_MANIFEST)) as f:
+        manifest = json.load(f)
+
+    embeddings = np.memmap(
+        os.path.join(sweep_dir, "embeddings.f32"),
+        dtype=np.float32,
+        mode="r",
+        shape=(manifest["rows"], manifest["dimension"]),
+    )
+    reduced = np.load(os.path.join(sweep_dir, "reduced.npy"), mmap_mode="r")
+    document_terms = load_npz(os.path.join(sweep_dir, "document_terms.npz")).tocsr()
+    feature_names = np.load(os.path.join(sweep_dir, "terms.npy")).astype(object)
+
+    hdbscan_params = {
+        key: value for key, value in configuration.items() if key != "nr_topics"
+    }
+    topic_model = BERTopic(
+        embedding_model=None,
+        umap_model=PrecomputedReduction(reduced, embeddings, None),
+        hdbscan_model=clone(hdbscan_model).set_params(**hdbscan_params),
+        vectorizer_model=PrecomputedCountVectorizer(document_terms, feature_names),
+        ctfidf_model=ctfidf_model,
+        representation_model=representation_model,
+        top_n_words=10,
+        language="english",
+        verbose=False,
+        calculate_probabilities=False,
+        nr_topics=configuration.get("nr_topics"),
+        low_memory=True,
+    )
+    topics, _ = topic_model.fit_transform(
+        [str(row) for row in range(manifest["rows"])], embeddings
+    )
+    topics = np.asarray(topics)
+
+    topic_words = [
+        [word for word, _ in words if word]
+        for topic, words in topic_model.get_topics().items()
+        if topic != -1
+    ]
+    all_words = [word for words in topic_words for word in words]
+
+    return {
+        **configuration,
+        "topics": len(topic_words),
+        "outlier_rate": float(np.mean(topics == -1)),
+        "umass_coherence": _umass_coherence(
+            (document_terms > 0).astype(np.int32).tocsc(),
+            {term: column for column, term in enumerate(feature_names)},
+            topic_words,
+        ),
+        "topic_diversity": (
+            len(set(all_words)) / len(all_words) if all_words else float("nan")
+        ),
+        "seconds": perf_counter() - started,
+    }
+
+
+class ClusteringSweep:
+    """
+    Compares clustering configurations on one window without repeating its reduction.
+
+    The window is fetched and reduced once with the reduction of the trainer (the
+    shared reducer, or a per-window UMAP fit) and cached under
+    `model_path/sweeps/<start>_<end>`. Each configuration then only runs HDBSCAN,
+    topic extraction and topic reduction against the cache, in parallel processes.
+
+    Notes:
+        - The cache is reused by later sweeps of the same window as long as the
+          reduction of the trainer is unchanged.
+        - Near-duplicate removal of the trainer is not applied.
+    """
+
+    def __init__(
+        self,
+        topic_modeller: Any,
+        n_workers: int = 1,
+        log_file: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the sweep.
+
+        Args:
+            topic_modeller (Any): TopicModeller whose reduction and models are used.
+            n_workers (int): Configurations clustered at the same time. Defaults to 1.
+            log_file (Optional[str]): Log file of the workers. Defaults to None.
+        """
+        self.topic_modeller = topic_modeller
+        self.n_workers = n_workers
+        self.log_file = log_file
+
+    def _reduction_key(self) -> str:
+        """Describes the reduction, so a cache made with another one is not reused."""
+        if self.topic_modeller.reduction_cache is not None:
+            return self.topic_modeller.reduction_cache.reducer_version
+        return json.dumps(self.topic_modeller.umap_params, sort_keys=True)
+
+    def prepare(self, date_range: Tuple[str, str], data_fetcher: Any) -> str:
+        """
+        Fetches and reduces a window once and caches the results.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+            data_fetcher (Any): Instance of a DataFetcher class that yields (embeddings, metadata).
+
+        Returns:
+            str: The sweep directory of the window.
+
+        Raises:
+            ValueError: If the window has no embeddings.
+        """
+        start_date, end_date = date_range
+        sweep_dir = os.path.join(
+            self.topic_modeller.model_location, "sweeps", f"{start_date}_{end_date}"
+        )
+        manifest_path = os.path.join(sweep_dir, CONST_SWEEP_MANIFEST)
+        os.makedirs(sweep_dir, exist_ok=True)
+
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("reduction") == self._reduction_key():
+                logger.info(f"Reusing the cached reduction in {sweep_dir}")
+                return sweep_dir
+
+        embeddings_path = os.path.join(sweep_dir, "embeddings.f32")
+        if manifest is None:
+            manifest = self._fetch(date_range, data_fetcher, sweep_dir)
+
+        embeddings = np.memmap(
+            embeddings_path,
+            dtype=np.float32,
+            mode="r",
+            shape=(manifest["rows"], manifest["dimension"]),
+        )
+
+        started = perf_counter()
+        if self.topic_modeller.reduction_cache is not None:
+            chunk_ids = np.load(os.path.join(sweep_dir, "chunk_ids.npy")).tolist()
+            reduced = self.topic_modeller.reduction_cache.reduce(chunk_ids, embeddings)
+        elif self.topic_modeller.knn_cache is not None:
+            reduced = self.topic_modeller.knn_cache.umap(
+                embeddings, **self.topic_modeller.umap_params
+            ).fit_transform(embeddings)
+        else:
+            reduced = UMAP(**self.topic_modeller.umap_params).fit_transform(embeddings)
+
+        with open(os.path.join(sweep_dir, "reduced.npy"), "wb") as f:
+            np.save(f, np.asarray(reduced, dtype=np.float32))
+        logger.info(
+            f"Reduced {manifest['rows']} embeddings in {perf_counter() - started:.1f}s"
+        )
+
+        manifest["reduction"] = self._reduction_key()
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+        return sweep_dir
+
+    def _fetch(
+        self, date_range: Tuple[str, str], data_fetcher: Any, sweep_dir: str
+    ) -> Dict[str, Any]:
+        """Writes the embeddings and the document-term matrix of a window to disk."""
+        start_date, end_date = date_range
+        document_terms = StreamingDocumentTerms(
+            self.topic_modeller.vectorizer_model,
+            os.path.join(sweep_dir, "documents.txt"),
+        )
+        chunk_ids, rows, dimension = [], 0, None
+
+        try:
+            with open(os.path.join(sweep_dir, "embeddings.f32"), "wb") as f:
+                for embeddings_batch, ids_batch in data_fetcher.fetch_embeddings(
+                    start_date, end_date
+                ):
+                    embeddings_batch = np.ascontiguousarray(
+                        embeddings_batch, dtype=np.float32
+                    )
+                    f.write(embeddings_batch.tobytes())
+                    rows += len(embeddings_batch)
+                    dimension = int(embeddings_batch.shape[1])
+                    chunk_ids.extend([doc["chunkID"] for doc in ids_batch])
+                    document_terms.add([doc["abstract_chunk"] for doc in ids_batch])
+
+            if not rows:
+                raise ValueError(f"No embeddings found for {start_date} to {end_date}")
+
+            save_npz(
+                os.path.join(sweep_dir, "document_terms.npz"), document_terms.matrix()
+            )
+            np.save(
+                os.path.join(sweep_dir, "terms.npy"),
+                document_terms.feature_names().astype(str),
+            )
+            np.save(
+                os.path.join(sweep_dir, "chunk_ids.npy"),
+                np.asarray(chunk_ids, dtype=str),
+            )
+        finally:
+            document_terms.release()
+
+        logger.info(f"Cached {rows} chunks of {start_date} to {end_date} for sweeping")
+        return {"date_range": list(date_range), "rows": rows, "dimension": dimension}
+
+    def run(
+        self,
+        date_range: Tuple[str, str],
+        data_fetcher: Any,
+        configurations: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Clusters a window with every configuration and reports the results.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+            data_fetcher (Any): Instance of a DataFetcher class that yields (embeddings, metadata).
+            configurations (List[Dict[str, Any]]): Grid of configurations, each with
+                `nr_topics` and HDBSCAN parameters such as `min_cluster_size`.
+
+        Returns:
+            List[Dict[str, Any]]: Results in the order of `configurations`, also
+                written to `results.json` in the sweep directory.
+        """
+        sweep_dir = self.prepare(date_range, data_fetcher)
+        arguments = [
+            (
+                sweep_dir,
+                configuration,
+                self.topic_modeller.hdbscan_model,
+                self.topic_modeller.ctfidf_model,
+                self.topic_modeller.representation_model,
+            )
+            for configuration in configurations
+        ]
+
+        if self.n_workers > 1:
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(
+                processes=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.log_file,),
+            ) as pool:
+                results = pool.starmap(_run_configuration, arguments)
+        else:
+            results = [_run_configuration(*args) for args in arguments]
+
+        for configuration, result in zip(configurations, results):
+            logger.info(
+                f"Sweep {date_range} {json.dumps(configuration)}: "
+                f"{result['topics']} topics, {result['outlier_rate']:.1%} outliers, "
+                f"UMass {result['umass_coherence']:.3f}, diversity "
+                f"{result['topic_diversity']:.2f}, {result['seconds']:.1f}s"
+            )
+
+        with open(os.path.join(sweep_dir, "results.json"), "w") as f:
+            json.dump(results, f, indent=2)
+        return results
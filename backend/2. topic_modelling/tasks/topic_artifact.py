@@ -0,0 +1,76 @@
+import os
+import logging
+from typing import Any
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_TOPIC_ARTIFACT_SUFFIX = ".topics.npz"
+
+
+def topic_artifact_path(model_path: str) -> str:
+    """
+    Returns the path of the topic artifact of a saved BERTopic model.
+
+    Args:
+        model_path (str): Path of the model, e.g. `bertopic_model_<start>_<end>.pkl`.
+
+    Returns:
+        str: Path of the `.topics.npz` file next to the model.
+    """
+    return f"{os.path.splitext(model_path)[0]}{CONST_TOPIC_ARTIFACT_SUFFIX}"
+
+
+def write_topic_artifact(model_path: str, topic_model: Any) -> str:
+    """
+    Writes the topics of a trained BERTopic model as a compact artifact.
+
+    The artifact holds what stage 3 reads from a model, so the model itself does
+    not need to be unpickled there:
+        - `topic_ids`: topic IDs in the order of `get_topics()`, including -1.
+        - `words`, `scores`: c-TF-IDF words and their scores per topic, padded
+          to the longest topic; `lengths` holds the number of words per topic.
+        - `embeddings`: float32 topic embedding matrix, one row per topic ID.
+        - `sizes`: number of documents per topic.
+
+    Args:
+        model_path (str): Path the model was saved to.
+        topic_model (Any): The trained BERTopic model.
+
+    Returns:
+        str: Path of the artifact.
+    """
+    topics = topic_model.get_topics()
+    topic_ids = list(topics.keys())
+    top_n = max((len(words) for words in topics.values()), default=0)
+
+    words = np.full((len(topic_ids), top_n), "", dtype=object)
+    scores = np.zeros((len(topic_ids), top_n), dtype=np.float32)
+    lengths = np.asarray([len(topics[topic_id]) for topic_id in topic_ids], np.int64)
+    for row, topic_id in enumerate(topic_ids):
+        for column, (word, score) in enumerate(topics[topic_id]):
+            words[row, column] = word
+            scores[row, column] = score
+
+    path = topic_artifact_path(model_path)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        topic_ids=np.asarray(topic_ids, dtype=np.int64),
+        # Fixed-width strings, so the artifact loads without pickle
+        words=words.astype(str),
+        scores=scores,
+        lengths=lengths,
+        embeddings=np.asarray(
+            topic_model.topic_embeddings_[: len(topic_ids)], dtype=np.float32
+        ),
+        sizes=np.asarray(
+            [topic_model.topic_sizes_.get(topic_id, 0) for topic_id in topic_ids],
+            dtype=np.int64,
+        ),
+    )
+    os.replace(tmp_path, path)
+    logger.info(f"Topic artifact with {len(topic_ids)} topics saved to {path}")
+    return path
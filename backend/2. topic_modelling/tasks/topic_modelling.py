@@ -2,11 +2,13 @@ import os
 import gc
 import psutil
 import logging
-from time import sleep
+import threading
+from collections import Counter
+from time import perf_counter, sleep
 from typing import Optional, Tuple, Any
 
 import numpy as np
-import pandas as pd
+from scipy.sparse import csr_matrix
 from tqdm import tqdm
 from umap import UMAP
 from hdbscan import HDBSCAN
@@ -15,10 +17,48 @@ from sklearn.feature_extraction.text import CountVectorizer
 from bertopic.vectorizers import ClassTfidfTransformer
 from bertopic.representation import MaximalMarginalRelevance
 
+from .deduplication import find_near_duplicates
+from .doc_info import doc_info_path, write_doc_info
+from .document_terms import PrecomputedCountVectorizer, StreamingDocumentTerms
+from .knn_cache import KnnGraphCache
+from .model_catalog import CONST_CATALOG_FILE, ModelCatalog
+from .reduction import PrecomputedReduction, ReductionCache, load_shared_reducer
+from .topic_artifact import write_topic_artifact
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
 
+class _PeakMemory:
+    """
+    Samples the resident memory of the process in a background thread and keeps
+    the largest increase over the memory at start.
+
+    Windows trained one after another in the same process each get their own
+    peak, unlike `ru_maxrss`, which only grows over the lifetime of the process.
+    """
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self._process = psutil.Process(os.getpid())
+        self._baseline = self._peak = self._process.memory_info().rss
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self._peak = max(self._peak, self._process.memory_info().rss)
+
+    def stop(self) -> float:
+        """Stops sampling and returns the peak increase in GB."""
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._thread.join()
+            self._peak = max(self._peak, self._process.memory_info().rss)
+        return (self._peak - self._baseline) / 1024**3
+
+
 class TopicModeller:
     """
     A class to train BERTopic models on embedding batches retrieved via a DataFetcher.
@@ -26,22 +66,77 @@ class TopicModeller:
     The model uses UMAP for dimensionality reduction and HDBSCAN for clustering.
     """
 
-    def __init__(self, model_path: str) -> None:
+    def __init__(
+        self,
+        model_path: str,
+        memmap_threshold_gb: Optional[float] = None,
+        shared_reducer_path: Optional[str] = None,
+        knn_cache_dir: Optional[str] = None,
+        dedup_threshold: Optional[float] = None,
+        resume: bool = True,
+    ) -> None:
         """
         Initialize the TopicModeller.
 
         Args:
             model_path (str): Directory path where models and logs will be saved.
+            memmap_threshold_gb (Optional[float]): Size above which the embedding
+                matrix of a date range is kept in a memory-mapped file under
+                `model_path` instead of in RAM. Defaults to None, i.e. always in RAM.
+            shared_reducer_path (Optional[str]): Pre-fitted corpus-wide 50D reducer,
+                e.g. `umap_50_components.joblib`. If given, windows are reduced with
+                it instead of fitting a UMAP model per window, and the reductions
+                are cached under `model_path/reductions`. Defaults to None.
+            knn_cache_dir (Optional[str]): Directory of cached kNN graphs. If given,
+                the per-window UMAP fit reuses the graph of an earlier fit on the
+                same embeddings. Defaults to None.
+            dedup_threshold (Optional[float]): Cosine similarity at or above which
+                chunks are collapsed into one representative for training; the
+                duplicates get the topic of their representative and their terms
+                count towards its topic words. HDBSCAN has no sample weights, so
+                clustering sees every group once. Defaults to None, i.e. every
+                chunk is trained on.
+            resume (bool): Whether to skip windows whose model is recorded in the
+                catalog `model_path/model_catalog.sqlite`. Defaults to True.
         """
         self.model_location = model_path
+        self.memmap_threshold_gb = memmap_threshold_gb
+        self.memmap_threshold_bytes = (
+            int(memmap_threshold_gb * 1024**3)
+            if memmap_threshold_gb is not None
+            else None
+        )
         os.makedirs(self.model_location, exist_ok=True)
         self.model_paths_file = os.path.join(self.model_location, "model_paths.txt")
 
-        # Dimensionality reduction with UMAP to 50 dimensions
-        self.umap_model = UMAP(
-            n_components=50, min_dist=0.0, metric="cosine", random_state=42
+        # Trained windows are recorded in the catalog and skipped when resuming
+        self.catalog = ModelCatalog(
+            os.path.join(self.model_location, CONST_CATALOG_FILE)
+        )
+        self.resume = resume
+
+        self.shared_reducer_path = shared_reducer_path
+        self.reduction_cache = (
+            ReductionCache(
+                os.path.join(self.model_location, "reductions"), shared_reducer_path
+            )
+            if shared_reducer_path
+            else None
         )
 
+        self.knn_cache_dir = knn_cache_dir
+        self.dedup_threshold = dedup_threshold
+        self.knn_cache = KnnGraphCache(knn_cache_dir) if knn_cache_dir else None
+
+        # Dimensionality reduction with UMAP to 50 dimensions
+        self.umap_params = {
+            "n_components": 50,
+            "min_dist": 0.0,
+            "metric": "cosine",
+            "random_state": 42,
+        }
+        self.umap_model = UMAP(**self.umap_params)
+
         # Clustering with HDBSCAN
         self.hdbscan_model = HDBSCAN(
             min_cluster_size=15, metric="euclidean", cluster_selection_method="eom"
@@ -72,35 +167,132 @@ class TopicModeller:
         with open(self.model_paths_file, "a") as f:
             f.write(path + "\n")
 
+    def _allocate_embeddings(
+        self, n_rows: int, dimension: int, memmap_path: str
+    ) -> np.ndarray:
+        """
+        Allocates an uninitialised float32 embedding matrix.
+
+        Args:
+            n_rows (int): Number of rows.
+            dimension (int): Embedding dimension.
+            memmap_path (str): File backing the matrix if it exceeds the memmap threshold.
+
+        Returns:
+            np.ndarray: In-memory array or `np.memmap` of shape (n_rows, dimension).
+        """
+        size_bytes = n_rows * dimension * np.dtype(np.float32).itemsize
+
+        if (
+            self.memmap_threshold_bytes is not None
+            and size_bytes > self.memmap_threshold_bytes
+        ):
+            logger.info(
+                f"Embedding matrix of {size_bytes / 1024**3:.2f} GB spilled to {memmap_path}"
+            )
+            return np.memmap(
+                memmap_path, dtype=np.float32, mode="w+", shape=(n_rows, dimension)
+            )
+
+        return np.empty((n_rows, dimension), dtype=np.float32)
+
+    @staticmethod
+    def _release_embeddings(embeddings: Optional[np.ndarray]) -> None:
+        """Removes the backing file of a memory-mapped embedding matrix."""
+        if isinstance(embeddings, np.memmap) and os.path.exists(embeddings.filename):
+            # The mapping itself stays valid until the last view is dropped
+            os.remove(embeddings.filename)
+
+    def _grow_embeddings(
+        self, embeddings: np.ndarray, n_rows: int, filled: int, memmap_path: str
+    ) -> np.ndarray:
+        """
+        Reallocates the embedding matrix with more rows, keeping the filled rows.
+
+        Only needed if documents were added to the index after they were counted.
+        """
+        logger.warning(
+            f"More embeddings than counted, growing matrix from {len(embeddings)} to {n_rows} rows"
+        )
+        grown = self._allocate_embeddings(
+            n_rows, embeddings.shape[1], f"{memmap_path}.{n_rows}"
+        )
+        grown[:filled] = embeddings[:filled]
+        self._release_embeddings(embeddings)
+        return grown
+
     def train_bertopic_model(
-        self, date_range: Tuple[str, str], data_fetcher: Any
-    ) -> None:
+        self, date_range: Tuple[str, str], data_fetcher: Any, record_path: bool = True
+    ) -> Optional[str]:
         """
         Trains a BERTopic model on the embeddings for the specified date range.
 
         Args:
             date_range (Tuple[str, str]): Tuple of start and end dates (YYYY-MM-DD).
             data_fetcher (Any): Instance of a DataFetcher class that yields (embeddings, metadata).
+            record_path (bool): Whether to append the saved model path to
+                `model_paths.txt`. Defaults to True.
 
         Returns:
-            Optional[str]: File path of the saved BERTopic model, or None if training failed.
+            Optional[str]: File path of the saved BERTopic model, or None if training
+                failed. If the window is skipped, the path recorded in the catalog.
         """
         start_date, end_date = date_range
+        if self.resume and self.catalog.is_trained(date_range):
+            logger.info(f"Skipping {start_date} to {end_date}, already in the catalog")
+            return self.catalog.get(date_range)["model_path"]
+
+        started = perf_counter()
+        peak_memory = _PeakMemory()
+        memmap_path = os.path.join(
+            self.model_location, f"embeddings_{start_date}_{end_date}.f32"
+        )
+        text_path = os.path.join(
+            self.model_location, f"documents_{start_date}_{end_date}.txt"
+        )
 
         # Storage for data
-        embeddings_list, documents_list, document_ids_list = [], [], []
+        embeddings: Optional[np.ndarray] = None
+        representatives: Optional[np.ndarray] = None
+        filled = 0
+        document_terms: Optional[StreamingDocumentTerms] = None
+        document_ids_list, chunk_ids = [], []
         document_date, document_title, document_journal = [], [], []
         document_mesh, document_chemicals, document_authors = [], [], []
         document_affiliations = []
+        topic_model = doc_info = None
 
         try:
             logger.info(f"Fetching data from {start_date} to {end_date}")
+            expected_rows = data_fetcher.count_embeddings(start_date, end_date)
+
+            # Chunk texts are counted as they arrive and kept on disk, not in memory
+            document_terms = StreamingDocumentTerms(self.vectorizer_model, text_path)
+
             for embeddings_batch, ids_batch in data_fetcher.fetch_embeddings(
                 start_date, end_date
             ):
-                embeddings_list.extend(embeddings_batch)
-                documents_list.extend([doc["abstract_chunk"] for doc in ids_batch])
+                batch_rows = len(embeddings_batch)
+                if embeddings is None:
+                    embeddings = self._allocate_embeddings(
+                        max(expected_rows, batch_rows),
+                        embeddings_batch.shape[1],
+                        memmap_path,
+                    )
+                elif filled + batch_rows > len(embeddings):
+                    embeddings = self._grow_embeddings(
+                        embeddings,
+                        max(filled + batch_rows, int(len(embeddings) * 1.25)),
+                        filled,
+                        memmap_path,
+                    )
+
+                embeddings[filled : filled + batch_rows] = embeddings_batch
+                filled += batch_rows
+
+                document_terms.add([doc["abstract_chunk"] for doc in ids_batch])
                 document_ids_list.extend([doc["documentID"] for doc in ids_batch])
+                chunk_ids.extend([doc["chunkID"] for doc in ids_batch])
                 document_date.extend([doc["articleDate"] for doc in ids_batch])
                 document_title.extend([doc["title"] for doc in ids_batch])
                 document_journal.extend([doc["journal:title"] for doc in ids_batch])
@@ -111,22 +303,71 @@ class TopicModeller:
                     [doc["authors.affiliation"] for doc in ids_batch]
                 )
 
-            if not embeddings_list:
+            if not filled:
                 logger.warning(
                     f"No embeddings found for the range {start_date} to {end_date}"
                 )
                 return None  # No data to process for this date range
 
-            embeddings = np.array(embeddings_list)
-            texts = documents_list
+            logger.info(
+                f"Collected {filled} embeddings of dimension {embeddings.shape[1]}"
+            )
+
+            # Near-duplicates are trained on once, through their representative
+            train_embeddings = embeddings[:filled]
+            train_chunk_ids = chunk_ids
+            training_rows = representative_of = np.arange(filled)
+            if self.dedup_threshold is not None:
+                training_rows, representative_of = find_near_duplicates(
+                    embeddings[:filled], self.dedup_threshold
+                )
+                representatives = self._allocate_embeddings(
+                    len(training_rows),
+                    embeddings.shape[1],
+                    f"{memmap_path}.representatives",
+                )
+                for start in range(0, len(training_rows), 65_536):
+                    rows = training_rows[start : start + 65_536]
+                    representatives[start : start + len(rows)] = embeddings[rows]
+                train_embeddings = representatives
+                train_chunk_ids = [chunk_ids[row] for row in training_rows]
+
+            if self.reduction_cache is not None:
+                reduced = self.reduction_cache.reduce(train_chunk_ids, train_embeddings)
+                umap_model = PrecomputedReduction(
+                    reduced, train_embeddings, self.shared_reducer_path
+                )
+            elif self.knn_cache is not None:
+                umap_model = self.knn_cache.umap(train_embeddings, **self.umap_params)
+            else:
+                umap_model = self.umap_model
+
+            # BERTopic is given the row number of each training chunk as its
+            # document and reads the term counts from the precomputed matrix
+            document_term_matrix = document_terms.matrix()
+            if self.dedup_threshold is not None:
+                # Each representative carries the terms of its whole group, so
+                # c-TF-IDF counts the duplicates as on the full window
+                groups = csr_matrix(
+                    (
+                        np.ones(filled, dtype=np.int32),
+                        (representative_of, np.arange(filled)),
+                    ),
+                    shape=(len(training_rows), filled),
+                )
+                document_term_matrix = (groups @ document_term_matrix).tocsr()
+            train_documents = [str(row) for row in range(len(training_rows))]
+            vectorizer_model = PrecomputedCountVectorizer(
+                document_term_matrix, document_terms.feature_names()
+            )
 
             logger.info("Initializing BERTopic model...")
 
             topic_model = BERTopic(
                 embedding_model=None,
-                umap_model=self.umap_model,
+                umap_model=umap_model,
                 hdbscan_model=self.hdbscan_model,
-                vectorizer_model=self.vectorizer_model,
+                vectorizer_model=vectorizer_model,
                 ctfidf_model=self.ctfidf_model,
                 representation_model=self.representation_model,
                 top_n_words=10,
@@ -139,44 +380,95 @@ class TopicModeller:
 
             # Train the model
             logger.info("Training BERTopic model...")
-            topics, _ = topic_model.fit_transform(texts, embeddings)
-
-            # Create a DataFrame to store document info
-            doc_info = pd.DataFrame(
-                {
-                    "DocumentID": document_ids_list,
-                    "Document": documents_list,
-                    "Embedding": embeddings_list,
-                    "ArticleDate": document_date,
-                    "Title": document_title,
-                    "Journal": document_journal,
-                    "MeshTerms": document_mesh,
-                    "Chemicals": document_chemicals,
-                    "Authors": document_authors,
-                    "Topic": topics,
-                }
+            # Chunks without a vector are counted but not yielded, so only the
+            # filled rows are passed on
+            train_topics, _ = topic_model.fit_transform(
+                train_documents, train_embeddings
             )
 
-            # Store doc_info in the model
-            topic_model.doc_info = doc_info
+            # The saved model vectorizes raw text into the same terms, and its
+            # representative documents are read back from disk
+            topic_model.vectorizer_model = document_terms.fitted_vectorizer()
+            topic_model.representative_docs_ = {
+                topic: document_terms.text([training_rows[int(doc)] for doc in docs])
+                for topic, docs in (topic_model.representative_docs_ or {}).items()
+            }
+            del vectorizer_model, document_term_matrix
+
+            # Every chunk takes the topic of its representative, and topic sizes
+            # count the duplicates as well
+            topics = np.asarray(train_topics)[representative_of]
+            if self.dedup_threshold is not None:
+                topic_model.topics_ = topics.tolist()
+                topic_model.topic_sizes_ = Counter(topic_model.topics_)
+
+            # Document info goes to a Parquet sidecar next to the model, so
+            # loading the model does not load every chunk with it
+            doc_info = {
+                "DocumentID": document_ids_list,
+                "ChunkID": chunk_ids,
+                "Document": document_terms.texts(),
+                "ArticleDate": document_date,
+                "Title": document_title,
+                "Journal": document_journal,
+                "MeshTerms": document_mesh,
+                "Chemicals": document_chemicals,
+                "Authors": document_authors,
+                "Topic": topics.tolist(),
+            }
+            if self.dedup_threshold is not None:
+                doc_info["RepresentativeChunkID"] = [
+                    train_chunk_ids[position] for position in representative_of
+                ]
 
             # Save the model
             bertopic_model_path = f"bertopic_model_{start_date}_{end_date}.pkl"
             exact_model_path = os.path.join(self.model_location, bertopic_model_path)
+            if isinstance(umap_model, PrecomputedReduction):
+                # The precomputed step only serves training; the shared reducer is
+                # saved instead, so the model transforms new documents as trained
+                # and loading it does not import this package
+                topic_model.umap_model = load_shared_reducer(self.shared_reducer_path)
             topic_model.save(exact_model_path)
+            artifact_path = write_topic_artifact(exact_model_path, topic_model)
+            write_doc_info(
+                doc_info_path(exact_model_path), doc_info, embeddings[:filled]
+            )
+            self.catalog.record(
+                date_range,
+                model_path=exact_model_path,
+                documents=filled,
+                training_documents=len(training_rows),
+                topic_sizes=dict(topic_model.topic_sizes_),
+                training_seconds=perf_counter() - started,
+                peak_rss_gb=peak_memory.stop(),
+                doc_info_path=doc_info_path(exact_model_path),
+                topic_artifact_path=artifact_path,
+            )
 
-            self._write_model_path(exact_model_path)
+            if record_path:
+                self._write_model_path(exact_model_path)
             self._log_memory_usage()
 
+            return exact_model_path
+
         except Exception as e:
             logger.error(f"[Error] Failed {start_date} to {end_date}: {str(e)}")
+            return None
 
         finally:
+            peak_memory.stop()
             # Explicit memory cleanup
+            self._release_embeddings(embeddings)
+            self._release_embeddings(representatives)
+            if document_terms is not None:
+                document_terms.release()
             del (
-                embeddings_list,
-                documents_list,
+                embeddings,
+                representatives,
+                document_terms,
                 document_ids_list,
+                chunk_ids,
                 document_date,
                 document_title,
                 document_journal,
@@ -184,8 +476,6 @@ class TopicModeller:
                 document_chemicals,
                 document_authors,
                 document_affiliations,
-                embeddings,
-                texts,
                 doc_info,
                 topic_model,
             )
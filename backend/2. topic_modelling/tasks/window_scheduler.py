@@ -0,0 +1,287 @@
+import logging
+import multiprocessing
+from time import sleep
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+from .database.database_connection import opensearch_connection
+from .database.database_read import CONST_LAKE_FIELD_NAMES, DataFetcher
+from .embedding_lake import EmbeddingLake
+from .topic_modelling import TopicModeller
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Peak memory of a window relative to its float32 embedding matrix; covers the
+# UMAP kNN graph and optimisation buffers, the reduced embeddings and HDBSCAN
+CONST_PEAK_MEMORY_FACTOR = 6.0
+# Memory held per document for its text, metadata and topic representation
+CONST_DOCUMENT_OVERHEAD_BYTES = 8 * 1024
+
+
+def estimate_window_memory(
+    n_documents: int,
+    dimension: int,
+    peak_factor: float = CONST_PEAK_MEMORY_FACTOR,
+) -> int:
+    """
+    Estimates the peak memory needed to train one BERTopic window.
+
+    Args:
+        n_documents (int): Number of documents in the window.
+        dimension (int): Embedding dimension.
+        peak_factor (float): Peak memory relative to the float32 embedding matrix.
+
+    Returns:
+        int: Estimated peak memory in bytes.
+    """
+    return int(
+        n_documents * (dimension * 4 * peak_factor + CONST_DOCUMENT_OVERHEAD_BYTES)
+    )
+
+
+def _init_worker(log_file: Optional[str]) -> None:
+    """Configures logging in a spawned worker the same way as the main process."""
+    if log_file:
+        logging.basicConfig(
+            filename=log_file,
+            filemode="a",
+            format="%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%d-%m-%y %H:%M:%S",
+            level=logging.INFO,
+        )
+
+
+def _train_window(
+    date_range: Tuple[str, str],
+    index_name: str,
+    metadata_index: Optional[str],
+    modeller_options: Dict[str, Any],
+    lake_dir: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Trains one window in a worker process with its own OpenSearch connection,
+    or reading from the embedding lake if `lake_dir` is given.
+
+    Returns:
+        Optional[str]: Path of the saved model, or None if training failed.
+    """
+    topic_modeller = TopicModeller(**modeller_options)
+    if lake_dir:
+        return topic_modeller.train_bertopic_model(
+            date_range=date_range,
+            data_fetcher=EmbeddingLake(lake_dir, field_names=CONST_LAKE_FIELD_NAMES),
+            record_path=False,
+        )
+
+    os_connection = opensearch_connection()
+    try:
+        data_fetcher = DataFetcher(
+            opensearch_connection=os_connection,
+            index_name=index_name,
+            metadata_index=metadata_index,
+        )
+        return topic_modeller.train_bertopic_model(
+            date_range=date_range, data_fetcher=data_fetcher, record_path=False
+        )
+    finally:
+        os_connection.close()
+
+
+class WindowScheduler:
+    """
+    Trains BERTopic date windows in parallel worker processes within a RAM budget.
+
+    Notes:
+        - A window is admitted only when its estimated peak memory fits the budget
+          left by the running windows. Windows are admitted in the given order,
+          skipping ahead to smaller windows that still fit.
+        - A window estimated above the whole budget runs on its own.
+        - Every worker process trains a single window and exits, so its memory is
+          returned to the system before the next window starts.
+        - Saved model paths are appended to `model_paths.txt` by the scheduler
+          only, so concurrent workers never write the file at the same time.
+    """
+
+    def __init__(
+        self,
+        data_fetcher: Any,
+        topic_modeller: Any,
+        index_name: str,
+        metadata_index: Optional[str] = None,
+        n_workers: int = 2,
+        memory_budget_gb: Optional[float] = None,
+        dimension: int = 768,
+        log_file: Optional[str] = None,
+        poll_seconds: float = 5.0,
+        lake_dir: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            data_fetcher (Any): DataFetcher used to count the documents of each window.
+            topic_modeller (Any): TopicModeller whose `model_paths.txt` records the
+                results; its options are passed on to the workers.
+            index_name (str): Index holding the chunk embeddings.
+            metadata_index (Optional[str]): Metadata index of the "parent" chunk schema.
+            n_workers (int): Maximum number of windows trained at once. Defaults to 2.
+            memory_budget_gb (Optional[float]): RAM available to all running windows.
+                Defaults to 80% of the currently available memory.
+            dimension (int): Embedding dimension used for the estimate. Defaults to 768.
+            log_file (Optional[str]): Log file of the worker processes.
+            poll_seconds (float): Pause between checks for finished windows.
+            lake_dir (Optional[str]): Embedding lake the workers read instead of
+                OpenSearch. Defaults to None.
+        """
+        self.data_fetcher = data_fetcher
+        self.topic_modeller = topic_modeller
+        self.index_name = index_name
+        self.metadata_index = metadata_index
+        self.n_workers = n_workers
+        self.memory_budget = int(
+            memory_budget_gb * 1024**3
+            if memory_budget_gb is not None
+            else psutil.virtual_memory().available * 0.8
+        )
+        self.dimension = dimension
+        self.log_file = log_file
+        self.poll_seconds = poll_seconds
+        self.lake_dir = lake_dir
+
+    def plan(self, date_ranges: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Counts the documents of each window and estimates its peak memory.
+
+        Args:
+            date_ranges (List[Tuple[str, str]]): Windows as (start_date, end_date).
+
+        Returns:
+            List[Dict[str, Any]]: Non-empty windows with `date_range`, `documents`
+                and `memory` in bytes.
+        """
+        windows = []
+        for date_range in date_ranges:
+            n_documents = self.data_fetcher.count_embeddings(*date_range)
+            if n_documents == 0:
+                logger.info(f"Skipping window {date_range} without documents")
+                continue
+            windows.append(
+                {
+                    "date_range": date_range,
+                    "documents": n_documents,
+                    "memory": estimate_window_memory(n_documents, self.dimension),
+                }
+            )
+        return windows
+
+    def _next_window(
+        self, pending: List[Dict[str, Any]], used_memory: int, n_running: int
+    ) -> Optional[Dict[str, Any]]:
+        if n_running >= self.n_workers:
+            return None
+
+        for window in pending:
+            if used_memory + window["memory"] <= self.memory_budget:
+                return window
+
+        # A window larger than the budget would otherwise never run
+        if n_running == 0:
+            logger.warning(
+                f"Window {pending[0]['date_range']} needs an estimated "
+                f"{pending[0]['memory'] / 1024**3:.1f} GB, above the budget of "
+                f"{self.memory_budget / 1024**3:.1f} GB; training it alone"
+            )
+            return pending[0]
+
+        return None
+
+    def run(self, date_ranges: List[Tuple[str, str]]) -> List[str]:
+        """
+        Trains all windows and records the saved models.
+
+        Args:
+            date_ranges (List[Tuple[str, str]]): Windows as (start_date, end_date).
+
+        Returns:
+            List[str]: Paths of the saved models, in order of completion.
+        """
+        if self.topic_modeller.resume:
+            trained = [
+                d for d in date_ranges if self.topic_modeller.catalog.is_trained(d)
+            ]
+            if trained:
+                logger.info(f"Skipping {len(trained)} windows already in the catalog")
+            date_ranges = [d for d in date_ranges if d not in trained]
+
+        pending = self.plan(date_ranges)
+        logger.info(
+            f"Scheduling {len(pending)} windows on {self.n_workers} workers within "
+            f"{self.memory_budget / 1024**3:.1f} GB"
+        )
+
+        running: Dict[Tuple[str, str], Tuple[Any, Dict[str, Any]]] = {}
+        used_memory = 0
+        model_paths = []
+
+        modeller_options = {
+            "model_path": self.topic_modeller.model_location,
+            "memmap_threshold_gb": self.topic_modeller.memmap_threshold_gb,
+            "shared_reducer_path": self.topic_modeller.shared_reducer_path,
+            "knn_cache_dir": self.topic_modeller.knn_cache_dir,
+            "dedup_threshold": self.topic_modeller.dedup_threshold,
+            "resume": self.topic_modeller.resume,
+        }
+
+        # Spawned workers do not inherit the parent's OpenSearch sockets
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            processes=self.n_workers,
+            initializer=_init_worker,
+            initargs=(self.log_file,),
+            maxtasksperchild=1,
+        ) as pool:
+            while pending or running:
+                window = self._next_window(pending, used_memory, len(running))
+                if window is not None:
+                    pending.remove(window)
+                    used_memory += window["memory"]
+                    result = pool.apply_async(
+                        _train_window,
+                        (
+                            window["date_range"],
+                            self.index_name,
+                            self.metadata_index,
+                            modeller_options,
+                            self.lake_dir,
+                        ),
+                    )
+                    running[window["date_range"]] = (result, window)
+                    logger.info(
+                        f"Started window {window['date_range']} with {window['documents']} "
+                        f"documents, {used_memory / 1024**3:.1f} GB of budget in use"
+                    )
+                    continue
+
+                for date_range, (result, window) in list(running.items()):
+                    if not result.ready():
+                        continue
+
+                    del running[date_range]
+                    used_memory -= window["memory"]
+                    try:
+                        model_path = result.get()
+                    except Exception as e:
+                        logger.error(f"Window {date_range} failed: {str(e)}")
+                        continue
+
+                    if model_path:
+                        self.topic_modeller._write_model_path(model_path)
+                        model_paths.append(model_path)
+                        logger.info(f"Window {date_range} saved to {model_path}")
+
+                if running:
+                    sleep(self.poll_seconds)
+
+        return model_paths
@@ -22,6 +22,11 @@ from tasks import (
     create_document_index,
     index_documents,
     DataFetcher,
+    get_vector_profile,
+    read_vector_projection,
+    EmbeddingLake,
+    LakeWindowFetcher,
+    KnnGraphCache,
 )
 from utils import load_config_from_env
 
@@ -62,6 +67,13 @@ def main() -> None:
         document_index_name = CONFIG["CLUSTER_CHAT_DOCUMENT_INFORMATION_INDEX"]
         model_path = CONFIG["MODEL_PATH"]
 
+        # "parent" chunk schema keeps document metadata in a separate index
+        metadata_index = (
+            CONFIG["CLUSTER_CHAT_OPENSEARCH_METADATA_INDEX"]
+            if CONFIG.get("CLUSTER_CHAT_CHUNK_SCHEMA") == "parent"
+            else None
+        )
+
         # Parse CLI arguments
         parser = argparse.ArgumentParser(description="Clustering Pipeline")
         parser.add_argument(
@@ -76,17 +88,51 @@ def main() -> None:
             ),
         )
 
+        parser.add_argument(
+            "-d",
+            "--documentvectors",
+            action="store_true",
+            help=(
+                "Project and index one pooled vector per document from the "
+                "document vector index instead of one vector per chunk."
+            ),
+        )
+
+        parser.add_argument(
+            "-l",
+            "--lake",
+            action="store_true",
+            help="Read chunk embeddings from the embedding lake instead of OpenSearch.",
+        )
+
         args = parser.parse_args()
 
+        lake_dir = CONFIG.get("CLUSTER_CHAT_EMBEDDING_LAKE_PATH")
+        if args.lake and not lake_dir:
+            parser.error("CLUSTER_CHAT_EMBEDDING_LAKE_PATH is not configured.")
+        if args.lake and args.documentvectors:
+            parser.error("--lake holds chunk vectors and cannot be combined with -d.")
+
         if args.clusterinformation:
             start_date, end_date = args.clusterinformation
 
-            data_fetcher = DataFetcher(
-                opensearch_connection=os_connection,
-                index_name=os_index,
-                start_date=start_date,
-                end_date=end_date,
-            )
+            if args.lake:
+                data_fetcher = LakeWindowFetcher(
+                    EmbeddingLake(lake_dir), start_date, end_date
+                )
+            else:
+                data_fetcher = DataFetcher(
+                    opensearch_connection=os_connection,
+                    index_name=os_index,
+                    start_date=start_date,
+                    end_date=end_date,
+                    metadata_index=metadata_index,
+                    document_vector_index=(
+                        CONFIG["CLUSTER_CHAT_OPENSEARCH_DOCUMENT_VECTOR_INDEX"]
+                        if args.documentvectors
+                        else None
+                    ),
+                )
 
             # Load or process BERTopic model data
             merged_topics_path = os.path.join(model_path, "merged_topics.pkl")
@@ -206,7 +252,13 @@ def main() -> None:
                 embeddings = shuffle(
                     cleaned_merged_topic_embeddings_array, random_state=42
                 )
-                umap_model = UMAP(n_components=2, n_jobs=1, random_state=42)
+                umap_params = {"n_components": 2, "n_jobs": 1, "random_state": 42}
+                knn_cache_dir = CONFIG.get("CLUSTER_CHAT_KNN_CACHE_PATH")
+                umap_model = (
+                    KnnGraphCache(knn_cache_dir).umap(embeddings, **umap_params)
+                    if knn_cache_dir
+                    else UMAP(**umap_params)
+                )
 
                 # Fit UMAP on topic embeddings only
                 umap_model.fit(embeddings)
@@ -240,21 +292,32 @@ def main() -> None:
                 )
 
             # Indexing clusters into OpenSearch
-            create_cluster_index(os_connection, cluster_index_name)
+            vector_profile = get_vector_profile()
+            # Chunk vectors (and the topic vectors built from them) may already be
+            # projected in stage 1; they are then stored without projecting again
+            vector_profile["source_projection"] = read_vector_projection(
+                os_connection, os_index
+            )
+            create_cluster_index(os_connection, cluster_index_name, vector_profile)
             index_clusters(
-                os_connection, cluster_index_name, clusters, cluster_embeddings
+                os_connection,
+                cluster_index_name,
+                clusters,
+                cluster_embeddings,
+                vector_profile=vector_profile,
             )
             # Update cluster paths in OpenSearch
             update_cluster_paths(os_connection, cluster_index_name)
 
             # Indexing documents into OpenSearch
-            create_document_index(os_connection, document_index_name)
+            create_document_index(os_connection, document_index_name, vector_profile)
             index_documents(
                 os_connection,
                 document_index_name,
                 data_fetcher,
                 umap_model,
                 cleaned_merged_topic_embeddings_array,
+                vector_profile=vector_profile,
             )
 
             logging.info("Clustering and indexing pipeline completed successfully.")
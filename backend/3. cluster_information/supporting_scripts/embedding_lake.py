@@ -0,0 +1,427 @@
+"""
+Local embedding lake: chunk vectors and metadata exported once from OpenSearch.
+"""
+
+import os
+import json
+import uuid
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Metadata columns of the lake, named as in the chunk index
+CONST_LAKE_FIELDS = [
+    "chunkID",
+    "documentID",
+    "articleDate",
+    "title",
+    "journal:title",
+    "keywords:name",
+    "meshTerms",
+    "chemicals",
+    "authors:name",
+    "authors:affiliation",
+    "abstract_chunk",
+]
+
+
+def _to_arrow(values: List[Any]) -> Tuple[pa.Array, bool]:
+    """
+    Converts a column to Arrow, falling back to JSON strings for mixed types.
+
+    Returns:
+        Tuple[pa.Array, bool]: The column and whether it was stored as JSON.
+    """
+    try:
+        return pa.array(values), False
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return (
+            pa.array(
+                [None if value is None else json.dumps(value) for value in values],
+                type=pa.string(),
+            ),
+            True,
+        )
+
+
+class EmbeddingLake:
+    """
+    Chunk embeddings and metadata stored locally, one shard per date window.
+
+    Layout of the lake directory:
+        - `manifest.json`: embedding dimension and one record per shard with its
+          date range, number of rows and export time.
+        - `vectors/<start>_<end>.f32`: raw float32 rows, read as `np.memmap`.
+        - `metadata/<start>_<end>.parquet`: metadata of the same rows, in order.
+
+    The lake offers the `count_embeddings`, `count_embeddings_per_day` and
+    `fetch_embeddings` methods of the OpenSearch `DataFetcher`, so it can be used
+    in its place.
+
+    Notes:
+        - Shards whose date range had not ended at export time are exported again
+          in append mode, so re-running an export keeps the lake current.
+        - Batches lying entirely inside the requested range are views of the
+          memory map, so they are not copied.
+    """
+
+    def __init__(
+        self,
+        lake_dir: str,
+        field_names: Optional[Dict[str, str]] = None,
+        batch_size: int = 5000,
+    ) -> None:
+        """
+        Opens or creates a lake.
+
+        Args:
+            lake_dir (str): Directory of the lake.
+            field_names (Optional[Dict[str, str]]): Renames metadata fields in the
+                records yielded by `fetch_embeddings`. Defaults to None.
+            batch_size (int): Rows per yielded batch. Defaults to 5000.
+        """
+        self.lake_dir = lake_dir
+        self.field_names = field_names or {}
+        self.batch_size = batch_size
+        self.vector_dir = os.path.join(lake_dir, "vectors")
+        self.metadata_dir = os.path.join(lake_dir, "metadata")
+        self.manifest_path = os.path.join(lake_dir, "manifest.json")
+        for directory in [self.vector_dir, self.metadata_dir]:
+            os.makedirs(directory, exist_ok=True)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {"dimension": None, "shards": {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp_path = f"{self.manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _vector_path(self, name: str) -> str:
+        return os.path.join(self.vector_dir, f"{name}.f32")
+
+    def _metadata_path(self, name: str) -> str:
+        return os.path.join(self.metadata_dir, f"{name}.parquet")
+
+    def export_window(
+        self,
+        date_range: Tuple[str, str],
+        data_fetcher: Any,
+        field_names: Optional[Dict[str, str]] = None,
+        append: bool = False,
+    ) -> int:
+        """
+        Exports the chunks of one date window from OpenSearch into a shard.
+
+        Args:
+            date_range (Tuple[str, str]): Window as (start_date, end_date).
+            data_fetcher (Any): OpenSearch DataFetcher yielding (embeddings, metadata).
+            field_names (Optional[Dict[str, str]]): Maps the fetcher's metadata keys
+                to lake fields where they differ. Defaults to None.
+            append (bool): Skip the window if it is already in the lake and had
+                ended when it was exported. Defaults to False.
+
+        Returns:
+            int: Number of rows written, or -1 if the window was skipped.
+
+        Raises:
+            ValueError: If the window overlaps a shard with other boundaries, or
+                the embedding dimension differs from the lake.
+        """
+        start_date, end_date = date_range
+        name = f"{start_date}_{end_date}"
+        manifest = self._read_manifest()
+
+        shard = manifest["shards"].get(name)
+        if append and shard and shard["exported_at"][:10] > end_date:
+            return -1
+
+        overlapping = [
+            other
+            for other in self._shards(start_date, end_date)
+            if other["name"] != name
+        ]
+        if overlapping:
+            raise ValueError(
+                f"Window {name} overlaps lake shard {overlapping[0]['name']}; "
+                f"export with the same window boundaries"
+            )
+
+        to_lake = field_names or {}
+        columns: Dict[str, List[Any]] = {field: [] for field in CONST_LAKE_FIELDS}
+        rows, dimension = 0, manifest["dimension"]
+
+        # Written next to the shard and moved in place once complete
+        tmp_vector_path = f"{self._vector_path(name)}.tmp"
+        with open(tmp_vector_path, "wb") as vector_file:
+            for embeddings_batch, ids_batch in data_fetcher.fetch_embeddings(
+                start_date, end_date
+            ):
+                embeddings_batch = np.ascontiguousarray(
+                    embeddings_batch, dtype=np.float32
+                )
+                if dimension is None:
+                    dimension = int(embeddings_batch.shape[1])
+                elif embeddings_batch.shape[1] != dimension:
+                    raise ValueError(
+                        f"Embedding dimension {embeddings_batch.shape[1]} does not match the lake ({dimension})"
+                    )
+
+                vector_file.write(embeddings_batch.tobytes())
+                rows += len(embeddings_batch)
+                for record in ids_batch:
+                    lake_record = {
+                        to_lake.get(key, key): value for key, value in record.items()
+                    }
+                    for field in CONST_LAKE_FIELDS:
+                        columns[field].append(lake_record.get(field))
+
+        arrays, json_columns = {}, []
+        for field, values in columns.items():
+            arrays[field], as_json = _to_arrow(values)
+            if as_json:
+                json_columns.append(field)
+
+        table = pa.table(arrays).replace_schema_metadata(
+            {"json_columns": json.dumps(json_columns)}
+        )
+        tmp_metadata_path = f"{self._metadata_path(name)}.tmp"
+        pq.write_table(table, tmp_metadata_path, compression="zstd")
+
+        os.replace(tmp_vector_path, self._vector_path(name))
+        os.replace(tmp_metadata_path, self._metadata_path(name))
+
+        manifest = self._read_manifest()
+        manifest["dimension"] = dimension
+        manifest["shards"][name] = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "rows": rows,
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._write_manifest(manifest)
+
+        logger.info(
+            f"Exported {rows} chunks of {start_date} to {end_date} into the lake"
+        )
+        return rows
+
+    def _shards(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Non-empty shards overlapping the date range, newest first."""
+        # Empty windows are recorded so appends skip them, but have no file to map
+        shards = [
+            {"name": name, **shard}
+            for name, shard in self._read_manifest()["shards"].items()
+            if shard["rows"]
+            and shard["start_date"] <= end_date
+            and shard["end_date"] >= start_date
+        ]
+        return sorted(shards, key=lambda shard: shard["end_date"], reverse=True)
+
+    def _rows_in_range(
+        self, shard: Dict[str, Any], start_date: str, end_date: str
+    ) -> Optional[np.ndarray]:
+        """
+        Row indices of a shard inside the date range, or None if all rows are.
+        """
+        if shard["start_date"] >= start_date and shard["end_date"] <= end_date:
+            return None
+
+        dates = pq.read_table(
+            self._metadata_path(shard["name"]),
+            columns=["articleDate"],
+            memory_map=True,
+        )["articleDate"]
+        days = pc.utf8_slice_codeunits(dates.cast(pa.string()), 0, 10)
+        mask = pc.and_(
+            pc.greater_equal(days, start_date), pc.less_equal(days, end_date)
+        )
+        return np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+
+    def vectors(self, name: str) -> np.memmap:
+        """
+        Memory-maps the vectors of a shard.
+
+        Args:
+            name (str): Shard name, `<start>_<end>`.
+
+        Returns:
+            np.memmap: Read-only float32 matrix of shape (rows, dimension).
+        """
+        manifest = self._read_manifest()
+        return np.memmap(
+            self._vector_path(name),
+            dtype=np.float32,
+            mode="r",
+            shape=(manifest["shards"][name]["rows"], manifest["dimension"]),
+        )
+
+    def count_embeddings(self, start_date: str, end_date: str) -> int:
+        """
+        Counts the chunks of a date range.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+
+        Returns:
+            int: Number of chunks in the range.
+        """
+        count = 0
+        for shard in self._shards(start_date, end_date):
+            rows = self._rows_in_range(shard, start_date, end_date)
+            count += shard["rows"] if rows is None else len(rows)
+        return count
+
+    def count_embeddings_per_day(
+        self, start_date: str, end_date: str
+    ) -> Dict[str, int]:
+        """
+        Counts the chunks of every day of a date range.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+
+        Returns:
+            Dict[str, int]: Date in 'YYYY-MM-DD' format to number of chunks.
+        """
+        counts: Counter = Counter()
+        for shard in self._shards(start_date, end_date):
+            dates = pq.read_table(
+                self._metadata_path(shard["name"]), columns=["articleDate"]
+            )["articleDate"].to_pylist()
+            counts.update(
+                str(day)[:10]
+                for day in dates
+                if day is not None and start_date <= str(day)[:10] <= end_date
+            )
+        return dict(counts)
+
+    def sample_embeddings(
+        self, start_date: str, end_date: str, sample_size: int, seed: int = 42
+    ) -> np.ndarray:
+        """
+        Draws a uniform random sample of the embeddings of a date range.
+
+        Only the sampled rows are read from the memory maps.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+            sample_size (int): Number of rows to draw, without replacement.
+            seed (int): Seed of the sample. Defaults to 42.
+
+        Returns:
+            np.ndarray: float32 matrix of at most `sample_size` rows, in random order.
+        """
+        shard_rows = []
+        for shard in self._shards(start_date, end_date):
+            rows = self._rows_in_range(shard, start_date, end_date)
+            shard_rows.append(
+                (shard["name"], np.arange(shard["rows"]) if rows is None else rows)
+            )
+
+        total = sum(len(rows) for _, rows in shard_rows)
+        rng = np.random.default_rng(seed)
+        picked = np.sort(rng.choice(total, size=min(sample_size, total), replace=False))
+
+        batches, offset = [], 0
+        for name, rows in shard_rows:
+            local = picked[(picked >= offset) & (picked < offset + len(rows))] - offset
+            if len(local):
+                batches.append(np.asarray(self.vectors(name)[rows[local]]))
+            offset += len(rows)
+
+        if not batches:
+            return np.empty((0, self._read_manifest()["dimension"] or 0), np.float32)
+        sample = np.concatenate(batches)
+        return sample[rng.permutation(len(sample))]
+
+    def fetch_embeddings(
+        self, start_date: str, end_date: str
+    ) -> Generator[Tuple[np.ndarray, List[Dict[str, Any]]], None, None]:
+        """
+        Yields batches of embeddings and their metadata from the lake.
+
+        Args:
+            start_date (str): Start date in 'YYYY-MM-DD' format.
+            end_date (str): End date in 'YYYY-MM-DD' format.
+
+        Yields:
+            Tuple[np.ndarray, List[Dict[str, Any]]]: A tuple containing:
+                - float32 embedding vectors, a view of the memory map where possible.
+                - List of metadata dictionaries for corresponding chunks.
+        """
+        for shard in self._shards(start_date, end_date):
+            vectors = self.vectors(shard["name"])
+            table = pq.read_table(self._metadata_path(shard["name"]), memory_map=True)
+            json_columns = set(
+                json.loads((table.schema.metadata or {}).get(b"json_columns", b"[]"))
+            )
+            rows = self._rows_in_range(shard, start_date, end_date)
+            n_rows = shard["rows"] if rows is None else len(rows)
+
+            for offset in range(0, n_rows, self.batch_size):
+                if rows is None:
+                    end = min(offset + self.batch_size, n_rows)
+                    embeddings_batch = vectors[offset:end]
+                    metadata = table.slice(offset, end - offset)
+                else:
+                    batch_rows = rows[offset : offset + self.batch_size]
+                    embeddings_batch = vectors[batch_rows]
+                    metadata = table.take(pa.array(batch_rows))
+
+                ids_batch = []
+                for record in metadata.to_pylist():
+                    for field in json_columns:
+                        if record[field] is not None:
+                            record[field] = json.loads(record[field])
+                    ids_batch.append(
+                        {
+                            self.field_names.get(key, key): value
+                            for key, value in record.items()
+                        }
+                    )
+
+                yield embeddings_batch, ids_batch
+
+            logger.info(f"Read {n_rows} chunks from lake shard {shard['name']}")
+
+
+class LakeWindowFetcher:
+    """
+    Reads one date range from an `EmbeddingLake` through a `fetch_embeddings()`
+    method without arguments, as the fetcher of stage 3 does.
+    """
+
+    def __init__(self, lake: EmbeddingLake, start_date: str, end_date: str) -> None:
+        """
+        Initializes the fetcher.
+
+        Args:
+            lake (EmbeddingLake): The lake to read.
+            start_date (str): Start date (inclusive) in 'YYYY-MM-DD' format.
+            end_date (str): End date (inclusive) in 'YYYY-MM-DD' format.
+        """
+        self.lake = lake
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def fetch_embeddings(
+        self,
+    ) -> Generator[Tuple[np.ndarray, List[Dict[str, Any]]], None, None]:
+        return self.lake.fetch_embeddings(self.start_date, self.end_date)
@@ -0,0 +1,314 @@
+import os
+import json
+import argparse
+import logging
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+from opensearchpy import OpenSearch
+from sklearn.decomposition import PCA
+from sklearn.utils import shuffle
+from tqdm import tqdm
+
+import utils
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Load environment-based configuration
+CONFIG = utils.load_config_from_env()
+
+
+def opensearch_connection() -> OpenSearch:
+    """
+    Establishes a secure connection to an OpenSearch cluster.
+
+    Returns:
+        OpenSearch: An authenticated OpenSearch client instance.
+    """
+    return OpenSearch(
+        hosts=[
+            {
+                "host": CONFIG["CLUSTER_CHAT_OPENSEARCH_HOST"],
+                "port": int(CONFIG["OPENSEARCH_PORT"]),
+            }
+        ],
+        http_auth=(CONFIG["OPENSEARCH_USERNAME"], CONFIG["OPENSEARCH_PASSWORD"]),
+        use_ssl=True,
+        verify_certs=True,
+        ssl_assert_hostname=False,
+        ssl_show_warn=False,
+    )
+
+
+def fetch_sample_embeddings(
+    client: OpenSearch,
+    index_name: str,
+    start_date: str,
+    end_date: str,
+    sample_size: int,
+    batch_size: int = 10000,
+) -> np.ndarray:
+    """
+    Fetches a random sample of the full-dimension embeddings of a date range.
+
+    Hits are scrolled in the order of a seeded `random_score`, so the first
+    `sample_size` hits are a uniform sample rather than the first documents in
+    index order.
+
+    Args:
+        client (OpenSearch): OpenSearch client connection.
+        index_name (str): Index storing unprojected vectors.
+        start_date (str): Start date in YYYY-MM-DD format.
+        end_date (str): End date in YYYY-MM-DD format.
+        sample_size (int): Maximum number of embeddings to fetch.
+        batch_size (int): Number of records per scroll page.
+
+    Returns:
+        np.ndarray: Shuffled float32 embeddings.
+
+    Raises:
+        ValueError: If the index already stores projected vectors.
+    """
+    mapping = client.indices.get_mapping(index=index_name)
+    meta = next(iter(mapping.values()), {}).get("mappings", {}).get("_meta", {})
+    if meta.get("vector_projection"):
+        raise ValueError(
+            f"Index {index_name} stores vectors projected with "
+            f"{meta['vector_projection']}; fit projections on full-dimension vectors."
+        )
+
+    search_params = {
+        "_source": ["pubmed_bert_vector"],
+        "query": {
+            "function_score": {
+                "query": {
+                    "bool": {
+                        "must": [
+                            {
+                                "range": {
+                                    "articleDate": {
+                                        "gte": start_date,
+                                        "lte": end_date,
+                                    }
+                                }
+                            }
+                        ]
+                    }
+                },
+                "random_score": {"seed": 42, "field": "_seq_no"},
+                "boost_mode": "replace",
+            }
+        },
+    }
+
+    embeddings: List[List[float]] = []
+    response = client.search(
+        index=index_name, body=search_params, scroll="5m", size=batch_size
+    )
+    scroll_id = response["_scroll_id"]
+    hits = response["hits"]["hits"]
+
+    with tqdm(total=sample_size, desc="Fetching embeddings") as pbar:
+        while hits and len(embeddings) < sample_size:
+            for doc in hits:
+                embedding = doc["_source"].get("pubmed_bert_vector")
+                if embedding:
+                    embeddings.append(embedding)
+
+            pbar.update(len(hits))
+            response = client.scroll(scroll_id=scroll_id, scroll="5m")
+            hits = response["hits"]["hits"]
+            scroll_id = response["_scroll_id"]
+
+    client.clear_scroll(scroll_id=scroll_id)
+
+    sample = np.asarray(embeddings[:sample_size], dtype=np.float32)
+    return shuffle(sample, random_state=42)
+
+
+def exact_top_k(
+    queries: np.ndarray, corpus: np.ndarray, k: int, batch_size: int = 256
+) -> np.ndarray:
+    """
+    Finds the k nearest corpus vectors of each query by exact cosine similarity.
+
+    Args:
+        queries (np.ndarray): Query vectors.
+        corpus (np.ndarray): Corpus vectors.
+        k (int): Number of neighbours.
+        batch_size (int): Number of queries scored at once.
+
+    Returns:
+        np.ndarray: Corpus row indices of shape (len(queries), k).
+    """
+
+    def normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    corpus = normalize(corpus)
+    neighbours = []
+
+    for start in range(0, len(queries), batch_size):
+        scores = normalize(queries[start : start + batch_size]) @ corpus.T
+        neighbours.append(np.argpartition(-scores, k, axis=1)[:, :k])
+
+    return np.vstack(neighbours)
+
+
+def recall_at_k(
+    queries: np.ndarray,
+    corpus: np.ndarray,
+    projected_queries: np.ndarray,
+    projected_corpus: np.ndarray,
+    k: int,
+) -> float:
+    """
+    Measures how many of the full-dimension exact neighbours survive the projection.
+
+    Args:
+        queries (np.ndarray): Full-dimension query vectors.
+        corpus (np.ndarray): Full-dimension corpus vectors.
+        projected_queries (np.ndarray): Projected query vectors.
+        projected_corpus (np.ndarray): Projected corpus vectors.
+        k (int): Number of neighbours.
+
+    Returns:
+        float: Mean recall@k over all queries.
+    """
+    truth = exact_top_k(queries, corpus, k)
+    found = exact_top_k(projected_queries, projected_corpus, k)
+
+    return float(
+        np.mean(
+            [
+                len(set(truth_row) & set(found_row)) / k
+                for truth_row, found_row in zip(truth, found)
+            ]
+        )
+    )
+
+
+def fit_projections(
+    embeddings: np.ndarray,
+    dimensions: List[int],
+    n_queries: int,
+    eval_corpus_size: int,
+    k: int,
+    output_dir: str,
+) -> List[Dict[str, float]]:
+    """
+    Fits PCA projections, evaluates their recall@k and saves them as artifacts.
+
+    Args:
+        embeddings (np.ndarray): Sampled full-dimension embeddings.
+        dimensions (List[int]): Output dimensions to fit.
+        n_queries (int): Number of held-out embeddings used as queries.
+        eval_corpus_size (int): Number of embeddings searched during evaluation.
+        k (int): Number of neighbours for recall@k.
+        output_dir (str): Directory for the projection artifacts.
+
+    Returns:
+        List[Dict[str, float]]: Dimension, explained variance and recall@k per artifact.
+
+    Notes:
+        - PCA is fitted once with the largest dimension; smaller projections keep its
+          leading components.
+        - Queries are held out of the fit, the corpus is taken from the fitted sample.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    queries = embeddings[:n_queries]
+    train = embeddings[n_queries:]
+    corpus = train[:eval_corpus_size]
+
+    logger.info(
+        f"Fitting PCA with {max(dimensions)} components on {len(train)} embeddings"
+    )
+    pca = PCA(n_components=max(dimensions), svd_solver="randomized", random_state=42)
+    pca.fit(train)
+
+    results = []
+    for dimension in sorted(dimensions):
+        components = pca.components_[:dimension].astype(np.float32)
+        mean = pca.mean_.astype(np.float32)
+        version = f"pca{dimension}-{date.today().strftime('%Y%m%d')}-n{len(train)}"
+
+        recall = recall_at_k(
+            queries,
+            corpus,
+            (queries - mean) @ components.T,
+            (corpus - mean) @ components.T,
+            k,
+        )
+        explained = float(pca.explained_variance_ratio_[:dimension].sum())
+
+        path = os.path.join(output_dir, f"vector_projection_{version}.npz")
+        np.savez(
+            path,
+            components=components,
+            mean=mean,
+            version=np.array(version),
+            explained_variance_ratio=np.array(explained),
+            recall_at_k=np.array(recall),
+            k=np.array(k),
+        )
+
+        result = {
+            "version": version,
+            "dimension": dimension,
+            "explained_variance": round(explained, 4),
+            f"recall@{k}": round(recall, 4),
+            "path": path,
+        }
+        logger.info(f"Projection saved: {result}")
+        results.append(result)
+
+    return results
+
+
+# Main script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit and evaluate linear projections for the stored vectors."
+    )
+    parser.add_argument(
+        "--index",
+        type=str,
+        default=CONFIG.get("CLUSTER_CHAT_OPENSEARCH_TARGET_INDEX_COMPLETE"),
+        help="Index with full-dimension vectors to sample from.",
+    )
+    parser.add_argument(
+        "--daterange",
+        metavar=("START_DATE", "END_DATE"),
+        type=str,
+        nargs=2,
+        default=["2020-01-01", "2024-07-31"],
+        help="Date range of the sample in YYYY-MM-DD format.",
+    )
+    parser.add_argument("--samplesize", type=int, default=200000)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256, 384])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--evalcorpus", type=int, default=100000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--output", type=str, default="vector_projections")
+    args = parser.parse_args()
+
+    client = opensearch_connection()
+    embeddings = fetch_sample_embeddings(
+        client, args.index, args.daterange[0], args.daterange[1], args.samplesize
+    )
+    logger.info(f"Fetched {embeddings.shape[0]} records for fitting projections.")
+
+    results = fit_projections(
+        embeddings,
+        args.dimensions,
+        args.queries,
+        args.evalcorpus,
+        args.k,
+        args.output,
+    )
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,161 @@
+import os
+import glob
+import hashlib
+import logging
+from typing import Any, Tuple
+
+import joblib
+import numpy as np
+from sklearn.utils import check_random_state
+from umap import UMAP
+from umap.umap_ import nearest_neighbors
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Metrics for which UMAP builds angular random projection trees
+CONST_ANGULAR_METRICS = (
+    "cosine",
+    "correlation",
+    "dice",
+    "jaccard",
+    "ll_dirichlet",
+    "hellinger",
+)
+
+
+def matrix_fingerprint(X: np.ndarray, rows_per_chunk: int = 65_536) -> str:
+    """
+    Hashes the shape and float32 contents of a matrix.
+
+    Args:
+        X (np.ndarray): Input matrix, e.g. a memory-mapped embedding matrix.
+        rows_per_chunk (int): Rows hashed at a time. Defaults to 65,536.
+
+    Returns:
+        str: Hex digest identifying the matrix.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(X.shape).encode())
+    for start in range(0, len(X), rows_per_chunk):
+        hasher.update(
+            np.ascontiguousarray(X[start : start + rows_per_chunk], dtype=np.float32)
+        )
+    return hasher.hexdigest()
+
+
+class KnnGraphCache:
+    """
+    Disk cache of the nearest-neighbour graphs UMAP builds before fitting.
+
+    Layout of the cache directory:
+        - `<fingerprint>-<metric>-k<k>.joblib`: neighbour indices, distances and
+          the pynndescent search index of one input matrix.
+
+    The graph is the most expensive part of a UMAP fit and only depends on the
+    input, the metric and the number of neighbours. Refits of the same input with
+    other `n_components`, `min_dist` or random seeds therefore reuse it through
+    UMAP's `precomputed_knn`.
+
+    Notes:
+        - A graph with more neighbours than requested is reused as well; UMAP
+          prunes it to `n_neighbors`.
+        - The search index is kept, so `transform` works on the fitted models.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cached graphs.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, fingerprint: str, metric: str, n_neighbors: int) -> str:
+        return os.path.join(
+            self.cache_dir, f"{fingerprint}-{metric}-k{n_neighbors}.joblib"
+        )
+
+    def _cached_path(self, fingerprint: str, metric: str, n_neighbors: int) -> str:
+        """Path of the smallest cached graph with at least `n_neighbors`, or ''."""
+        candidates = []
+        for path in glob.glob(
+            os.path.join(self.cache_dir, f"{fingerprint}-{metric}-k*.joblib")
+        ):
+            k = os.path.splitext(path)[0].rsplit("-k", 1)[-1]
+            if k.isdigit() and int(k) >= n_neighbors:
+                candidates.append((int(k), path))
+        return min(candidates)[1] if candidates else ""
+
+    def neighbours(
+        self,
+        X: np.ndarray,
+        n_neighbors: int = 15,
+        metric: str = "euclidean",
+        random_state: Any = None,
+        n_jobs: int = -1,
+    ) -> Tuple[np.ndarray, np.ndarray, Any]:
+        """
+        Returns the kNN graph of a matrix, building and caching it if needed.
+
+        Args:
+            X (np.ndarray): Input matrix.
+            n_neighbors (int): Number of neighbours. Defaults to 15.
+            metric (str): Name of the distance metric. Defaults to "euclidean".
+            random_state (Any): Seed of the graph construction. Not part of the
+                cache key. Defaults to None.
+            n_jobs (int): Threads used by pynndescent. Defaults to -1.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, Any]: Neighbour indices, distances and
+                the search index, as expected by UMAP's `precomputed_knn`.
+        """
+        fingerprint = matrix_fingerprint(X)
+        path = self._cached_path(fingerprint, metric, n_neighbors)
+
+        if path:
+            logger.info(f"Reusing kNN graph {os.path.basename(path)}")
+            return joblib.load(path)
+
+        logger.info(
+            f"Building kNN graph of {X.shape[0]} rows with k={n_neighbors} and metric {metric}"
+        )
+        knn = nearest_neighbors(
+            np.asarray(X, dtype=np.float32),
+            n_neighbors,
+            metric,
+            {},
+            metric in CONST_ANGULAR_METRICS,
+            check_random_state(random_state),
+            low_memory=True,
+            use_pynndescent=True,
+            n_jobs=n_jobs,
+        )
+
+        path = self._path(fingerprint, metric, n_neighbors)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(knn, tmp_path)
+        os.replace(tmp_path, path)
+        return knn
+
+    def umap(self, X: np.ndarray, **umap_params: Any) -> UMAP:
+        """
+        Creates an unfitted UMAP model that reuses the cached kNN graph of `X`.
+
+        Args:
+            X (np.ndarray): The matrix the model will be fitted on.
+            **umap_params (Any): Parameters of the UMAP model.
+
+        Returns:
+            UMAP: Model to fit on `X`.
+        """
+        knn = self.neighbours(
+            X,
+            n_neighbors=umap_params.get("n_neighbors", 15),
+            metric=umap_params.get("metric", "euclidean"),
+            random_state=umap_params.get("random_state"),
+            n_jobs=umap_params.get("n_jobs", -1),
+        )
+        return UMAP(**umap_params, precomputed_knn=knn)
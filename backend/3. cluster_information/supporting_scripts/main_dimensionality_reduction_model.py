@@ -7,6 +7,9 @@ import os
 import dotenv
 from tqdm import tqdm
 
+from embedding_lake import EmbeddingLake
+from knn_cache import KnnGraphCache
+
 
 def loadConfigFromEnv():
     """_summary_
@@ -52,7 +55,14 @@ def opensearch_connection():
     return os
 
 
-def fetch_sample_embeddings(client, index_name, sample_size=1000000, batch_size=10000):
+def fetch_sample_embeddings(
+    client,
+    index_name,
+    sample_size=1000000,
+    batch_size=10000,
+    start_date="2020-01-01",
+    end_date="2024-07-31",
+):
     """
     Fetch a sample of embeddings from OpenSearch.
 
@@ -61,12 +71,12 @@ def fetch_sample_embeddings(client, index_name, sample_size=1000000, batch_size=
         index_name (str): Name of the index to fetch data from.
         sample_size (int): Number of records to sample.
         batch_size (int): Number of records to fetch per batch.
+        start_date (str): Start date of the sampled chunks.
+        end_date (str): End date of the sampled chunks.
 
     Returns:
         np.ndarray: Array of embeddings sampled from OpenSearch.
     """
-    start_date = "2020-01-01"
-    end_date = "2024-07-31"
     search_params = {
         "_source": ["pubmed_bert_vector"],
         "query": {
@@ -110,27 +120,36 @@ def fetch_sample_embeddings(client, index_name, sample_size=1000000, batch_size=
     return embeddings
 
 
-def fit_umap_models(embeddings, output_dir):
+def fit_umap_models(embeddings, output_dir, knn_cache_dir=None):
     """
     Fit UMAP models with 50 and 2 components and save them.
 
     Args:
         embeddings (np.ndarray): Array of sampled embeddings.
         output_dir (str): Directory to save the UMAP models.
+        knn_cache_dir (str, optional): Directory of cached kNN graphs, so refits
+            on the same sample skip the graph construction. Defaults to None.
     """
+    knn_cache = KnnGraphCache(knn_cache_dir) if knn_cache_dir else None
+
+    def new_umap(X, **umap_params):
+        if knn_cache is None:
+            return umap.UMAP(**umap_params)
+        return knn_cache.umap(X, **umap_params)
+
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
     # UMAP model for 50 components
     print("Training UMAP model with 50 components...")
-    umap_50 = umap.UMAP(n_components=50, n_jobs=1, random_state=42)
+    umap_50 = new_umap(embeddings, n_components=50, n_jobs=1, random_state=42)
     embeddings_50 = umap_50.fit_transform(embeddings)
     joblib.dump(umap_50, os.path.join(output_dir, "umap_50_components.joblib"))
     print("UMAP model with 50 components saved.")
 
     # UMAP model for 2 components
     print("Training UMAP model with 2 components...")
-    umap_2 = umap.UMAP(n_components=2, n_jobs=1, random_state=42)
+    umap_2 = new_umap(embeddings_50, n_components=2, n_jobs=1, random_state=42)
     embeddings_2 = umap_2.fit_transform(
         embeddings_50
     )  # Transform 50D reduced embeddings to 2D
@@ -146,11 +165,26 @@ if __name__ == "__main__":
         400000  # Adjust based on available memory and sample representativeness
     )
     OUTPUT_DIR = "umap_models"
-
-    # Step 1: Fetch sample data
-    client = opensearch_connection()
-    embeddings = fetch_sample_embeddings(client, INDEX_NAME, SAMPLE_SIZE)
+    START_DATE, END_DATE = "2020-01-01", "2024-07-31"
+    LAKE_DIR = CONFIG.get("CLUSTER_CHAT_EMBEDDING_LAKE_PATH")
+
+    # Step 1: Fetch sample data, from the embedding lake when one is configured
+    if LAKE_DIR:
+        embeddings = EmbeddingLake(LAKE_DIR).sample_embeddings(
+            START_DATE, END_DATE, SAMPLE_SIZE
+        )
+    else:
+        client = opensearch_connection()
+        embeddings = fetch_sample_embeddings(
+            client,
+            INDEX_NAME,
+            SAMPLE_SIZE,
+            start_date=START_DATE,
+            end_date=END_DATE,
+        )
     print(f"Fetched {embeddings.shape[0]} records for training UMAP.")
 
     # Step 2: Fit UMAP models
-    fit_umap_models(embeddings, OUTPUT_DIR)
+    fit_umap_models(
+        embeddings, OUTPUT_DIR, CONFIG.get("CLUSTER_CHAT_KNN_CACHE_PATH") or None
+    )
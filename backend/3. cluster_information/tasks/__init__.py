@@ -14,3 +14,13 @@ from .database.index_documents import (
     create_document_index as create_document_index,
 )
 from .update_clusters import update_cluster_paths as update_cluster_paths
+from .database.database_vector_profile import (
+    get_vector_profile as get_vector_profile,
+    read_vector_projection as read_vector_projection,
+)
+from .topic_artifact import load_topic_artifact as load_topic_artifact
+from .embedding_lake import (
+    EmbeddingLake as EmbeddingLake,
+    LakeWindowFetcher as LakeWindowFetcher,
+)
+from .knn_cache import KnnGraphCache as KnnGraphCache
@@ -3,7 +3,8 @@ Module for fetching document embeddings from OpenSearch in batches.
 """
 
 import logging
-from typing import Generator, Tuple, List, Dict, Any
+from collections import OrderedDict
+from typing import Generator, Tuple, List, Dict, Any, Optional
 from datetime import date
 
 import numpy as np
@@ -12,6 +13,18 @@ from opensearchpy import OpenSearch
 
 logger = logging.getLogger(__name__)
 
+# Chunk fields kept by the "parent" chunk schema; everything else is joined from
+# the per-document metadata index
+CONST_CHUNK_FIELDS = [
+    "documentID",
+    "articleDate",
+    "abstract_chunk",
+    "pubmed_bert_vector",
+]
+
+# Fields of the pooled document vector records
+CONST_DOCUMENT_VECTOR_FIELDS = ["documentID", "articleDate", "pubmed_bert_vector"]
+
 
 class DataFetcher:
     """
@@ -22,6 +35,8 @@ class DataFetcher:
         os_index_name (str): Name of the OpenSearch index.
         start_date (str): Start date in 'YYYY-MM-DD' format.
         end_date (str): End date in 'YYYY-MM-DD' format.
+        metadata_index (Optional[str]): Per-document metadata index of the "parent" chunk schema.
+        document_vector_index (Optional[str]): Index of pooled document vectors to read instead of chunks.
     """
 
     def __init__(
@@ -30,6 +45,9 @@ class DataFetcher:
         index_name: str,
         start_date: str,
         end_date: str,
+        metadata_index: Optional[str] = None,
+        metadata_cache_size: int = 100_000,
+        document_vector_index: Optional[str] = None,
     ) -> None:
         """
         Initialize the DataFetcher with required configurations.
@@ -39,11 +57,87 @@ class DataFetcher:
             index_name (str): Name of the index to query.
             start_date (str): Start date (inclusive) in 'YYYY-MM-DD' format.
             end_date (str): End date (inclusive) in 'YYYY-MM-DD' format.
+            metadata_index (Optional[str]): Per-document metadata index of the "parent"
+                chunk schema. If given, metadata is joined into each chunk from this
+                index instead of being read from the chunks. Defaults to None.
+            metadata_cache_size (int): Number of metadata records kept in memory
+                between batches. Defaults to 100,000.
+            document_vector_index (Optional[str]): Index of pooled document vectors.
+                If given, one vector per document is read from this index and the
+                metadata and first abstract chunk are joined from `index_name`
+                (and `metadata_index`). Defaults to None (one vector per chunk).
         """
         self.client = opensearch_connection
         self.os_index_name = index_name
         self.start_date = start_date
         self.end_date = end_date
+        self.metadata_index = metadata_index
+        self.metadata_cache_size = metadata_cache_size
+        self.document_vector_index = document_vector_index
+        self._metadata_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = (
+            OrderedDict()
+        )
+
+    def _attach_document_metadata(
+        self,
+        hits: List[Dict[str, Any]],
+        fields: List[str],
+        index_name: Optional[str] = None,
+        id_suffix: str = "",
+    ) -> None:
+        """
+        Join per-document metadata into the `_source` of each chunk hit, in place.
+
+        Records missing from the cache are fetched with a single `mget` per batch.
+
+        Args:
+            hits (List[Dict[str, Any]]): Chunk hits returned by OpenSearch.
+            fields (List[str]): Metadata fields to fetch from the metadata index.
+            index_name (Optional[str]): Index holding the records. Defaults to the
+                metadata index.
+            id_suffix (str): Suffix appended to the document ID to form the record ID,
+                e.g. "_0" for the first chunk of a document. Defaults to "".
+        """
+        index_name = index_name or self.metadata_index
+        record_ids = {
+            hit["_source"].get(
+                "documentID"
+            ): f"{hit['_source'].get('documentID')}{id_suffix}"
+            for hit in hits
+            if hit["_source"].get("documentID") is not None
+        }
+        missing_ids = [
+            record_id
+            for record_id in set(record_ids.values())
+            if (index_name, record_id) not in self._metadata_cache
+        ]
+
+        if missing_ids:
+            response = self.client.mget(
+                index=index_name,
+                body={"ids": missing_ids},
+                _source_includes=fields,
+            )
+            for record in response["docs"]:
+                # Misses are not cached, so the chunk is reported below
+                if record.get("found"):
+                    self._metadata_cache[(index_name, record["_id"])] = record.get(
+                        "_source", {}
+                    )
+
+        for hit in hits:
+            doc_id = hit["_source"].get("documentID")
+            cache_key = (index_name, record_ids.get(doc_id))
+            metadata = self._metadata_cache.get(cache_key)
+            if metadata is None:
+                logger.warning(f"No record found in {index_name} for document {doc_id}")
+                continue
+            self._metadata_cache.move_to_end(cache_key)
+            hit["_source"] = {**metadata, **hit["_source"]}
+
+        # Evict the least recently used records
+        while len(self._metadata_cache) > self.metadata_cache_size:
+            self._metadata_cache.popitem(last=False)
 
     def fetch_embeddings(
         self,
@@ -85,13 +179,18 @@ class DataFetcher:
                     ]
                 }
             },
-            "_source": fields_to_include,
+            "_source": (
+                CONST_CHUNK_FIELDS if self.metadata_index else fields_to_include
+            ),
         }
 
+        if self.document_vector_index:
+            search_params["_source"] = CONST_DOCUMENT_VECTOR_FIELDS
+
         try:
             # Execute the initial search request
             response = self.client.search(
-                index=self.os_index_name,
+                index=self.document_vector_index or self.os_index_name,
                 scroll="5m",
                 size=1000,
                 body=search_params,
@@ -112,6 +211,34 @@ class DataFetcher:
                     try:
                         logging.info(f"considered {len(hits)} documents for processing")
 
+                        if self.document_vector_index:
+                            # The first chunk supplies the text (and, without a
+                            # metadata index, the metadata) of each document
+                            self._attach_document_metadata(
+                                hits,
+                                (
+                                    ["abstract_chunk"]
+                                    if self.metadata_index
+                                    else [
+                                        f
+                                        for f in fields_to_include
+                                        if f not in CONST_DOCUMENT_VECTOR_FIELDS
+                                    ]
+                                ),
+                                index_name=self.os_index_name,
+                                id_suffix="_0",
+                            )
+
+                        if self.metadata_index:
+                            self._attach_document_metadata(
+                                hits,
+                                [
+                                    f
+                                    for f in fields_to_include
+                                    if f not in CONST_CHUNK_FIELDS
+                                ],
+                            )
+
                         for doc in tqdm(hits):
                             embedding = doc["_source"].get("pubmed_bert_vector")
 
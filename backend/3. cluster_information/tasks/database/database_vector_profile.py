@@ -0,0 +1,407 @@
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+import utils
+from .database_vector_projection import load_vector_projection
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Load environment-based configuration
+CONFIG = utils.load_config_from_env()
+
+# Percentile of the absolute value of each dimension that the byte scale maps to
+# 127 when it is fitted on a sample; larger values are clipped.
+CONST_BYTE_QUANTIZATION_PERCENTILE = 99.9
+
+# Clipping rate of a written batch above which a warning is logged
+CONST_BYTE_CLIPPING_WARNING_RATE = 0.0001
+
+# Storage profiles for `knn_vector` fields
+#   - float32: full precision vectors in a Lucene HNSW graph (original layout)
+#   - fp16: Faiss HNSW graph with fp16 scalar quantization (~2x smaller)
+#   - byte: Faiss HNSW graph over signed byte vectors quantized on write (~4x smaller)
+VECTOR_STORAGE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "float32": {
+        "engine": "lucene",
+        "space_type": "cosinesimil",
+        "data_type": "float",
+        "encoder": None,
+        "normalize": False,
+        "m": 8,
+        "ef_construction": 40,
+        # Lucene takes the search breadth from approximate k-NN queries only
+        "ef_search": None,
+    },
+    "fp16": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "data_type": "float",
+        "encoder": {"name": "sq", "parameters": {"type": "fp16", "clip": True}},
+        "normalize": True,
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 128,
+    },
+    "byte": {
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "data_type": "byte",
+        "encoder": None,
+        "normalize": True,
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 128,
+        # Set from CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE, which the profile requires
+        "quantization_scale": None,
+    },
+}
+
+
+def get_vector_profile(profile_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolves a vector storage profile and applies HNSW overrides from the environment.
+
+    Args:
+        profile_name (Optional[str]): Name of the profile. Defaults to the
+            `CLUSTER_CHAT_VECTOR_PROFILE` setting, or "float32" if unset.
+
+    Returns:
+        Dict[str, Any]: Profile settings, including its `name`.
+
+    Raises:
+        ValueError: If the profile name is unknown, or the byte profile is chosen
+            without `CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE`.
+
+    Notes:
+        - `CLUSTER_CHAT_HNSW_M`, `CLUSTER_CHAT_HNSW_EF_CONSTRUCTION` and
+          `CLUSTER_CHAT_HNSW_EF_SEARCH` override the profile defaults when set.
+          `ef_search` is an index setting of the Faiss profiles only; the Lucene
+          profile ignores it, as all searches score documents exactly with
+          `script_score` and never traverse the graph.
+        - `CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE` sets the scale of the byte
+          profile. All writers of an index must use the same scale, so it is
+          required rather than fitted per process; `fit_byte_quantization_scale`
+          computes it once from a sample of normalized embeddings.
+        - Profiles with `normalize` store L2-normalized vectors and use inner product,
+          which ranks documents the same way as cosine similarity.
+        - `CLUSTER_CHAT_NORMALIZED_VECTORS=true` makes every profile store
+          L2-normalized vectors searched by inner product (Lucene supports
+          `innerproduct` from OpenSearch 2.13).
+        - If `CLUSTER_CHAT_VECTOR_PROJECTION` points to a projection artifact, the
+          profile carries it as `projection` and stores projected vectors.
+        - `source_projection` is the version of the projection the input vectors
+          already carry, None for model output. Stages reading vectors back from
+          an index set it with `read_vector_projection`.
+    """
+    name = profile_name or CONFIG.get("CLUSTER_CHAT_VECTOR_PROFILE") or "float32"
+
+    if name not in VECTOR_STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown vector storage profile '{name}'. "
+            f"Choose one of {sorted(VECTOR_STORAGE_PROFILES)}."
+        )
+
+    profile = copy.deepcopy(VECTOR_STORAGE_PROFILES[name])
+    profile["name"] = name
+
+    for key, config_key in [
+        ("m", "CLUSTER_CHAT_HNSW_M"),
+        ("ef_construction", "CLUSTER_CHAT_HNSW_EF_CONSTRUCTION"),
+        ("ef_search", "CLUSTER_CHAT_HNSW_EF_SEARCH"),
+    ]:
+        if CONFIG.get(config_key):
+            profile[key] = int(CONFIG[config_key])
+
+    if profile["engine"] != "faiss" and profile["ef_search"] is not None:
+        logger.warning(
+            f"CLUSTER_CHAT_HNSW_EF_SEARCH has no effect on the {profile['engine']} "
+            "engine and is ignored."
+        )
+        profile["ef_search"] = None
+
+    if profile["data_type"] == "byte":
+        if not CONFIG.get("CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE"):
+            raise ValueError(
+                "The byte profile requires CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE, so "
+                "every writer quantizes with the same scale. Compute it once with "
+                "fit_byte_quantization_scale on a sample of normalized embeddings."
+            )
+        profile["quantization_scale"] = float(
+            CONFIG["CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE"]
+        )
+
+    # Normalized-vector mode: unit vectors are written once, queries use dot products
+    if str(CONFIG.get("CLUSTER_CHAT_NORMALIZED_VECTORS", "")).lower() in ["true", "1"]:
+        profile["normalize"] = True
+        profile["space_type"] = "innerproduct"
+
+    profile["projection"] = load_vector_projection()
+    profile["source_projection"] = None
+
+    logger.info(f"Using vector storage profile: {profile}")
+    return profile
+
+
+def vector_index_meta(
+    vector_profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Builds the `_meta` of an index mapping, recording how its vectors are stored.
+
+    Args:
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+            Defaults to the configured profile.
+
+    Returns:
+        Dict[str, Any]: The profile name and the projection version (None if the
+        vectors are not projected).
+    """
+    profile = vector_profile or get_vector_profile()
+    projection = profile.get("projection")
+    return {
+        "vector_profile": profile["name"],
+        "vector_projection": projection.version if projection is not None else None,
+    }
+
+
+def read_vector_projection(os_connection: Any, index_name: str) -> Optional[str]:
+    """
+    Reads the projection version recorded in the `_meta` of an index mapping.
+
+    Args:
+        os_connection (Any): OpenSearch client connection.
+        index_name (str): Name of the index.
+
+    Returns:
+        Optional[str]: Projection version, or None if the index stores
+        unprojected vectors or predates the record.
+    """
+    mapping = os_connection.indices.get_mapping(index=index_name)
+    meta = next(iter(mapping.values()), {}).get("mappings", {}).get("_meta", {})
+    return meta.get("vector_projection")
+
+
+def check_vector_projection(
+    os_connection: Any,
+    index_name: str,
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Checks that an existing index stores vectors with the configured projection.
+
+    Args:
+        os_connection (Any): OpenSearch client connection.
+        index_name (str): Name of the index.
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+            Defaults to the configured profile.
+
+    Raises:
+        ValueError: If the index records another projection than the profile.
+    """
+    configured = vector_index_meta(vector_profile)["vector_projection"]
+    stored = read_vector_projection(os_connection, index_name)
+    if stored != configured:
+        raise ValueError(
+            f"Index {index_name} stores vectors with projection {stored}, but "
+            f"{configured} is configured (CLUSTER_CHAT_VECTOR_PROJECTION)."
+        )
+
+
+def knn_vector_field(
+    vector_profile: Optional[Dict[str, Any]] = None, dimension: int = 768
+) -> Dict[str, Any]:
+    """
+    Builds the mapping of a `knn_vector` field for a storage profile.
+
+    Args:
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+            Defaults to the configured profile.
+        dimension (int): Vector dimension. Defaults to 768. Replaced by the output
+            dimension of the profile's projection, if any.
+
+    Returns:
+        Dict[str, Any]: Field mapping for the OpenSearch index.
+    """
+    profile = vector_profile or get_vector_profile()
+
+    if profile.get("projection") is not None:
+        dimension = profile["projection"].output_dimension
+
+    parameters: Dict[str, Any] = {
+        "ef_construction": profile["ef_construction"],
+        "m": profile["m"],
+    }
+    if profile["encoder"] is not None:
+        parameters["encoder"] = profile["encoder"]
+    if profile["ef_search"] is not None:
+        parameters["ef_search"] = profile["ef_search"]
+
+    field: Dict[str, Any] = {
+        "type": "knn_vector",
+        "dimension": dimension,
+        "method": {
+            "engine": profile["engine"],
+            "name": "hnsw",
+            "space_type": profile["space_type"],
+            "parameters": parameters,
+        },
+    }
+    if profile["data_type"] != "float":
+        field["data_type"] = profile["data_type"]
+
+    return field
+
+
+def fit_byte_quantization_scale(
+    vectors: np.ndarray, percentile: float = CONST_BYTE_QUANTIZATION_PERCENTILE
+) -> float:
+    """
+    Fits the scale that maps normalized vectors onto signed bytes.
+
+    The `percentile` of the absolute value is taken per dimension, and the widest
+    dimension is mapped to 127. One scale is shared by all dimensions, so byte
+    vectors keep the ranking of the inner product of the float vectors.
+
+    Args:
+        vectors (np.ndarray): Sample of L2-normalized vectors.
+        percentile (float): Percentile mapped to 127. Defaults to 99.9.
+
+    Returns:
+        float: Scale to multiply the vectors with before rounding.
+    """
+    matrix = np.abs(np.asarray(vectors, dtype=np.float32))
+    spread = float(np.percentile(matrix, percentile, axis=0).max())
+    return 127.0 / spread if spread > 0 else 127.0
+
+
+def quantize_to_bytes(matrix: np.ndarray, vector_profile: Dict[str, Any]) -> np.ndarray:
+    """
+    Scales and rounds normalized vectors to signed bytes, clipping outliers.
+
+    Args:
+        matrix (np.ndarray): L2-normalized vectors.
+        vector_profile (Dict[str, Any]): Byte profile with its `quantization_scale`.
+
+    Returns:
+        np.ndarray: int8 vectors.
+
+    Raises:
+        ValueError: If the profile has no quantization scale.
+
+    Notes:
+        - Documents of an index must share one scale, which is why the scale is
+          configured and never fitted while writing.
+        - The scale of a query vector does not change the ranking of documents.
+    """
+    if vector_profile.get("quantization_scale") is None:
+        raise ValueError(
+            "Byte quantization needs a scale; set CLUSTER_CHAT_BYTE_QUANTIZATION_SCALE."
+        )
+
+    scaled = np.rint(matrix * vector_profile["quantization_scale"])
+    clipped = float(np.mean((scaled < -128) | (scaled > 127))) if scaled.size else 0.0
+
+    if clipped > CONST_BYTE_CLIPPING_WARNING_RATE:
+        logger.warning(
+            f"Byte quantization clipped {clipped:.3%} of the values of "
+            f"{len(matrix)} vectors; consider a smaller quantization scale."
+        )
+    else:
+        logger.debug(f"Byte quantization clipped {clipped:.3%} of the values.")
+
+    return np.clip(scaled, -128, 127).astype(np.int8)
+
+
+def prepare_vectors(
+    vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> List[List[Union[float, int]]]:
+    """
+    Converts embedding vectors into the representation stored by a profile.
+
+    Vectors are projected, then normalized and quantized as the profile requires.
+    Vectors that already carry the projection of the profile, as recorded in its
+    `source_projection`, are not projected again.
+
+    Args:
+        vectors (Union[np.ndarray, Sequence[Sequence[float]]]): Vectors to store.
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+            Defaults to the configured profile.
+
+    Returns:
+        List[List[Union[float, int]]]: JSON-serializable vectors.
+
+    Raises:
+        ValueError: If the vectors carry another projection than the profile stores.
+    """
+    profile = vector_profile or get_vector_profile()
+    matrix = np.asarray(vectors, dtype=np.float32)
+
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+
+    projection = profile.get("projection")
+    source_projection = profile.get("source_projection")
+    if source_projection is not None:
+        if projection is None or projection.version != source_projection:
+            raise ValueError(
+                f"Vectors projected with {source_projection} cannot be stored with "
+                f"the configured projection {projection}."
+            )
+    elif projection is not None:
+        matrix = projection.project(matrix)
+
+    if profile["normalize"]:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    if profile["data_type"] == "byte":
+        matrix = quantize_to_bytes(matrix, profile)
+
+    return matrix.tolist()
+
+
+def prepare_vector(
+    vector: Union[np.ndarray, Sequence[float]],
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> List[Union[float, int]]:
+    """
+    Converts a single embedding vector into the representation stored by a profile.
+
+    Args:
+        vector (Union[np.ndarray, Sequence[float]]): Vector to store.
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+
+    Returns:
+        List[Union[float, int]]: JSON-serializable vector.
+    """
+    return prepare_vectors(np.asarray(vector).reshape(1, -1), vector_profile)[0]
+
+
+def score_script_source(
+    vector_profile: Optional[Dict[str, Any]] = None, field: str = "pubmed_bert_vector"
+) -> str:
+    """
+    Builds the Painless source scoring documents by similarity to `params.query_value`.
+
+    Args:
+        vector_profile (Optional[Dict[str, Any]]): Profile from `get_vector_profile`.
+            Defaults to the configured profile.
+        field (str): Name of the vector field. Defaults to "pubmed_bert_vector".
+
+    Returns:
+        str: Script source; scores are shifted by 1.0 to stay non-negative.
+
+    Notes:
+        - Float vectors stored normalized are scored with a plain dot product.
+          Byte vectors keep `cosineSimilarity`, which is insensitive to their scale.
+    """
+    profile = vector_profile or get_vector_profile()
+
+    if profile["normalize"] and profile["data_type"] == "float":
+        return f'innerProduct(params.query_value, doc["{field}"]) + 1.0'
+    return f'cosineSimilarity(params.query_value, doc["{field}"]) + 1.0'
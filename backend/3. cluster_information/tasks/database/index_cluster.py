@@ -3,24 +3,37 @@ Module for creating and indexing cluster documents into OpenSearch.
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from tqdm import tqdm
 from opensearchpy import OpenSearch, NotFoundError
 from opensearchpy.helpers import bulk
 
+from .database_vector_profile import (
+    check_vector_projection,
+    knn_vector_field,
+    vector_index_meta,
+    prepare_vector,
+)
+
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE: int = 50
 MAX_PATH_BYTES: int = 32_766
 
 
-def create_cluster_index(os_connection: OpenSearch, cluster_index_name: str) -> None:
+def create_cluster_index(
+    os_connection: OpenSearch,
+    cluster_index_name: str,
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> None:
     """
     Create the cluster index in OpenSearch if it does not already exist.
 
     Args:
         os_connection (OpenSearch): The OpenSearch client.
         cluster_index_name (str): Name of the index to be created.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile for the
+            cluster embedding field. Defaults to the configured profile.
     """
     if not os_connection.indices.exists(index=cluster_index_name):
         cluster_index_body: Dict[str, Any] = {
@@ -45,6 +58,7 @@ def create_cluster_index(os_connection: OpenSearch, cluster_index_name: str) ->
                 "knn": True,
             },
             "mappings": {
+                "_meta": vector_index_meta(vector_profile),
                 "properties": {
                     "cluster_id": {"type": "keyword"},
                     "label": {"type": "text", "analyzer": "modified_analyzer"},
@@ -57,24 +71,18 @@ def create_cluster_index(os_connection: OpenSearch, cluster_index_name: str) ->
                     "path": {"type": "keyword"},
                     "is_leaf": {"type": "boolean"},
                     "children": {"type": "keyword"},
-                    "cluster_embedding": {
-                        "type": "knn_vector",
-                        "dimension": 768,
-                        "method": {
-                            "engine": "lucene",
-                            "name": "hnsw",
-                            "space_type": "cosinesimil",
-                            "parameters": {"ef_construction": 40, "m": 8},
-                        },
-                    },  # Cluster embedding vector
+                    "cluster_embedding": knn_vector_field(
+                        vector_profile, dimension=768
+                    ),  # Cluster embedding vector
                     "pairwise_similarity": {"type": "object"},
-                }
+                },
             },
         }
         os_connection.indices.create(index=cluster_index_name, body=cluster_index_body)
         logger.info(f"Created cluster index: {cluster_index_name}")
     else:
         logger.info(f"Cluster index {cluster_index_name} already exists")
+        check_vector_projection(os_connection, cluster_index_name, vector_profile)
 
 
 def index_clusters(
@@ -82,6 +90,7 @@ def index_clusters(
     cluster_index_name: str,
     clusters: Dict[str, Dict[str, Any]],
     cluster_embeddings: Dict[str, Any],
+    vector_profile: Optional[Dict[str, Any]] = None,
 ) -> None:
     """
     Index a dictionary of clusters and their embeddings into OpenSearch.
@@ -91,6 +100,8 @@ def index_clusters(
         cluster_index_name (str): Target index name.
         clusters (Dict[str, Dict[str, Any]]): Cluster metadata keyed by cluster ID.
         cluster_embeddings (Dict[str, np.ndarray]): Cluster embedding vectors keyed by cluster ID.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile used to
+            normalize or quantize the embeddings. Defaults to the configured profile.
     """
     logger.info("Started indexing cluster information into OpenSearch.")
     cluster_actions = []
@@ -158,7 +169,9 @@ def index_clusters(
                     "x": cluster["x"],
                     "y": cluster["y"],
                     "children": cluster["children"] if "children" in cluster else [],
-                    "cluster_embedding": cluster_embeddings[cluster_id].tolist(),
+                    "cluster_embedding": prepare_vector(
+                        cluster_embeddings[cluster_id], vector_profile
+                    ),
                     "pairwise_similarity": formatted_pairwise_similarity,
                 },
             }
@@ -8,11 +8,17 @@ import psutil
 import logging
 import numpy as np
 from time import sleep
-from typing import Any
+from typing import Any, Dict, Optional
 from tqdm import tqdm
 from opensearchpy import OpenSearch
 from opensearchpy.helpers import bulk
-from sklearn.metrics.pairwise import cosine_similarity
+
+from .database_vector_profile import (
+    check_vector_projection,
+    knn_vector_field,
+    vector_index_meta,
+    prepare_vectors,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +32,19 @@ def _log_memory_usage() -> None:
         logger.info(f"[Memory Usage] Current process memory: {mem:.2f} GB")
 
 
-def create_document_index(os_connection: OpenSearch, document_index_name: str) -> None:
+def create_document_index(
+    os_connection: OpenSearch,
+    document_index_name: str,
+    vector_profile: Optional[Dict[str, Any]] = None,
+) -> None:
     """
     Create a document index in OpenSearch with predefined settings and mappings if it does not exist.
 
     Args:
         os_connection (OpenSearch): OpenSearch client instance.
         document_index_name (str): Name of the index to be created.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile for the
+            document embedding field. Defaults to the configured profile.
     """
     if not os_connection.indices.exists(index=document_index_name):
         document_index_body = {
@@ -42,6 +54,7 @@ def create_document_index(os_connection: OpenSearch, document_index_name: str) -
                 "knn": True,
             },
             "mappings": {
+                "_meta": vector_index_meta(vector_profile),
                 "properties": {
                     "document_id": {"type": "keyword"},
                     "title": {"type": "text"},
@@ -56,17 +69,10 @@ def create_document_index(os_connection: OpenSearch, document_index_name: str) -
                     "cluster_id": {"type": "keyword"},
                     "x": {"type": "float"},
                     "y": {"type": "float"},
-                    "pubmed_bert_vector": {
-                        "type": "knn_vector",
-                        "dimension": 768,
-                        "method": {
-                            "engine": "lucene",
-                            "space_type": "cosinesimil",
-                            "name": "hnsw",
-                            "parameters": {"ef_construction": 40, "m": 8},
-                        },
-                    },
-                }
+                    "pubmed_bert_vector": knn_vector_field(
+                        vector_profile, dimension=768
+                    ),
+                },
             },
         }
         os_connection.indices.create(
@@ -75,6 +81,7 @@ def create_document_index(os_connection: OpenSearch, document_index_name: str) -
         logger.info(f"Created document index: {document_index_name}")
     else:
         logger.info(f"Document index '{document_index_name}' already exists.")
+        check_vector_projection(os_connection, document_index_name, vector_profile)
 
 
 def index_documents(
@@ -85,6 +92,7 @@ def index_documents(
     merged_topic_embeddings_array: np.ndarray,
     batch_size_umap: int = 500,
     batch_size_indexing: int = 1000,
+    vector_profile: Optional[Dict[str, Any]] = None,
 ) -> None:
     """
     Index document data with topic assignment and 2D UMAP embeddings into OpenSearch.
@@ -97,9 +105,18 @@ def index_documents(
         merged_topic_embeddings_array (np.ndarray): Cluster centroids for similarity computation.
         batch_size_umap (int): Batch size for UMAP transformation.
         batch_size_indexing (int): Batch size for OpenSearch indexing.
+        vector_profile (Optional[Dict[str, Any]]): Vector storage profile used to
+            normalize or quantize the embeddings. Defaults to the configured profile.
     """
     logger.info(f"Started indexing document information")
 
+    # Topic embeddings are normalized once; a dot product with them ranks topics
+    # by cosine similarity for every document, whatever the document's norm
+    topic_norms = np.linalg.norm(merged_topic_embeddings_array, axis=1, keepdims=True)
+    unit_topic_embeddings = (
+        merged_topic_embeddings_array / np.where(topic_norms == 0, 1.0, topic_norms)
+    ).astype(np.float32)
+
     try:
         # Fetch and process documents in batches
         for embeddings_batch, ids_batch in data_fetcher.fetch_embeddings():
@@ -108,9 +125,7 @@ def index_documents(
 
             # --- Topic Assignment ---
             # Compute similarities and assign topics
-            similarity = cosine_similarity(
-                document_embeddings, merged_topic_embeddings_array
-            )
+            similarity = document_embeddings @ unit_topic_embeddings.T
             assigned_topics = np.argmax(similarity, axis=1)
 
             # --- UMAP Transformation ---
@@ -135,6 +150,7 @@ def index_documents(
 
             # --- Document Preparation ---
             # Prepare documents for indexing
+            stored_vectors = prepare_vectors(document_embeddings, vector_profile)
             document_actions = []
             for idx, doc_info in enumerate(ids_batch):
                 action = {
@@ -154,7 +170,7 @@ def index_documents(
                         "cluster_id": str(assigned_topics[idx]),
                         "x": float(x_coords[idx]),
                         "y": float(y_coords[idx]),
-                        "pubmed_bert_vector": document_embeddings[idx].tolist(),
+                        "pubmed_bert_vector": stored_vectors[idx],
                     },
                 }
 
@@ -183,6 +199,7 @@ def index_documents(
             del document_umap_embeddings
             del transformed
             del document_actions
+            del stored_vectors
             del similarity
             del assigned_topics
 
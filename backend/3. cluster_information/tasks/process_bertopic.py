@@ -13,6 +13,7 @@ from sklearn.metrics.pairwise import cosine_similarity
 from difflib import SequenceMatcher
 
 from utils import load_config_from_env
+from .topic_artifact import load_topic_artifact
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -179,12 +180,16 @@ def process_models(
                 f"Processing Started for model {model_num + 1}/{len(model_paths)}: {path}"
             )
 
-            # Load the model
-            model = BERTopic.load(path)
-
-            # Extract topics and embeddings from the model
-            topics = model.get_topics()
-            embeddings = model.topic_embeddings_
+            # Read topics and embeddings from the compact artifact written in
+            # stage 2, and only load models trained before artifacts existed
+            artifact = load_topic_artifact(path)
+            if artifact is not None:
+                topics, embeddings = artifact
+            else:
+                model = BERTopic.load(path)
+                topics = model.get_topics()
+                embeddings = model.topic_embeddings_
+                del model
             topic_keys = list(topics.keys())
 
             batch_topics = {}
@@ -207,7 +212,7 @@ def process_models(
             all_topic_id_to_index = {**topic_id_to_index, **batch_topic_id_to_index}
 
             # Free memory from the loaded model
-            del model
+            del topics, embeddings
             gc.collect()
             sleep(2)
 
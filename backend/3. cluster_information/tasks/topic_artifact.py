@@ -0,0 +1,59 @@
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CONST_TOPIC_ARTIFACT_SUFFIX = ".topics.npz"
+
+
+def topic_artifact_path(model_path: str) -> str:
+    """
+    Returns the path of the topic artifact written next to a BERTopic model in stage 2.
+
+    Args:
+        model_path (str): Path of the model, e.g. `bertopic_model_<start>_<end>.pkl`.
+
+    Returns:
+        str: Path of the `.topics.npz` file.
+    """
+    return f"{os.path.splitext(model_path)[0]}{CONST_TOPIC_ARTIFACT_SUFFIX}"
+
+
+def load_topic_artifact(
+    model_path: str,
+) -> Optional[Tuple[Dict[int, List[Tuple[str, float]]], np.ndarray]]:
+    """
+    Reads the topics of a BERTopic model from its artifact instead of the model.
+
+    Args:
+        model_path (str): Path of the model.
+
+    Returns:
+        Optional[Tuple[Dict[int, List[Tuple[str, float]]], np.ndarray]]: Topics in
+            the format of `BERTopic.get_topics()` and the float32 topic embeddings
+            in the same order, or None if the model has no artifact.
+    """
+    path = topic_artifact_path(model_path)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as artifact:
+        topics = {
+            int(topic_id): [
+                (str(word), float(score))
+                for word, score in zip(words[:length], scores[:length])
+            ]
+            for topic_id, words, scores, length in zip(
+                artifact["topic_ids"],
+                artifact["words"],
+                artifact["scores"],
+                artifact["lengths"],
+            )
+        }
+        embeddings = artifact["embeddings"]
+
+    return topics, embeddings
@@ -10,6 +10,11 @@ from langchain.prompts import PromptTemplate
 
 import utils
 from tasks.rag_components import rag_loader, rag_prompt, rag_chatmodel
+from tasks.database.database_vector_profile import (
+    check_vector_projection,
+    get_vector_profile,
+    prepare_vector,
+)
 
 log = logging.getLogger(__name__)
 CONFIG = utils.load_config_from_env()
@@ -47,6 +52,12 @@ class Processor:
             device=self.device,
         )
 
+        # Query vectors must match the storage profile of the indexed vectors
+        self.vector_profile = get_vector_profile()
+        check_vector_projection(
+            self.os_connection, self.embeddings_os_index_name, self.vector_profile
+        )
+
         self.vector_store = rag_loader.RagLoader().get_opensearch_index(
             self.embed_model, self.embeddings_os_index_name
         )
@@ -60,6 +71,7 @@ class Processor:
             prompt_vars=["context", "question"],
             embedding_model=self.embed_model,
             model_config=self.model_config,
+            vector_profile=self.vector_profile,
         )
         
         self.llm = self.chat_model.llm
@@ -388,6 +400,7 @@ class Processor:
             text (str): Input text to encode.
 
         Returns:
-            List[float]: Vector embedding.
+            List[float]: Vector embedding, normalized or quantized like the
+            vectors stored under the configured vector storage profile.
         """
-        return self.embed_model.encode(text).tolist()
+        return prepare_vector(self.embed_model.encode(text), self.vector_profile)
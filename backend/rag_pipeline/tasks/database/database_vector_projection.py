@@ -0,0 +1,117 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+import utils
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Load environment-based configuration
+CONFIG = utils.load_config_from_env()
+
+
+class VectorProjection:
+    """
+    Linear map from full-dimension embeddings to the dimension stored in the indices.
+
+    The projection is fitted once on a corpus sample (see
+    `supporting_scripts/fit_vector_projection.py` of the cluster information stage)
+    and saved as a `.npz` artifact holding `components`, `mean` and `version`.
+    """
+
+    def __init__(
+        self, components: np.ndarray, mean: np.ndarray, version: str = "unversioned"
+    ) -> None:
+        """
+        Initializes the projection.
+
+        Args:
+            components (np.ndarray): Projection matrix of shape (output, input dimension).
+            mean (np.ndarray): Mean subtracted before projecting, of shape (input dimension,).
+            version (str): Version of the fitted artifact. Defaults to "unversioned".
+        """
+        self.components = np.asarray(components, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.version = version
+
+    def __repr__(self) -> str:
+        return (
+            f"VectorProjection(version={self.version}, "
+            f"{self.input_dimension} -> {self.output_dimension})"
+        )
+
+    @property
+    def input_dimension(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def output_dimension(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> "VectorProjection":
+        """
+        Loads a projection artifact.
+
+        Args:
+            path (str): Path of the `.npz` artifact.
+
+        Returns:
+            VectorProjection: Loaded projection.
+        """
+        with np.load(path) as artifact:
+            return cls(
+                artifact["components"],
+                artifact["mean"],
+                str(artifact["version"]) if "version" in artifact else "unversioned",
+            )
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Projects vectors to the output dimension.
+
+        Args:
+            vectors (np.ndarray): Vectors of shape (n, input dimension).
+
+        Returns:
+            np.ndarray: Projected vectors of shape (n, output dimension).
+
+        Raises:
+            ValueError: If the vectors do not have the input dimension.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+
+        if matrix.shape[-1] != self.input_dimension:
+            raise ValueError(
+                f"Cannot project vectors of dimension {matrix.shape[-1]} with "
+                f"{self}; expected {self.input_dimension}."
+            )
+
+        return (matrix - self.mean) @ self.components.T
+
+
+@lru_cache(maxsize=None)
+def _load_cached(path: str) -> VectorProjection:
+    projection = VectorProjection.load(path)
+    logger.info(f"Loaded vector projection {projection} from {path}")
+    return projection
+
+
+def load_vector_projection(path: Optional[str] = None) -> Optional[VectorProjection]:
+    """
+    Loads the configured vector projection.
+
+    Args:
+        path (Optional[str]): Path of the projection artifact. Defaults to the
+            `CLUSTER_CHAT_VECTOR_PROJECTION` setting.
+
+    Returns:
+        Optional[VectorProjection]: The projection, or None if no projection is configured.
+    """
+    path = path or CONFIG.get("CLUSTER_CHAT_VECTOR_PROJECTION")
+    if not path:
+        return None
+    return _load_cached(path)
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
 import utils
 from torch import cuda
@@ -19,6 +19,12 @@ from langchain_ollama import OllamaLLM
 
 from langchain_core.prompts import PromptTemplate
 
+from ..database.database_vector_profile import (
+    get_vector_profile,
+    prepare_vector,
+    score_script_source,
+)
+
 CONFIG: Dict[str, Any] = utils.load_config_from_env()
 logger = logging.getLogger(__name__)
 
@@ -45,6 +51,7 @@ class RagChat:
         prompt_vars: List[str],
         embedding_model: Any,
         model_config: Dict[str, Any],
+        vector_profile: Optional[Dict[str, Any]] = None,
     ) -> None:
         """
         Initializes the RAG chat pipeline with LLM, tokenizer, and vector index.
@@ -55,10 +62,13 @@ class RagChat:
             prompt_vars (List[str]): Variables used in the prompt template.
             embedding_model (Any): Sentence embedding model.
             model_config (Dict[str, Any]): Configuration for the generation model.
+            vector_profile (Optional[Dict[str, Any]]): Storage profile of the indexed
+                vectors, applied to query vectors. Defaults to the configured profile.
         """
         self.device = "cuda" if cuda.is_available() else "cpu"
         self.index = vector_store
         self.embed_model = embedding_model
+        self.vector_profile = vector_profile or get_vector_profile()
         self.prompt = prompt_object
 
         self.max_generated_token = model_config.get("max_tokens", 200)
@@ -167,10 +177,13 @@ class RagChat:
             Tuple[str, List[str]]: Augmented knowledge and document IDs used.
         """
         try:
-            # Encoding the query
-            embed_query = self.embed_model.encode(
-                [query], show_progress_bar=False
-            ).tolist()
+            # Encoding the query, projected like the indexed vectors
+            embed_query = [
+                prepare_vector(
+                    self.embed_model.encode([query], show_progress_bar=False)[0],
+                    self.vector_profile,
+                )
+            ]
 
             # Compute available space for knowledge based on prompt and query
             max_tokens_for_knowledge = (
@@ -191,7 +204,7 @@ class RagChat:
                             }
                         },
                         "script": {
-                            "source": 'cosineSimilarity(params.query_value, doc["pubmed_bert_vector"]) + 1.0',
+                            "source": score_script_source(self.vector_profile),
                             "params": {"query_value": embed_query[0]},
                         },
                     }